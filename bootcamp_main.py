@@ -4,7 +4,7 @@ Bootcamp F2025
 Main process to setup and manage all the other working processes
 """
 
-import multiprocessing as mp
+import asyncio
 import queue
 import time
 
@@ -17,8 +17,19 @@ from modules.command import command
 from modules.command import command_worker
 from modules.heartbeat import heartbeat_receiver_worker
 from modules.heartbeat import heartbeat_sender_worker
+from modules.telemetry import telemetry
 from modules.telemetry import telemetry_worker
+from utilities.workers import async_adapter
+from utilities.workers import autoscaler
+from utilities.workers import broadcast_channel
+from utilities.workers import execution_mode
+from utilities.workers import mailbox
+from utilities.workers import process_start
+from utilities.workers import priority_queue_proxy_wrapper
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_stats
+from utilities.workers import scheduling
+from utilities.workers import supervisor
 from utilities.workers import worker_controller
 from utilities.workers import worker_manager
 
@@ -34,15 +45,96 @@ HEARTBEAT_QUEUE_SIZE = 10
 TELEMETRY_QUEUE_SIZE = 50
 COMMAND_QUEUE_SIZE = 10
 
+# Set queue backends (SHARED_MEMORY requires a max size > 0)
+HEARTBEAT_QUEUE_BACKEND = queue_proxy_wrapper.QueueBackend.MANAGER
+TELEMETRY_QUEUE_BACKEND = queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+COMMAND_QUEUE_BACKEND = queue_proxy_wrapper.QueueBackend.MANAGER
+
+# Set what producers do when a queue is full, so a slow consumer never stalls them
+HEARTBEAT_QUEUE_OVERFLOW_POLICY = queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST
+TELEMETRY_QUEUE_OVERFLOW_POLICY = queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST
+COMMAND_QUEUE_OVERFLOW_POLICY = queue_proxy_wrapper.OverflowPolicy.BLOCK_WITH_TIMEOUT
+
+# Serve critical commands first, routine commands can be overtaken
+# by at most COMMAND_STARVATION_LIMIT commands per priority class (<= 0 for strict priority)
+# (ignores COMMAND_QUEUE_BACKEND and only supports non-evicting overflow policies)
+COMMAND_QUEUE_PRIORITIZED = True
+COMMAND_STARVATION_LIMIT = 5
+
+# Only keep the latest telemetry (ignores TELEMETRY_QUEUE_SIZE)
+# Deliver every telemetry sample to both command and main instead of splitting them
+# (either one replaces the telemetry queue: they are exclusive, require the MANAGER backend
+# and disable command autoscaling, conflicting settings are rejected at startup)
+TELEMETRY_CONFLATE = False
+TELEMETRY_BROADCAST = False
+
+# Emit telemetry on every attitude or position update instead of once both are new,
+# so that command reacts at the faster (attitude) rate
+# ALIGNED also interpolates the other half to the same timestamp, a period of the slower stream later
+TELEMETRY_FUSION_MODE = telemetry.FusionMode.ALIGNED
+# Minimum seconds between STREAMING telemetry outputs (0 for every update)
+TELEMETRY_EMIT_PERIOD = 0.0
+
 # Set worker counts
 HEARTBEAT_SENDER_WORKERS = 1
 HEARTBEAT_RECEIVER_WORKERS = 1
 TELEMETRY_WORKERS = 1
 COMMAND_WORKERS = 1
+# Scale between the worker count and this maximum from the input queue depth
+# (heartbeat and telemetry workers read the connection, so they have no input queue to scale on)
+# (command only scales on a telemetry queue, so COMMAND_MAX_WORKERS must equal COMMAND_WORKERS
+# with TELEMETRY_CONFLATE or TELEMETRY_BROADCAST)
+COMMAND_MAX_WORKERS = 4
+
+# Set where and how workers run, e.g. to isolate latency-critical workers:
+# scheduling.WorkerScheduling(cpu_affinity={2}, scheduling_class=scheduling.SchedulingClass.FIFO)
+# (real-time classes and negative nice values need root or CAP_SYS_NICE)
+# (only for PROCESS workers, None for workers running as threads of main)
+HEARTBEAT_SCHEDULING: "scheduling.WorkerScheduling | None" = None
+TELEMETRY_SCHEDULING: "scheduling.WorkerScheduling | None" = None
+COMMAND_SCHEDULING: "scheduling.WorkerScheduling | None" = scheduling.WorkerScheduling()
+
+# Set how worker processes start (None for the platform default: fork on Linux, spawn otherwise)
+# The connection passed to the workers only survives FORK
+WORKER_START_METHOD: "process_start.StartMethod | None" = None
+# Imported once by the fork server instead of by every FORKSERVER worker
+WORKER_PRELOAD_MODULES = [
+    "pymavlink.mavutil",
+    "modules.command.command_worker",
+    "modules.heartbeat.heartbeat_receiver_worker",
+    "modules.heartbeat.heartbeat_sender_worker",
+    "modules.telemetry.telemetry_worker",
+]
+# Run light I/O-bound stages as threads of main instead of processes to save memory
+# (threads cannot be restarted when hung, ASYNCIO requires coroutine function workers)
+# The heartbeat receiver and telemetry share one demultiplexer of the connection as threads,
+# as processes they each read the shared socket and take each other's messages
+# Forking main while its threads hold locks deadlocks the forked worker, so mixing
+# threads with processes (also restarted and spare ones) is rejected at startup
+# unless WORKER_START_METHOD is FORKSERVER or SPAWN
+# (which the connection does not survive: in the bootcamp, run all stages one way)
+HEARTBEAT_SENDER_EXECUTION_MODE = execution_mode.ExecutionMode.PROCESS
+HEARTBEAT_RECEIVER_EXECUTION_MODE = execution_mode.ExecutionMode.PROCESS
+TELEMETRY_EXECUTION_MODE = execution_mode.ExecutionMode.PROCESS
+COMMAND_EXECUTION_MODE = execution_mode.ExecutionMode.PROCESS
+# Started workers per stage waiting to replace a dead or hung worker without a process start
+WORKER_SPARES = 1
 
 # Any other constants
 MAIN_LOOP_DURATION = 100
 MAIN_LOOP_SLEEP = 0.1
+# Wait on the queues instead of polling every MAIN_LOOP_SLEEP
+# (waits in threads of main, so like THREAD workers it cannot be mixed with forked processes)
+USE_ASYNC_MAIN_LOOP = False
+COMMAND_PERIOD = 10.0
+QUEUE_STATS_PERIOD = 10.0
+# Workers that do not check their controller for this long are restarted (<= 0 to disable)
+# Workers must wait for input in shorter slices (see command_worker.INPUT_WAIT_SLICE)
+WORKER_STALL_DEADLINE = 5.0
+WORKER_CHECK_PERIOD = 1.0
+# Restart crashed workers with backoff, stop restarting a worker that keeps crashing
+WORKER_RESTART_POLICY = supervisor.RestartPolicy.ON_FAILURE
+EXIT_ACKNOWLEDGE_TIMEOUT = 1.0
 HEARTBEAT_PERIOD = 1.0
 HEIGHT_TOLERANCE = 5.0
 ANGLE_TOLERANCE = 10.0
@@ -51,10 +143,211 @@ ANGLE_TOLERANCE = 10.0
 # =================================================================================================
 
 
+def send_test_command(
+    command_request_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    main_logger: logger.Logger,
+) -> None:
+    """
+    Sends a test command to the command worker.
+    """
+    try:
+        test_command = {"type": "test", "data": f"command at {time.time()}"}
+        command_request_queue.put_nowait(test_command)
+        main_logger.info(f"Sent command: {test_command}")
+    except queue.Full:
+        main_logger.warning("Command queue is full")
+
+
+def log_queue_stats(
+    instrumented_queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper | broadcast_channel.BroadcastChannel]",
+    previous_stats: "dict[str, queue_stats.QueueStatsSnapshot | broadcast_channel.BroadcastStatsSnapshot]",
+    main_logger: logger.Logger,
+) -> None:
+    """
+    Logs the statistics of each queue and its throughput since the previous statistics.
+    """
+    for name, instrumented_queue in instrumented_queues.items():
+        stats = instrumented_queue.get_stats()
+        put_rate, get_rate = stats.get_throughput(previous_stats[name])
+        main_logger.info(f"{name}: {stats}, put rate: {put_rate:.1f}/s, get rate: {get_rate:.1f}/s")
+        previous_stats[name] = stats
+
+
+def log_worker_resources(
+    worker_managers: "list[worker_manager.WorkerManager]",
+    main_logger: logger.Logger,
+) -> None:
+    """
+    Logs the latest resource usage of each worker process.
+    """
+    for manager in worker_managers:
+        for slot, history in manager.get_resource_histories().items():
+            main_logger.info(f"{manager.get_target_name()} worker {slot}: {history}")
+
+
+def check_workers(
+    worker_managers: "list[worker_manager.WorkerManager]",
+    main_logger: logger.Logger,
+) -> None:
+    """
+    Restarts dead and hung workers, logs the stalls detected so far if there is a new one.
+    Scales the workers to their input queue depth. Logs the startup times of new workers.
+    Samples the resource usage of the workers.
+    """
+    for manager in worker_managers:
+        manager.check_and_scale_workers()
+        _ = manager.check_startup_times()
+        _ = manager.sample_resource_usage()
+
+        _, stall_stats = manager.get_stall_stats()
+        stall_count = 0 if stall_stats is None else stall_stats.stall_count
+
+        if not manager.check_and_restart_stalled_workers():
+            main_logger.error("Failed to restart stalled workers")
+
+        if stall_stats is not None and stall_stats.stall_count > stall_count:
+            main_logger.warning(f"Worker stalls: {stall_stats}")
+
+        # Crash loops are logged by the manager when detected
+        _ = manager.check_and_restart_dead_workers()
+
+
+def main_loop(
+    connection: mavutil.mavfile,
+    heartbeat_report_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    telemetry_report_queue: "queue_proxy_wrapper.QueueProxyWrapper | mailbox.MailboxReader | broadcast_channel.Subscription",
+    command_request_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    instrumented_queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper | broadcast_channel.BroadcastChannel]",
+    previous_stats: "dict[str, queue_stats.QueueStatsSnapshot | broadcast_channel.BroadcastStatsSnapshot]",
+    worker_managers: "list[worker_manager.WorkerManager]",
+    main_logger: logger.Logger,
+) -> None:
+    """
+    Polls the queues every MAIN_LOOP_SLEEP for MAIN_LOOP_DURATION.
+    """
+    start_time = time.time()
+    previous_stats_time = time.time()
+    previous_check_time = time.time()
+
+    while time.time() - start_time < MAIN_LOOP_DURATION:
+        # Check if connection is still alive
+        if not connection.target_system:
+            main_logger.warning("Drone disconnected")
+            break
+
+        # Process heartbeat reports
+        for heartbeat_data in heartbeat_report_queue.get_many(block=False):
+            main_logger.info(f"Received heartbeat: {heartbeat_data}")
+
+        # Process telemetry reports
+        for telemetry_data in telemetry_report_queue.get_many(block=False):
+            main_logger.info(f"Received telemetry: {telemetry_data}")
+
+        if int(time.time() - start_time) % 10 == 0:  # Every 10 seconds
+            send_test_command(command_request_queue, main_logger)
+
+        if time.time() - previous_stats_time >= QUEUE_STATS_PERIOD:
+            log_queue_stats(instrumented_queues, previous_stats, main_logger)
+            log_worker_resources(worker_managers, main_logger)
+            previous_stats_time = time.time()
+
+        if time.time() - previous_check_time >= WORKER_CHECK_PERIOD:
+            check_workers(worker_managers, main_logger)
+            previous_check_time = time.time()
+
+        time.sleep(MAIN_LOOP_SLEEP)
+
+
+async def main_loop_async(
+    connection: mavutil.mavfile,
+    heartbeat_report_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    telemetry_report_queue: "queue_proxy_wrapper.QueueProxyWrapper | mailbox.MailboxReader | broadcast_channel.Subscription",
+    command_request_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    instrumented_queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper | broadcast_channel.BroadcastChannel]",
+    previous_stats: "dict[str, queue_stats.QueueStatsSnapshot | broadcast_channel.BroadcastStatsSnapshot]",
+    worker_managers: "list[worker_manager.WorkerManager]",
+    main_logger: logger.Logger,
+) -> None:
+    """
+    Handles reports as soon as they arrive for MAIN_LOOP_DURATION,
+    sleeping until the next report or periodic task instead of polling.
+    """
+    heartbeat_source = async_adapter.AsyncQueueProxyWrapper(heartbeat_report_queue)
+    telemetry_source = async_adapter.AsyncQueueProxyWrapper(telemetry_report_queue)
+
+    start_time = time.time()
+    next_command_time = start_time
+    next_stats_time = start_time + QUEUE_STATS_PERIOD
+    next_check_time = start_time + WORKER_CHECK_PERIOD
+
+    heartbeat_task = asyncio.create_task(heartbeat_source.get_many())
+    telemetry_task = asyncio.create_task(telemetry_source.get_many())
+
+    try:
+        while time.time() - start_time < MAIN_LOOP_DURATION:
+            # Check if connection is still alive
+            if not connection.target_system:
+                main_logger.warning("Drone disconnected")
+                break
+
+            # Wake on the first report or at the next periodic task
+            # Bounded by MAIN_LOOP_SLEEP so that a disconnect is still noticed
+            timeout = min(
+                next_command_time,
+                next_stats_time,
+                next_check_time,
+                start_time + MAIN_LOOP_DURATION,
+                time.time() + MAIN_LOOP_SLEEP,
+            )
+            await asyncio.wait(
+                (heartbeat_task, telemetry_task),
+                timeout=max(timeout - time.time(), 0.0),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            # Process heartbeat reports
+            if heartbeat_task.done():
+                for heartbeat_data in heartbeat_task.result():
+                    main_logger.info(f"Received heartbeat: {heartbeat_data}")
+
+                heartbeat_task = asyncio.create_task(heartbeat_source.get_many())
+
+            # Process telemetry reports
+            if telemetry_task.done():
+                for telemetry_data in telemetry_task.result():
+                    main_logger.info(f"Received telemetry: {telemetry_data}")
+
+                telemetry_task = asyncio.create_task(telemetry_source.get_many())
+
+            if time.time() >= next_command_time:
+                send_test_command(command_request_queue, main_logger)
+                next_command_time += COMMAND_PERIOD
+
+            if time.time() >= next_stats_time:
+                log_queue_stats(instrumented_queues, previous_stats, main_logger)
+                log_worker_resources(worker_managers, main_logger)
+                next_stats_time += QUEUE_STATS_PERIOD
+
+            if time.time() >= next_check_time:
+                check_workers(worker_managers, main_logger)
+                next_check_time += WORKER_CHECK_PERIOD
+
+    finally:
+        # The pending gets finish once main closes the queues
+        heartbeat_task.cancel()
+        telemetry_task.cancel()
+        heartbeat_source.shutdown()
+        telemetry_source.shutdown()
+
+
 def main() -> int:
     """
     Main function.
     """
+    # Before any controller or queue is created
+    if WORKER_START_METHOD is not None:
+        process_start.set_start_method(WORKER_START_METHOD, WORKER_PRELOAD_MODULES)
+
     # Configuration settings
     result, config = read_yaml.open_config(logger.CONFIG_FILE_PATH)
     if not result:
@@ -84,16 +377,98 @@ def main() -> int:
     # =============================================================================================
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
+    # Reject settings that would otherwise be silently ignored
+    is_telemetry_queue = not TELEMETRY_CONFLATE and not TELEMETRY_BROADCAST
+    if TELEMETRY_CONFLATE and TELEMETRY_BROADCAST:
+        main_logger.error("TELEMETRY_CONFLATE and TELEMETRY_BROADCAST are exclusive")
+        return -1
+
+    if not is_telemetry_queue:
+        if TELEMETRY_QUEUE_BACKEND != queue_proxy_wrapper.QueueBackend.MANAGER:
+            main_logger.error("TELEMETRY_QUEUE_BACKEND only applies to a telemetry queue")
+            return -1
+
+        if COMMAND_MAX_WORKERS > COMMAND_WORKERS:
+            main_logger.error("COMMAND_MAX_WORKERS only applies to a telemetry queue")
+            return -1
+
+    # A forked worker gets copies of the locks that threads of main hold, never released
+    execution_modes = {
+        HEARTBEAT_SENDER_EXECUTION_MODE,
+        HEARTBEAT_RECEIVER_EXECUTION_MODE,
+        TELEMETRY_EXECUTION_MODE,
+        COMMAND_EXECUTION_MODE,
+    }
+    has_main_threads = len(execution_modes) > 1 or USE_ASYNC_MAIN_LOOP
+    if (
+        execution_mode.ExecutionMode.PROCESS in execution_modes
+        and has_main_threads
+        and process_start.is_forking()
+    ):
+        main_logger.error("Worker threads and forked worker processes cannot be mixed")
+        return -1
+
     # Create a worker controller
     controller = worker_controller.WorkerController()
+    # Each stage can also be paused or restarted alone, e.g. pause command to shed load
+    # while telemetry keeps flowing
+    heartbeat_sender_controller = controller.create_child()
+    heartbeat_receiver_controller = controller.create_child()
+    telemetry_controller = controller.create_child()
+    command_controller = controller.create_child()
 
     # Create a multiprocess manager for synchronized queues
-    manager = mp.Manager()
+    # QueueManager also supports batch operations in a single round trip
+    manager = queue_proxy_wrapper.QueueManager()
+    # Shut down together with main
+    # pylint: disable-next=consider-using-with
+    manager.start()
 
     # Create queues using QueueProxyWrapper
-    heartbeat_report_queue = queue_proxy_wrapper.QueueProxyWrapper(manager, HEARTBEAT_QUEUE_SIZE)
-    telemetry_report_queue = queue_proxy_wrapper.QueueProxyWrapper(manager, TELEMETRY_QUEUE_SIZE)
-    command_request_queue = queue_proxy_wrapper.QueueProxyWrapper(manager, COMMAND_QUEUE_SIZE)
+    heartbeat_report_queue = queue_proxy_wrapper.QueueProxyWrapper(
+        manager,
+        HEARTBEAT_QUEUE_SIZE,
+        HEARTBEAT_QUEUE_BACKEND,
+        overflow_policy=HEARTBEAT_QUEUE_OVERFLOW_POLICY,
+    )
+    # Command only acts on the freshest telemetry, a mailbox bounds it to 1 sample behind
+    if TELEMETRY_CONFLATE:
+        telemetry_report_queue = mailbox.Mailbox()
+    elif TELEMETRY_BROADCAST:
+        telemetry_report_queue = broadcast_channel.BroadcastChannel(TELEMETRY_QUEUE_SIZE)
+    else:
+        telemetry_report_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            manager,
+            TELEMETRY_QUEUE_SIZE,
+            TELEMETRY_QUEUE_BACKEND,
+            overflow_policy=TELEMETRY_QUEUE_OVERFLOW_POLICY,
+        )
+
+    # Each reader of a broadcast channel needs its own subscription,
+    # and of a mailbox its own reader, or threads of main take each other's samples
+    if isinstance(telemetry_report_queue, broadcast_channel.BroadcastChannel):
+        command_telemetry_queue = telemetry_report_queue.subscribe("command")
+        main_telemetry_queue = telemetry_report_queue.subscribe("main")
+    elif isinstance(telemetry_report_queue, mailbox.Mailbox):
+        command_telemetry_queue = telemetry_report_queue.create_reader()
+        main_telemetry_queue = telemetry_report_queue.create_reader()
+    else:
+        command_telemetry_queue = telemetry_report_queue
+        main_telemetry_queue = telemetry_report_queue
+    if COMMAND_QUEUE_PRIORITIZED:
+        command_request_queue = priority_queue_proxy_wrapper.PriorityQueueProxyWrapper(
+            manager,
+            COMMAND_QUEUE_SIZE,
+            COMMAND_STARVATION_LIMIT,
+            overflow_policy=COMMAND_QUEUE_OVERFLOW_POLICY,
+        )
+    else:
+        command_request_queue = queue_proxy_wrapper.QueueProxyWrapper(
+            manager,
+            COMMAND_QUEUE_SIZE,
+            COMMAND_QUEUE_BACKEND,
+            overflow_policy=COMMAND_QUEUE_OVERFLOW_POLICY,
+        )
 
     # Create worker properties for each worker type (what inputs it takes, how many workers)
     result, heartbeat_sender_properties = worker_manager.WorkerProperties.create(
@@ -102,8 +477,10 @@ def main() -> int:
         work_arguments=(connection, HEARTBEAT_PERIOD),  # connection, heartbeat_period
         input_queues=[],
         output_queues=[],
-        controller=controller,
+        controller=heartbeat_sender_controller,
         local_logger=main_logger,
+        worker_scheduling=HEARTBEAT_SCHEDULING,
+        worker_execution_mode=HEARTBEAT_SENDER_EXECUTION_MODE,
     )
     if not result:
         print("Failed to create Heartbeat Sender worker properties")
@@ -116,22 +493,30 @@ def main() -> int:
         work_arguments=(connection,),  # connection only, queue handled by framework
         input_queues=[],
         output_queues=[heartbeat_report_queue],
-        controller=controller,
+        controller=heartbeat_receiver_controller,
         local_logger=main_logger,
+        worker_scheduling=HEARTBEAT_SCHEDULING,
+        worker_execution_mode=HEARTBEAT_RECEIVER_EXECUTION_MODE,
     )
     if not result:
         print("Failed to create Heartbeat Receiver worker properties")
         return -1
 
-    # Telemetry - takes (connection, telemetry_queue, worker_ctrl)
+    # Telemetry - takes (connection, fusion_mode, emit_period, telemetry_queue, worker_ctrl)
     result, telemetry_properties = worker_manager.WorkerProperties.create(
         count=TELEMETRY_WORKERS,
         target=telemetry_worker.telemetry_worker,
-        work_arguments=(connection,),  # connection only, queue and controller handled by framework
+        work_arguments=(
+            connection,
+            TELEMETRY_FUSION_MODE,
+            TELEMETRY_EMIT_PERIOD,
+        ),  # queue and controller handled by framework
         input_queues=[],
         output_queues=[telemetry_report_queue],
-        controller=controller,
+        controller=telemetry_controller,
         local_logger=main_logger,
+        worker_scheduling=TELEMETRY_SCHEDULING,
+        worker_execution_mode=TELEMETRY_EXECUTION_MODE,
     )
     if not result:
         print("Failed to create Telemetry worker properties")
@@ -148,10 +533,12 @@ def main() -> int:
             HEIGHT_TOLERANCE,
             ANGLE_TOLERANCE,
         ),  # connection, target, height_tolerance, angle_tolerance
-        input_queues=[telemetry_report_queue],
+        input_queues=[command_telemetry_queue],
         output_queues=[command_request_queue],
-        controller=controller,
+        controller=command_controller,
         local_logger=main_logger,
+        worker_scheduling=COMMAND_SCHEDULING,
+        worker_execution_mode=COMMAND_EXECUTION_MODE,
     )
     if not result:
         print("Failed to create Command worker properties")
@@ -163,6 +550,11 @@ def main() -> int:
     result, heartbeat_sender_manager = worker_manager.WorkerManager.create(
         worker_properties=heartbeat_sender_properties,
         local_logger=main_logger,
+        stall_deadline=WORKER_STALL_DEADLINE,
+        spare_count=WORKER_SPARES,
+        restart_supervisor=supervisor.RestartSupervisor(
+            HEARTBEAT_SENDER_WORKERS, WORKER_RESTART_POLICY
+        ),
     )
     if not result:
         print("Failed to create manager for Heartbeat Sender")
@@ -173,6 +565,11 @@ def main() -> int:
     result, heartbeat_receiver_manager = worker_manager.WorkerManager.create(
         worker_properties=heartbeat_receiver_properties,
         local_logger=main_logger,
+        stall_deadline=WORKER_STALL_DEADLINE,
+        spare_count=WORKER_SPARES,
+        restart_supervisor=supervisor.RestartSupervisor(
+            HEARTBEAT_RECEIVER_WORKERS, WORKER_RESTART_POLICY
+        ),
     )
     if not result:
         print("Failed to create manager for Heartbeat Receiver")
@@ -183,6 +580,9 @@ def main() -> int:
     result, telemetry_manager = worker_manager.WorkerManager.create(
         worker_properties=telemetry_properties,
         local_logger=main_logger,
+        stall_deadline=WORKER_STALL_DEADLINE,
+        spare_count=WORKER_SPARES,
+        restart_supervisor=supervisor.RestartSupervisor(TELEMETRY_WORKERS, WORKER_RESTART_POLICY),
     )
     if not result:
         print("Failed to create manager for Telemetry")
@@ -190,9 +590,18 @@ def main() -> int:
     assert telemetry_manager is not None
     worker_managers.append(telemetry_manager)
 
+    # A mailbox or broadcast subscription keeps no depth to scale on
+    command_autoscaler = None
+    if is_telemetry_queue:
+        command_autoscaler = autoscaler.Autoscaler(COMMAND_WORKERS, COMMAND_MAX_WORKERS)
+
     result, command_manager = worker_manager.WorkerManager.create(
         worker_properties=command_properties,
         local_logger=main_logger,
+        stall_deadline=WORKER_STALL_DEADLINE,
+        spare_count=WORKER_SPARES,
+        restart_supervisor=supervisor.RestartSupervisor(COMMAND_WORKERS, WORKER_RESTART_POLICY),
+        worker_autoscaler=command_autoscaler,
     )
     if not result:
         print("Failed to create manager for Command")
@@ -207,40 +616,44 @@ def main() -> int:
     main_logger.info("Started")
 
     # Main's work: read from all queues that output to main, and log any commands that we make
-    start_time = time.time()
+    # Sampled periodically to find bottlenecks
+    instrumented_queues = {
+        "heartbeat_report_queue": heartbeat_report_queue,
+        "command_request_queue": command_request_queue,
+    }
+    if not TELEMETRY_CONFLATE:
+        instrumented_queues["telemetry_report_queue"] = telemetry_report_queue
+
+    previous_stats = {
+        name: instrumented_queue.get_stats()
+        for name, instrumented_queue in instrumented_queues.items()
+    }
 
     try:
-        while time.time() - start_time < MAIN_LOOP_DURATION:
-            # Check if connection is still alive
-            if not connection.target_system:
-                main_logger.warning("Drone disconnected")
-                break
-
-            # Process heartbeat reports
-            try:
-                while True:
-                    heartbeat_data = heartbeat_report_queue.get_nowait()
-                    main_logger.info(f"Received heartbeat: {heartbeat_data}")
-            except queue.Empty:
-                pass
-
-            # Process telemetry reports
-            try:
-                while True:
-                    telemetry_data = telemetry_report_queue.get_nowait()
-                    main_logger.info(f"Received telemetry: {telemetry_data}")
-            except queue.Empty:
-                pass
-
-            if int(time.time() - start_time) % 10 == 0:  # Every 10 seconds
-                try:
-                    test_command = {"type": "test", "data": f"command at {time.time()}"}
-                    command_request_queue.put_nowait(test_command)
-                    main_logger.info(f"Sent command: {test_command}")
-                except queue.Full:
-                    main_logger.warning("Command queue is full")
-
-            time.sleep(MAIN_LOOP_SLEEP)
+        if USE_ASYNC_MAIN_LOOP:
+            asyncio.run(
+                main_loop_async(
+                    connection,
+                    heartbeat_report_queue,
+                    main_telemetry_queue,
+                    command_request_queue,
+                    instrumented_queues,
+                    previous_stats,
+                    worker_managers,
+                    main_logger,
+                )
+            )
+        else:
+            main_loop(
+                connection,
+                heartbeat_report_queue,
+                main_telemetry_queue,
+                command_request_queue,
+                instrumented_queues,
+                previous_stats,
+                worker_managers,
+                main_logger,
+            )
 
     except KeyboardInterrupt:
         main_logger.info("Keyboard interrupt received")
@@ -250,12 +663,21 @@ def main() -> int:
 
     main_logger.info("Requested exit")
 
-    # Fill and drain queues
-    command_request_queue.fill_and_drain_queue()
-    telemetry_report_queue.fill_and_drain_queue()
-    heartbeat_report_queue.fill_and_drain_queue()
+    # Close queues, which wakes every worker blocked on them
+    command_request_queue.close()
+    telemetry_report_queue.close()
+    heartbeat_report_queue.close()
 
-    main_logger.info("Queues cleared")
+    main_logger.info("Queues closed")
+
+    # Workers confirm the exit as soon as they see it, no fixed delay
+    if controller.wait_for_all_acknowledged(EXIT_ACKNOWLEDGE_TIMEOUT):
+        main_logger.info("All workers acknowledged exit")
+    else:
+        main_logger.warning(
+            f"{controller.get_acknowledged_count()} workers acknowledged exit "
+            f"within {EXIT_ACKNOWLEDGE_TIMEOUT}s"
+        )
 
     # Clean up workers
     for manager in worker_managers:
@@ -263,6 +685,11 @@ def main() -> int:
 
     main_logger.info("Stopped")
 
+    # Free shared memory once no worker is attached anymore
+    command_request_queue.unlink()
+    telemetry_report_queue.unlink()
+    heartbeat_report_queue.unlink()
+
     controller.clear_exit()
 
     # =============================================================================================
@@ -14,9 +14,8 @@ from documentation.multiprocess_example.countup import countup_worker
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
-from utilities.workers import queue_proxy_wrapper
+from utilities.workers import pipeline
 from utilities.workers import worker_controller
-from utilities.workers import worker_manager
 
 
 # Play with these numbers to see queue bottlenecks
@@ -28,6 +27,35 @@ COUNTUP_WORKER_COUNT = 2
 ADD_RANDOM_WORKER_COUNT = 2
 CONCATENATOR_WORKER_COUNT = 2
 
+# Queue statistics are logged with this period, bottlenecks show up as
+# a high water mark at max size and producers blocked in put
+QUEUE_STATS_PERIOD = 1  # seconds
+
+
+def log_queue_stats(
+    example_pipeline: pipeline.Pipeline,
+    main_logger: logger.Logger,
+) -> None:
+    """
+    Logs a statistics snapshot of each queue.
+    """
+    for name, stats in example_pipeline.get_stats().items():
+        main_logger.info(f"{name}: {stats}", True)
+
+
+def sleep_and_log_queue_stats(
+    duration: float,
+    example_pipeline: pipeline.Pipeline,
+    main_logger: logger.Logger,
+) -> None:
+    """
+    Sleeps for duration seconds while logging queue statistics periodically.
+    """
+    end_time = time.time() + duration
+    while time.time() < end_time:
+        time.sleep(min(QUEUE_STATS_PERIOD, max(end_time - time.time(), 0.0)))
+        log_queue_stats(example_pipeline, main_logger)
+
 
 # main() is required for early return
 def main() -> int:
@@ -62,151 +90,78 @@ def main() -> int:
     # See 2nd note: https://docs.python.org/3/library/multiprocessing.html#pipes-and-queues
     mp_manager = mp.Manager()
 
-    # Queue maxsize should always be >= the larger of producers/consumers count
-    # Example: Producers 3, consumers 2, so queue maxsize minimum is 3
-    countup_to_add_random_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager,
-        COUNTUP_TO_ADD_RANDOM_QUEUE_MAX_SIZE,
-    )
-    add_random_to_concatenator_queue = queue_proxy_wrapper.QueueProxyWrapper(
-        mp_manager,
-        ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE,
-    )
-
-    # Worker properties
-    result, countup_worker_properties = worker_manager.WorkerProperties.create(
-        count=COUNTUP_WORKER_COUNT,  # How many workers
-        target=countup_worker.countup_worker,  # What's the function that this worker runs
-        work_arguments=(  # The function's arguments excluding input/output queues and controller
-            3,
-            100,
-        ),
-        input_queues=[],  # Note that input/output queues must be in the proper order
-        output_queues=[countup_to_add_random_queue],
-        controller=controller,  # Worker controller
-        local_logger=main_logger,  # Main logger to log any failures during worker creation
-    )
-    if not result:
-        print("Failed to create arguments for Countup")
-        return -1
-
-    # Get Pylance to stop complaining
-    assert countup_worker_properties is not None
-
-    result, add_random_worker_properties = worker_manager.WorkerProperties.create(
-        count=ADD_RANDOM_WORKER_COUNT,
-        target=add_random_worker.add_random_worker,
-        work_arguments=(
-            252,
-            10,
-            5,
-        ),
-        input_queues=[countup_to_add_random_queue],
-        output_queues=[add_random_to_concatenator_queue],
-        controller=controller,
-        local_logger=main_logger,
-    )
-    if not result:
-        print("Failed to create arguments for Add Random")
-        return -1
-
-    # Get Pylance to stop complaining
-    assert add_random_worker_properties is not None
-
-    result, concatenator_worker_properties = worker_manager.WorkerProperties.create(
-        count=CONCATENATOR_WORKER_COUNT,
-        target=concatenator_worker.concatenator_worker,
-        work_arguments=(
-            "Hello ",
-            " world!",
-        ),
-        input_queues=[add_random_to_concatenator_queue],
-        output_queues=[],
-        controller=controller,
-        local_logger=main_logger,
-    )
-    if not result:
-        print("Failed to create arguments for Concatenator")
-        return -1
-
-    # Get Pylance to stop complaining
-    assert concatenator_worker_properties is not None
-
-    # Prepare processes
+    # Declare the topology: stages run a worker function in identical processes,
+    # edges are the queues between them
     # Data path: countup_worker to add_random_worker to concatenator_workers
-    worker_managers: list[worker_manager.WorkerManager] = []  # List of all worker managers
-
-    result, countup_manager = worker_manager.WorkerManager.create(
-        worker_properties=countup_worker_properties,
-        local_logger=main_logger,
-    )
-    if not result:
-        print("Failed to create manager for Countup")
-        return -1
-
-    # Get Pylance to stop complaining
-    assert countup_manager is not None
-
-    worker_managers.append(countup_manager)
-
-    result, add_random_manager = worker_manager.WorkerManager.create(
-        worker_properties=add_random_worker_properties,
-        local_logger=main_logger,
+    # Queue maxsize should always be >= the larger of producers/consumers count,
+    # build() checks this
+    # Example: Producers 3, consumers 2, so queue maxsize minimum is 3
+    builder = (
+        pipeline.PipelineBuilder()
+        .add_stage(
+            "Countup",
+            countup_worker.countup_worker,  # What's the function that this worker runs
+            COUNTUP_WORKER_COUNT,  # How many workers
+            (3, 100),  # The function's arguments excluding input/output queues and controller
+        )
+        .add_stage(
+            "Add Random",
+            add_random_worker.add_random_worker,
+            ADD_RANDOM_WORKER_COUNT,
+            (252, 10, 5),
+        )
+        .add_stage(
+            "Concatenator",
+            concatenator_worker.concatenator_worker,
+            CONCATENATOR_WORKER_COUNT,
+            ("Hello ", " world!"),
+        )
+        # Note that a stage gets its queues in the order the edges are declared
+        .add_edge(
+            "Countup to Add Random",
+            "Countup",
+            "Add Random",
+            COUNTUP_TO_ADD_RANDOM_QUEUE_MAX_SIZE,
+        )
+        .add_edge(
+            "Add Random to Concatenator",
+            "Add Random",
+            "Concatenator",
+            ADD_RANDOM_TO_CONCATENATOR_QUEUE_MAX_SIZE,
+        )
     )
-    if not result:
-        print("Failed to create manager for Add Random")
-        return -1
-
-    # Get Pylance to stop complaining
-    assert add_random_manager is not None
-
-    worker_managers.append(add_random_manager)
 
-    result, concatenator_manager = worker_manager.WorkerManager.create(
-        worker_properties=concatenator_worker_properties,
-        local_logger=main_logger,
-    )
+    # Create the queues and prepare the processes
+    # Main logger logs any failures during creation
+    result, example_pipeline = builder.build(mp_manager, controller, main_logger)
     if not result:
-        print("Failed to create manager for Concatenator")
+        print("Failed to create pipeline")
         return -1
 
     # Get Pylance to stop complaining
-    assert concatenator_manager is not None
-
-    worker_managers.append(concatenator_manager)
+    assert example_pipeline is not None
 
     # Start worker processes
-    for manager in worker_managers:
-        manager.start_workers()
+    example_pipeline.start()
 
     main_logger.info("Started", True)
 
     # Run for some time and then pause
-    time.sleep(2)
+    sleep_and_log_queue_stats(2, example_pipeline, main_logger)
     controller.request_pause()
 
     main_logger.info("Paused", True)
 
-    time.sleep(4)
+    sleep_and_log_queue_stats(4, example_pipeline, main_logger)
     controller.request_resume()
     main_logger.info("Resumed", True)
 
-    time.sleep(2)
-
-    # Stop the processes
-    controller.request_exit()
-
-    main_logger.info("Requested exit", True)
-
-    # Fill and drain queues from END TO START
-    countup_to_add_random_queue.fill_and_drain_queue()
-    add_random_to_concatenator_queue.fill_and_drain_queue()
-
-    main_logger.info("Queues cleared", True)
+    sleep_and_log_queue_stats(2, example_pipeline, main_logger)
 
-    # Clean up worker processes
-    for manager in worker_managers:
-        manager.join_workers()
+    # Stop the processes, close queues (which wakes every worker blocked on them)
+    # and clean up worker processes, join times are logged per worker
+    # Consumers get 1 sentinel each, producers have their puts refused
+    example_pipeline.stop()
 
     main_logger.info("Stopped", True)
 
@@ -7,12 +7,33 @@ import pathlib
 
 from pymavlink import mavutil
 
+from utilities.workers import priority_queue_proxy_wrapper
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import command
 from ..common.modules.logger import logger
 
 
+# Wait for input in slices, so that an idle worker still checks its controller
+# (beating its watchdog) instead of looking stalled and getting killed mid wait
+INPUT_WAIT_SLICE = 0.1  # seconds
+
+# Altitude corrections are critical, yaw changes are routine
+COMMAND_PRIORITIES = {
+    "CHANGE_ALTITUDE": priority_queue_proxy_wrapper.Priority.CRITICAL,
+    "CHANGING_YAW": priority_queue_proxy_wrapper.Priority.NORMAL,
+}
+
+
+def get_command_priority(run_command: str) -> priority_queue_proxy_wrapper.Priority:
+    """
+    Returns the priority of the command string from `command.Command.run()`,
+    NORMAL for unknown commands.
+    """
+    name = run_command.split(":", 1)[0]
+    return COMMAND_PRIORITIES.get(name, priority_queue_proxy_wrapper.Priority.NORMAL)
+
+
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
@@ -57,10 +78,31 @@ def command_worker(
     # Instantiate class object (command.Command)
     command_object = command.Command.create(connection, target, local_logger)
     while not controller.is_exit_requested():
-        path = command_input_queue.queue.get()
-        run_command = command_object.run(target, path)
-        if run_command:
-            command_output_queue.queue.put(run_command)
+        # Everything that backed up is moved in a single round trip
+        paths = command_input_queue.get_many(timeout=INPUT_WAIT_SLICE)
+        if len(paths) == 0:
+            continue
+
+        # Exit on sentinel, items after it are dropped
+        is_sentinel_received = None in paths
+        if is_sentinel_received:
+            paths = paths[: paths.index(None)]
+
+        run_commands = []
+        for path in paths:
+            run_command = command_object.run(target, path)
+            if run_command:
+                run_commands.append(run_command)
+
+        # Critical commands overtake routine ones if the output queue supports it
+        if isinstance(command_output_queue, priority_queue_proxy_wrapper.PriorityQueueProxyWrapper):
+            priorities = [get_command_priority(run_command) for run_command in run_commands]
+            command_output_queue.put_many(run_commands, priorities=priorities)
+        else:
+            command_output_queue.put_many(run_commands)
+
+        if is_sentinel_received:
+            break
 
 
 # =================================================================================================
@@ -0,0 +1,198 @@
+"""
+Reads each MAVLink message of a connection once and hands it to every consumer of its type.
+"""
+
+import os
+import threading
+import time
+
+from pymavlink import mavutil
+
+
+class LatestMessage:
+    """
+    Latest message of a type for one consumer, replaced when a newer one arrives.
+
+    Each consumer subscribes its own, so consumers of the same type never take each other's.
+    """
+
+    def __init__(self, message_type: str, condition: threading.Condition) -> None:
+        """
+        message_type: MAVLink message name, e.g. "ATTITUDE".
+        condition: Condition of the demultiplexer, guards the message.
+        """
+        self.message_type = message_type
+        self.__condition = condition
+        self.__message: "mavutil.mavlink.MAVLink_message | None" = None
+
+    def put(self, message: "mavutil.mavlink.MAVLink_message") -> None:
+        """
+        Replaces the message, called by the demultiplexer with its condition held.
+        """
+        self.__message = message
+
+    def is_ready(self) -> bool:
+        """
+        Returns whether a message arrived since the last take.
+        """
+        return self.__message is not None
+
+    def take(self) -> "mavutil.mavlink.MAVLink_message | None":
+        """
+        Returns the message and empties the slot, None if no message arrived since the last take.
+        """
+        with self.__condition:
+            message = self.__message
+            self.__message = None
+            return message
+
+
+class MavlinkDemultiplexer:
+    """
+    Reads a connection for every consumer within a process and dispatches each message
+    by type to the handlers and latest message slots registered for it.
+
+    A consumer waiting for its slots reads the connection on behalf of all consumers,
+    blocking on the socket, while the others wait for it to hand over messages.
+    Consumers in different processes each read the shared socket and can still take
+    each other's messages, so consumers of one connection belong in the same process.
+    """
+
+    __private_key = object()
+    __instances: "dict[tuple[int, int], MavlinkDemultiplexer]" = {}
+    __instances_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, connection: mavutil.mavfile) -> "MavlinkDemultiplexer":
+        """
+        Returns the demultiplexer of the connection within this process, creating it on first use.
+
+        Workers forked from a process with a demultiplexer get their own.
+        """
+        key = (os.getpid(), id(connection))
+        with cls.__instances_lock:
+            if key not in cls.__instances:
+                cls.__instances[key] = cls(cls.__private_key, connection)
+
+            return cls.__instances[key]
+
+    def __init__(self, key: object, connection: mavutil.mavfile) -> None:
+        """
+        Private constructor, use get() method.
+        """
+        assert key is MavlinkDemultiplexer.__private_key, "Use get() method"
+
+        self.__connection = connection
+        self.__condition = threading.Condition()
+        self.__is_reading = False
+        self.__slots: "dict[str, list[LatestMessage]]" = {}
+        self.__handlers: "dict[str, list[(mavutil.mavlink.MAVLink_message) -> None]]" = {}  # type: ignore
+
+    def subscribe(self, message_type: str) -> LatestMessage:
+        """
+        Returns a new slot that keeps the latest message of the type.
+        """
+        with self.__condition:
+            slot = LatestMessage(message_type, self.__condition)
+            self.__slots.setdefault(message_type, []).append(slot)
+            return slot
+
+    def add_handler(
+        self,
+        message_type: str,
+        handler: "(mavutil.mavlink.MAVLink_message) -> None",  # type: ignore
+    ) -> None:
+        """
+        Calls the handler with every message of the type.
+
+        Handlers run in the thread of whichever consumer is reading, with the demultiplexer
+        locked, so they must be short and must not use the demultiplexer.
+        """
+        with self.__condition:
+            self.__handlers.setdefault(message_type, []).append(handler)
+
+    def wait(self, slots: "list[LatestMessage]", timeout: float) -> bool:
+        """
+        Reads and dispatches messages until every slot is ready or the timeout.
+
+        slots: Slots of this demultiplexer, empty to read until the timeout
+            for consumers that only have handlers.
+        timeout: Seconds, 0 to only dispatch the messages already received.
+
+        Returns whether every slot is ready.
+        """
+        return self.__wait(slots, timeout, all)
+
+    def wait_any(self, slots: "list[LatestMessage]", timeout: float) -> bool:
+        """
+        Reads and dispatches messages until any slot is ready or the timeout.
+
+        Returns whether any slot is ready.
+        """
+        return self.__wait(slots, timeout, any)
+
+    def __wait(
+        self,
+        slots: "list[LatestMessage]",
+        timeout: float,
+        is_done: "(Iterable[bool]) -> bool",  # type: ignore
+    ) -> bool:
+        """
+        Reads and dispatches messages until is_done (all or any) of the slots are ready
+        or the timeout.
+        """
+        deadline = time.monotonic() + timeout
+
+        with self.__condition:
+            while True:
+                if len(slots) > 0 and is_done(slot.is_ready() for slot in slots):
+                    return True
+
+                remaining = deadline - time.monotonic()
+
+                # Another consumer is reading and wakes this one on every message
+                if self.__is_reading:
+                    if remaining <= 0.0:
+                        return False
+
+                    self.__condition.wait(remaining)
+                    continue
+
+                # Read without the lock so that other consumers can take their messages
+                self.__is_reading = True
+                self.__condition.release()
+                try:
+                    message = self.__read(remaining)
+                finally:
+                    self.__condition.acquire()
+                    self.__is_reading = False
+
+                if message is not None:
+                    self.__dispatch(message)
+
+                # Consumers check their slots or take over reading
+                self.__condition.notify_all()
+
+                if message is None and remaining <= 0.0:
+                    return False
+
+    def __read(self, timeout: float) -> "mavutil.mavlink.MAVLink_message | None":
+        """
+        Returns the next message of any type, blocking on the socket for at most the timeout.
+        """
+        if timeout <= 0.0:
+            return self.__connection.recv_match(blocking=False)
+
+        return self.__connection.recv_match(blocking=True, timeout=timeout)
+
+    def __dispatch(self, message: "mavutil.mavlink.MAVLink_message") -> None:
+        """
+        Hands the message to the slots and handlers of its type, others are dropped.
+        """
+        message_type = message.get_type()
+
+        for slot in self.__slots.get(message_type, []):
+            slot.put(message)
+
+        for handler in self.__handlers.get(message_type, []):
+            handler(message)
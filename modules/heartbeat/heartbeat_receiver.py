@@ -5,6 +5,7 @@ Heartbeat receiving logic.
 from pymavlink import mavutil
 
 from ..common.modules.logger import logger
+from ..demultiplexer import mavlink_demultiplexer
 
 
 # =================================================================================================
@@ -51,6 +52,9 @@ class HeartbeatReceiver:
         self.state = "Disconnected"
         self.missed_heartbeats = 0
         self.max_missed_heartbeats = 5
+        # Shared with the other consumers of the connection in this process
+        self.demultiplexer = mavlink_demultiplexer.MavlinkDemultiplexer.get(connection)
+        self.heartbeat_slot = self.demultiplexer.subscribe("HEARTBEAT")
         self.logger.info(
             f"HeartbeatReceiver initialized with max_missed_heartbeats={self.max_missed_heartbeats}"
         )
@@ -59,7 +63,10 @@ class HeartbeatReceiver:
         """
         Run the heartbeat receiver and return the current state as a string.
         """
-        msg = self.connection.recv_match(type="HEARTBEAT", blocking=False, timeout=0.5)
+        # Does not block, a heartbeat that arrived since the last run is kept in the slot
+        msg = None
+        if self.demultiplexer.wait([self.heartbeat_slot], 0.0):
+            msg = self.heartbeat_slot.take()
         if msg is not None:
             self.logger.info(f"Received HEARTBEAT message: {msg}")
             self.missed_heartbeats = 0
@@ -59,7 +59,7 @@ def heartbeat_receiver_worker(
 
     while not worker_ctrl.is_exit_requested():
         current_state = heartbeat_receiver_instance.run()
-        report_queue.queue.put(current_state)
+        report_queue.put(current_state)
         local_logger.info(f"Reported state: {current_state}")
         time.sleep(HEARTBEAT_PERIOD)
 
@@ -2,20 +2,59 @@
 Telemetry gathering logic.
 """
 
+import collections
+import enum
+import math
+import operator
+import struct
 import time
 
 from pymavlink import mavutil
 
 from ..common.modules.logger import logger
+from . import telemetry_alignment
+from ..demultiplexer import mavlink_demultiplexer
 
 TELEMETRY_TIMEOUT = 1.0
+# Kept of each stream for ALIGNED, longer than the period of the slower stream
+TELEMETRY_ALIGNMENT_WINDOW = 1000  # ms
+
+# Fields of TelemetryData and their struct format, "q" for int and "d" for float
+TELEMETRY_FIELD_FORMATS = (
+    ("time_since_boot", "q"),
+    ("x", "d"),
+    ("y", "d"),
+    ("z", "d"),
+    ("x_velocity", "d"),
+    ("y_velocity", "d"),
+    ("z_velocity", "d"),
+    ("roll", "d"),
+    ("pitch", "d"),
+    ("yaw", "d"),
+    ("roll_speed", "d"),
+    ("pitch_speed", "d"),
+    ("yaw_speed", "d"),
+    ("position_age", "q"),
+    ("attitude_age", "q"),
+)
+# Presence bit mask of the fields, then the fields, without padding
+TELEMETRY_FORMAT = "<H" + "".join(code for _, code in TELEMETRY_FIELD_FORMATS)
+TELEMETRY_SIZE = struct.calcsize(TELEMETRY_FORMAT)
 
 
 class TelemetryData:  # pylint: disable=too-many-instance-attributes
     """
     Python struct to represent Telemtry Data. Contains the most recent attitude and position reading.
+
+    Packs into the fixed layout TELEMETRY_FORMAT, which is also what is pickled.
     """
 
+    __slots__ = tuple(name for name, _ in TELEMETRY_FIELD_FORMATS)
+    # Packed in place of None
+    __ABSENT_VALUES = tuple(0 if code == "q" else math.nan for _, code in TELEMETRY_FIELD_FORMATS)
+    __ALL_PRESENT = (1 << len(TELEMETRY_FIELD_FORMATS)) - 1
+    __get_fields = operator.attrgetter(*__slots__)
+
     def __init__(
         self,
         time_since_boot: int | None = None,  # ms
@@ -31,6 +70,8 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
         roll_speed: float | None = None,  # rad/s
         pitch_speed: float | None = None,  # rad/s
         yaw_speed: float | None = None,  # rad/s
+        position_age: int | None = None,  # ms before time_since_boot
+        attitude_age: int | None = None,  # ms before time_since_boot
     ) -> None:
         self.time_since_boot = time_since_boot
         self.x = x
@@ -45,6 +86,67 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
         self.roll_speed = roll_speed
         self.pitch_speed = pitch_speed
         self.yaw_speed = yaw_speed
+        # How long before time_since_boot each half was measured, 0 for the newer half
+        self.position_age = position_age
+        self.attitude_age = attitude_age
+
+    @classmethod
+    def from_buffer(
+        cls, buffer: "bytes | bytearray | memoryview", offset: int = 0
+    ) -> "TelemetryData":
+        """
+        Unpacks TelemetryData packed at the offset of the buffer, without copying the buffer.
+        """
+        telemetry_data = cls.__new__(cls)
+        telemetry_data.__unpack(struct.unpack_from(TELEMETRY_FORMAT, buffer, offset))
+        return telemetry_data
+
+    def pack_into(self, buffer: "bytearray | memoryview", offset: int = 0) -> None:
+        """
+        Packs into the buffer at the offset, e.g. into shared memory or a batch.
+        """
+        struct.pack_into(TELEMETRY_FORMAT, buffer, offset, *self.__pack())
+
+    def to_bytes(self) -> bytes:
+        """
+        Returns the packed TelemetryData, TELEMETRY_SIZE bytes long.
+        """
+        return struct.pack(TELEMETRY_FORMAT, *self.__pack())
+
+    def __pack(self) -> "tuple":
+        """
+        Returns the presence bit mask followed by the fields with None replaced.
+        """
+        values = self.__get_fields(self)
+        if None not in values:
+            return (self.__ALL_PRESENT, *values)
+
+        mask = 0
+        packed_values = []
+        for i, value in enumerate(values):
+            if value is None:
+                value = self.__ABSENT_VALUES[i]
+            else:
+                mask |= 1 << i
+
+            packed_values.append(value)
+
+        return (mask, *packed_values)
+
+    def __unpack(self, values: "tuple") -> None:
+        """
+        Sets the fields from `__pack()`.
+        """
+        mask = values[0]
+        for i, name in enumerate(self.__slots__):
+            setattr(self, name, values[i + 1] if mask & (1 << i) else None)
+
+    # Pickled as the packed bytes instead of the field names and values
+    def __getstate__(self) -> bytes:
+        return self.to_bytes()
+
+    def __setstate__(self, state: bytes) -> None:
+        self.__unpack(struct.unpack(TELEMETRY_FORMAT, state))
 
     def __str__(self) -> str:
         return f"""{{
@@ -60,14 +162,34 @@ class TelemetryData:  # pylint: disable=too-many-instance-attributes
             yaw: {self.yaw},
             roll_speed: {self.roll_speed},
             pitch_speed: {self.pitch_speed},
-            yaw_speed: {self.yaw_speed}
+            yaw_speed: {self.yaw_speed},
+            position_age: {self.position_age},
+            attitude_age: {self.attitude_age}
         }}"""
 
 
 # =================================================================================================
 #                            ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
 # =================================================================================================
-class Telemetry:
+class FusionMode(enum.Enum):
+    """
+    When Telemetry combines attitude and position into TelemetryData.
+
+    PAIRED: Once both a new ATTITUDE and a new LOCAL_POSITION_NED arrived,
+        at the rate of the slower stream.
+    STREAMING: Whenever either arrives, with the latest of the other,
+        at the rate of the faster stream.
+    ALIGNED: At the timestamp of every ATTITUDE and LOCAL_POSITION_NED, with the other
+        interpolated to it, at the rate of the faster stream and delayed by up to
+        a period of the slower one.
+    """
+
+    PAIRED = 0
+    STREAMING = 1
+    ALIGNED = 2
+
+
+class Telemetry:  # pylint: disable=too-many-instance-attributes
     """
     Telemetry class to read position and attitude (orientation).
     """
@@ -79,14 +201,21 @@ class Telemetry:
         cls,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        fusion_mode: FusionMode = FusionMode.PAIRED,
+        emit_period: float = 0.0,
     ) -> tuple[bool, "Telemetry"]:
         """
         Falliable create (instantiation) method to create a Telemetry object.
+
+        fusion_mode: When to combine attitude and position.
+        emit_period: Minimum seconds between STREAMING outputs, 0 for every update.
         """
         telemetry_instance = cls(
             cls.__private_key,
             connection,
             local_logger,
+            fusion_mode,
+            emit_period,
         )
         local_logger.info("Telemetry created successfully")
         return True, telemetry_instance
@@ -96,6 +225,8 @@ class Telemetry:
         key: object,
         connection: mavutil.mavfile,
         local_logger: logger.Logger,
+        fusion_mode: FusionMode,
+        emit_period: float,
     ) -> None:
         """
         Initialize the Telemetry object with a MAVLink connection and logger.
@@ -104,59 +235,168 @@ class Telemetry:
         self.connection = connection
         self.logger = local_logger
         self.timeout = TELEMETRY_TIMEOUT
+        # Shared with the other consumers of the connection in this process
+        self.demultiplexer = mavlink_demultiplexer.MavlinkDemultiplexer.get(connection)
+        self.attitude_slot = self.demultiplexer.subscribe("ATTITUDE")
+        self.position_slot = self.demultiplexer.subscribe("LOCAL_POSITION_NED")
+        self.fusion_mode = fusion_mode
+        self.emit_period = emit_period
+        # Latest of each half for STREAMING
+        self.attitude_msg = None
+        self.position_msg = None
+        self.next_emit_time = 0.0
+        # Estimates not returned yet for ALIGNED
+        self.aligner = telemetry_alignment.TelemetryAligner(TELEMETRY_ALIGNMENT_WINDOW)
+        self.aligned_samples: "collections.deque[TelemetryData]" = collections.deque()
 
     def run(self) -> TelemetryData | None:
         """
         Collect and return the latest telemetry data from the MAVLink connection.
-        Returns TelemetryData if both attitude and position are received within timeout, else None.
-        """
-        start_time = time.time()
-        attitude_msg = None
-        position_msg = None
-        most_recent_time = 0
-        while time.time() - start_time < self.timeout:
-            if attitude_msg is None:
-                msg = self.connection.recv_match(type="ATTITUDE", blocking=False, timeout=0.1)
-                if msg is not None:
-                    attitude_msg = msg
-                    most_recent_time = max(most_recent_time, msg.time_boot_ms)
-                    self.logger.info(f"Received ATTITUDE message: {msg}")
-            if position_msg is None:
-                msg = self.connection.recv_match(
-                    type="LOCAL_POSITION_NED", blocking=False, timeout=0.1
-                )
-                if msg is not None:
-                    position_msg = msg
-                    most_recent_time = max(most_recent_time, msg.time_boot_ms)
-                    self.logger.info(f"Received LOCAL_POSITION_NED message: {msg}")
-            if attitude_msg is not None and position_msg is not None:
-                telemetry_data = TelemetryData(
-                    time_since_boot=most_recent_time,
-                    x=position_msg.x,
-                    y=position_msg.y,
-                    z=position_msg.z,
-                    x_velocity=position_msg.vx,
-                    y_velocity=position_msg.vy,
-                    z_velocity=position_msg.vz,
-                    roll=attitude_msg.roll,
-                    pitch=attitude_msg.pitch,
-                    yaw=attitude_msg.yaw,
-                    roll_speed=attitude_msg.rollspeed,
-                    pitch_speed=attitude_msg.pitchspeed,
-                    yaw_speed=attitude_msg.yawspeed,
+        Returns TelemetryData if both attitude and position (PAIRED) or either of them (STREAMING)
+        are received within timeout, else None.
+        """
+        if self.fusion_mode == FusionMode.STREAMING:
+            return self.__run_streaming()
+
+        if self.fusion_mode == FusionMode.ALIGNED:
+            return self.__run_aligned()
+
+        return self.__run_paired()
+
+    def __run_paired(self) -> TelemetryData | None:
+        """
+        Waits for a new attitude and a new position.
+        """
+        # Blocks on the connection until both arrived, messages that arrived since the last run count
+        if not self.demultiplexer.wait([self.attitude_slot, self.position_slot], self.timeout):
+            # A message that did arrive is kept for the next run
+            self.__log_timeout(self.attitude_slot.is_ready(), self.position_slot.is_ready())
+            return None
+
+        attitude_msg = self.attitude_slot.take()
+        position_msg = self.position_slot.take()
+        self.logger.info(f"Received ATTITUDE message: {attitude_msg}")
+        self.logger.info(f"Received LOCAL_POSITION_NED message: {position_msg}")
+
+        return self.__fuse(attitude_msg, position_msg)
+
+    def __run_streaming(self) -> TelemetryData | None:
+        """
+        Waits for a new attitude or a new position, combined with the latest of the other.
+        """
+        # Updates within the emit period are merged into the next output
+        remaining = self.next_emit_time - time.monotonic()
+        if remaining > 0.0:
+            time.sleep(remaining)
+            _ = self.demultiplexer.wait([], 0.0)
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            if not self.demultiplexer.wait_any(
+                [self.attitude_slot, self.position_slot], max(deadline - time.monotonic(), 0.0)
+            ):
+                self.__log_timeout(False, False)
+                return None
+
+            attitude_msg = self.attitude_slot.take()
+            if attitude_msg is not None:
+                self.attitude_msg = attitude_msg
+                self.logger.info(f"Received ATTITUDE message: {attitude_msg}")
+
+            position_msg = self.position_slot.take()
+            if position_msg is not None:
+                self.position_msg = position_msg
+                self.logger.info(f"Received LOCAL_POSITION_NED message: {position_msg}")
+
+            # Nothing to combine with until both arrived once
+            if self.attitude_msg is not None and self.position_msg is not None:
+                break
+
+            if time.monotonic() >= deadline:
+                self.__log_timeout(self.attitude_msg is not None, self.position_msg is not None)
+                return None
+
+        self.next_emit_time = time.monotonic() + self.emit_period
+        return self.__fuse(self.attitude_msg, self.position_msg)
+
+    def __run_aligned(self) -> TelemetryData | None:
+        """
+        Returns the next estimate at a common timestamp, waiting for messages if there is none.
+        """
+        deadline = time.monotonic() + self.timeout
+        while len(self.aligned_samples) == 0:
+            if not self.demultiplexer.wait_any(
+                [self.attitude_slot, self.position_slot], max(deadline - time.monotonic(), 0.0)
+            ):
+                self.__log_timeout(False, False)
+                return None
+
+            attitude_msg = self.attitude_slot.take()
+            if attitude_msg is not None:
+                self.aligner.add_attitude(attitude_msg)
+                self.logger.info(f"Received ATTITUDE message: {attitude_msg}")
+
+            position_msg = self.position_slot.take()
+            if position_msg is not None:
+                self.aligner.add_position(position_msg)
+                self.logger.info(f"Received LOCAL_POSITION_NED message: {position_msg}")
+
+            times, positions, attitudes = self.aligner.align()
+            for time_since_boot, position, attitude in zip(
+                times.tolist(), positions.tolist(), attitudes.tolist()
+            ):
+                # Both halves are estimated at time_since_boot
+                self.aligned_samples.append(
+                    TelemetryData(
+                        int(time_since_boot), *position, *attitude, position_age=0, attitude_age=0
+                    )
                 )
-                self.logger.info(f"Created TelemetryData: {telemetry_data}")
-                return telemetry_data
-        # Timeout occurred
-        if attitude_msg is None and position_msg is None:
+
+        telemetry_data = self.aligned_samples.popleft()
+        self.logger.info(f"Created TelemetryData: {telemetry_data}")
+        return telemetry_data
+
+    def __fuse(
+        self,
+        attitude_msg: "mavutil.mavlink.MAVLink_attitude_message",
+        position_msg: "mavutil.mavlink.MAVLink_local_position_ned_message",
+    ) -> TelemetryData:
+        """
+        Combines the messages, timestamped by the newer one.
+        """
+        most_recent_time = max(attitude_msg.time_boot_ms, position_msg.time_boot_ms)
+        telemetry_data = TelemetryData(
+            time_since_boot=most_recent_time,
+            x=position_msg.x,
+            y=position_msg.y,
+            z=position_msg.z,
+            x_velocity=position_msg.vx,
+            y_velocity=position_msg.vy,
+            z_velocity=position_msg.vz,
+            roll=attitude_msg.roll,
+            pitch=attitude_msg.pitch,
+            yaw=attitude_msg.yaw,
+            roll_speed=attitude_msg.rollspeed,
+            pitch_speed=attitude_msg.pitchspeed,
+            yaw_speed=attitude_msg.yawspeed,
+            position_age=most_recent_time - position_msg.time_boot_ms,
+            attitude_age=most_recent_time - attitude_msg.time_boot_ms,
+        )
+        self.logger.info(f"Created TelemetryData: {telemetry_data}")
+        return telemetry_data
+
+    def __log_timeout(self, has_attitude: bool, has_position: bool) -> None:
+        """
+        Logs which message did not arrive within the timeout.
+        """
+        if not has_attitude and not has_position:
             self.logger.error(
                 "Timeout: No ATTITUDE or LOCAL_POSITION_NED messages received within 1 second"
             )
-        elif attitude_msg is None:
+        elif not has_attitude:
             self.logger.error("Timeout: Missing ATTITUDE message within 1 second")
-        elif position_msg is None:
+        else:
             self.logger.error("Timeout: Missing LOCAL_POSITION_NED message within 1 second")
-        return None
 
 
 # =================================================================================================
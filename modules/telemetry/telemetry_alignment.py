@@ -0,0 +1,203 @@
+"""
+Time alignment of the attitude and position streams.
+"""
+
+import collections
+
+import numpy as np
+from pymavlink import mavutil
+
+
+def interpolate_linear(
+    times: np.ndarray, sample_times: np.ndarray, values: np.ndarray
+) -> "tuple[np.ndarray, np.ndarray, np.ndarray]":
+    """
+    Interpolates the rows of values at the times, within the sample times.
+
+    times: Increasing times to estimate at.
+    sample_times: Strictly increasing times of the rows.
+    values: Rows of samples, one per sample time.
+
+    Returns the estimates, and for each time the index of the sample after it
+    and the fraction of the way from the sample before it.
+    """
+    if len(sample_times) == 1:
+        return (
+            np.repeat(values, len(times), axis=0),
+            np.zeros(len(times), dtype=np.intp),
+            np.zeros(len(times)),
+        )
+
+    after = np.clip(np.searchsorted(sample_times, times, side="right"), 1, len(sample_times) - 1)
+    before_times = sample_times[after - 1]
+    fractions = (times - before_times) / (sample_times[after] - before_times)
+    estimates = values[after - 1] + (values[after] - values[after - 1]) * fractions[:, np.newaxis]
+
+    return estimates, after, fractions
+
+
+def euler_to_quaternion(angles: np.ndarray) -> np.ndarray:
+    """
+    Converts rows of roll, pitch, yaw (ZYX order) to rows of quaternions w, x, y, z.
+    """
+    half_cos = np.cos(angles / 2.0)
+    half_sin = np.sin(angles / 2.0)
+    cr, cp, cy = half_cos.T
+    sr, sp, sy = half_sin.T
+
+    return np.stack(
+        (
+            cr * cp * cy + sr * sp * sy,
+            sr * cp * cy - cr * sp * sy,
+            cr * sp * cy + sr * cp * sy,
+            cr * cp * sy - sr * sp * cy,
+        ),
+        axis=1,
+    )
+
+
+def quaternion_to_euler(quaternions: np.ndarray) -> np.ndarray:
+    """
+    Converts rows of quaternions w, x, y, z to rows of roll, pitch, yaw (ZYX order).
+    """
+    w, x, y, z = quaternions.T
+
+    return np.stack(
+        (
+            np.arctan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y)),
+            np.arcsin(np.clip(2.0 * (w * y - z * x), -1.0, 1.0)),
+            np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z)),
+        ),
+        axis=1,
+    )
+
+
+def slerp(start: np.ndarray, end: np.ndarray, fractions: np.ndarray) -> np.ndarray:
+    """
+    Spherical linear interpolation between rows of unit quaternions, along the shorter arc.
+    """
+    dots = np.sum(start * end, axis=1)
+    # q and -q are the same rotation
+    end = np.where((dots < 0.0)[:, np.newaxis], -end, end)
+    dots = np.abs(dots)
+
+    # Nearly equal rotations interpolate linearly, the sine below would be close to 0
+    is_close = dots > 0.9995
+    angles = np.arccos(np.clip(dots, -1.0, 1.0))
+    sines = np.where(is_close, 1.0, np.sin(angles))
+    start_weights = np.where(is_close, 1.0 - fractions, np.sin((1.0 - fractions) * angles) / sines)
+    end_weights = np.where(is_close, fractions, np.sin(fractions * angles) / sines)
+
+    quaternions = start * start_weights[:, np.newaxis] + end * end_weights[:, np.newaxis]
+    return quaternions / np.linalg.norm(quaternions, axis=1)[:, np.newaxis]
+
+
+class TelemetryAligner:
+    """
+    Keeps a window of attitude and position messages and estimates both at common timestamps,
+    so that the halves of each output were measured at the same time.
+
+    Estimates are made at the timestamp of every message of either stream, once the other
+    stream has a message at or after it, so the output follows the faster stream and lags
+    by up to a period of the slower one.
+    """
+
+    def __init__(self, window: int) -> None:
+        """
+        window: ms of each stream kept, must be longer than the period of the slower stream.
+        """
+        self.__window = window
+        # time_boot_ms, roll, pitch, yaw, roll speed, pitch speed, yaw speed
+        self.__attitudes: "collections.deque[tuple[float, ...]]" = collections.deque()
+        # time_boot_ms, x, y, z, x velocity, y velocity, z velocity
+        self.__positions: "collections.deque[tuple[float, ...]]" = collections.deque()
+        self.__aligned_time = -1
+
+    def add_attitude(self, message: "mavutil.mavlink.MAVLink_attitude_message") -> None:
+        """
+        Adds an ATTITUDE message.
+        """
+        self.__add(
+            self.__attitudes,
+            (
+                message.time_boot_ms,
+                message.roll,
+                message.pitch,
+                message.yaw,
+                message.rollspeed,
+                message.pitchspeed,
+                message.yawspeed,
+            ),
+        )
+
+    def add_position(self, message: "mavutil.mavlink.MAVLink_local_position_ned_message") -> None:
+        """
+        Adds a LOCAL_POSITION_NED message.
+        """
+        self.__add(
+            self.__positions,
+            (
+                message.time_boot_ms,
+                message.x,
+                message.y,
+                message.z,
+                message.vx,
+                message.vy,
+                message.vz,
+            ),
+        )
+
+    def __add(self, samples: "collections.deque[tuple[float, ...]]", sample: "tuple") -> None:
+        """
+        Appends the sample and discards the ones that left the window.
+        """
+        if len(samples) > 0 and sample[0] <= samples[-1][0]:
+            # Duplicate or reordered
+            if sample[0] > samples[-1][0] - self.__window:
+                return
+
+            # Restarted drone, the old timestamps are meaningless
+            self.__attitudes.clear()
+            self.__positions.clear()
+            self.__aligned_time = -1
+
+        samples.append(sample)
+        while sample[0] - samples[0][0] > self.__window:
+            samples.popleft()
+
+    def align(self) -> "tuple[np.ndarray, np.ndarray, np.ndarray]":
+        """
+        Estimates both streams at the new timestamps that both streams cover.
+
+        Returns the timestamps in increasing order, each only once across calls,
+        and rows of position (x, y, z, x velocity, y velocity, z velocity)
+        and attitude (roll, pitch, yaw, roll speed, pitch speed, yaw speed) at them.
+        """
+        if len(self.__attitudes) == 0 or len(self.__positions) == 0:
+            return np.zeros(0), np.zeros((0, 6)), np.zeros((0, 6))
+
+        attitudes = np.array(self.__attitudes)
+        positions = np.array(self.__positions)
+
+        # Interpolate only, never extrapolate
+        first_time = max(attitudes[0, 0], positions[0, 0], self.__aligned_time + 1)
+        last_time = min(attitudes[-1, 0], positions[-1, 0])
+        times = np.union1d(attitudes[:, 0], positions[:, 0])
+        times = times[(times >= first_time) & (times <= last_time)]
+        if len(times) == 0:
+            return times, np.zeros((0, 6)), np.zeros((0, 6))
+
+        position_estimates, _, _ = interpolate_linear(times, positions[:, 0], positions[:, 1:])
+
+        # Angle rates linearly, angles along the shortest rotation between the samples
+        attitude_estimates, after, fractions = interpolate_linear(
+            times, attitudes[:, 0], attitudes[:, 1:]
+        )
+        if len(attitudes) > 1:
+            quaternions = euler_to_quaternion(attitudes[:, 1:4])
+            attitude_estimates[:, :3] = quaternion_to_euler(
+                slerp(quaternions[after - 1], quaternions[after], fractions)
+            )
+
+        self.__aligned_time = int(times[-1])
+        return times, position_estimates, attitude_estimates
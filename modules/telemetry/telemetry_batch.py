@@ -0,0 +1,70 @@
+"""
+Columnar batches of telemetry data for bulk transfer and analysis.
+"""
+
+import numpy as np
+
+from . import telemetry
+
+
+# Same layout as telemetry.TELEMETRY_FORMAT, so each record is a packed TelemetryData
+TELEMETRY_DTYPE = np.dtype(
+    [("present", "<u2")] + [(name, "<" + code) for name, code in telemetry.TELEMETRY_FIELD_FORMATS]
+)
+
+
+class TelemetryBatch:
+    """
+    Telemetry data samples as a NumPy structured array, one record per sample.
+
+    Columns are arrays without copying, e.g. `batch["x"]`. Absent values are NaN (float fields)
+    or 0 (int fields), with their bit of `batch["present"]` cleared.
+    """
+
+    def __init__(self, records: np.ndarray) -> None:
+        """
+        records: Structured array of TELEMETRY_DTYPE.
+        """
+        self.records = records
+
+    @classmethod
+    def from_telemetry(cls, samples: "list[telemetry.TelemetryData]") -> "TelemetryBatch":
+        """
+        Packs the samples into a new batch.
+        """
+        buffer = bytearray(len(samples) * telemetry.TELEMETRY_SIZE)
+        for i, sample in enumerate(samples):
+            sample.pack_into(buffer, i * telemetry.TELEMETRY_SIZE)
+
+        return cls(np.frombuffer(buffer, TELEMETRY_DTYPE))
+
+    @classmethod
+    def from_buffer(
+        cls, buffer: "bytes | bytearray | memoryview", count: int = -1, offset: int = 0
+    ) -> "TelemetryBatch":
+        """
+        Wraps packed samples without copying, e.g. in shared memory.
+
+        count: Number of samples, -1 for the rest of the buffer.
+        offset: Start of the first sample in bytes.
+        """
+        return cls(np.frombuffer(buffer, TELEMETRY_DTYPE, count, offset))
+
+    def to_telemetry(self) -> "list[telemetry.TelemetryData]":
+        """
+        Unpacks the samples.
+        """
+        buffer = np.ascontiguousarray(self.records).data
+        return [
+            telemetry.TelemetryData.from_buffer(buffer, i * telemetry.TELEMETRY_SIZE)
+            for i in range(len(self.records))
+        ]
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        """
+        Returns the column of the field.
+        """
+        return self.records[field]
+
+    def __len__(self) -> int:
+        return len(self.records)
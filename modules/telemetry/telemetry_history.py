@@ -0,0 +1,289 @@
+"""
+Recent telemetry data in a shared memory ring for decisions, checks and display.
+"""
+
+import multiprocessing.shared_memory
+import struct
+
+import numpy as np
+
+from . import telemetry
+from . import telemetry_batch
+
+
+class FieldStatistics:
+    """
+    Statistics of the present values of a field within a time window.
+    """
+
+    def __init__(
+        self, count: int, mean: float, variance: float, minimum: float, maximum: float
+    ) -> None:
+        """
+        count: Number of present values, the others are NaN if 0 .
+        """
+        self.count = count
+        self.mean = mean
+        self.variance = variance
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def __str__(self) -> str:
+        return (
+            f"count: {self.count}, mean: {self.mean}, variance: {self.variance}, "
+            f"min: {self.minimum}, max: {self.maximum}"
+        )
+
+
+class TelemetryHistory:
+    """
+    Last capacity telemetry data samples, preallocated in shared memory as packed records.
+
+    Appending packs one record and never allocates. Queries find their window in place
+    by binary search on time and copy only its records into a `TelemetryBatch`, oldest first.
+
+    There is one writer, the process that created the history. Pickled copies, e.g. passed
+    to workers, attach to the same memory read-only. Readers never block the writer:
+    records overwritten while being copied are left out of the copy.
+    Samples are expected in increasing time_since_boot, as Telemetry outputs them.
+    """
+
+    __SEQUENCE_FORMAT = "=Q"
+    __HEADER_SIZE = struct.calcsize(__SEQUENCE_FORMAT)
+
+    def __init__(self, capacity: int) -> None:
+        """
+        capacity: Number of samples kept, must be greater than 0 .
+        """
+        if capacity <= 0:
+            raise ValueError(f"Telemetry history requires capacity > 0, got {capacity}")
+
+        self.capacity = capacity
+
+        self.__shared_memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER_SIZE + capacity * telemetry.TELEMETRY_SIZE,
+        )
+        struct.pack_into(self.__SEQUENCE_FORMAT, self.__shared_memory.buf, 0, 0)
+
+        self.__attach(self.__shared_memory.buf)
+
+    def __attach(self, buffer: memoryview) -> None:
+        """
+        Views the records of the buffer, read-only if the buffer is.
+        """
+        self.__buffer = buffer
+        self.__records = np.frombuffer(
+            buffer, telemetry_batch.TELEMETRY_DTYPE, self.capacity, self.__HEADER_SIZE
+        )
+
+    # Pickled copies attach to the same shared memory, read-only
+    def __getstate__(self) -> "tuple":
+        return self.__shared_memory, self.capacity
+
+    def __setstate__(self, state: "tuple") -> None:
+        self.__shared_memory, self.capacity = state
+        self.__attach(self.__shared_memory.buf.toreadonly())
+
+    def __read_sequence(self) -> int:
+        """
+        Twice the number of appends so far, plus 1 while an append is writing its record.
+        """
+        return struct.unpack_from(self.__SEQUENCE_FORMAT, self.__buffer, 0)[0]
+
+    def __read_write_position(self) -> int:
+        """
+        Position of the next append, which is the number of finished appends.
+        """
+        return self.__read_sequence() // 2
+
+    def __read_oldest_intact(self) -> int:
+        """
+        Position of the oldest record that no append has started overwriting.
+        """
+        sequence = self.__read_sequence()
+        return sequence // 2 + sequence % 2 - self.capacity
+
+    def is_read_only(self) -> bool:
+        """
+        Returns whether this is a pickled copy, which cannot append.
+        """
+        return self.__buffer.readonly
+
+    def append(self, sample: telemetry.TelemetryData) -> None:
+        """
+        Adds the sample, overwriting the oldest once the history is full.
+
+        Raises `ValueError` on a read-only copy.
+        """
+        if self.is_read_only():
+            raise ValueError("Telemetry history is read-only, only its creator can append")
+
+        position = self.__read_write_position()
+        offset = self.__HEADER_SIZE + (position % self.capacity) * telemetry.TELEMETRY_SIZE
+        # Seqlock write: odd while the record is incomplete
+        struct.pack_into(self.__SEQUENCE_FORMAT, self.__buffer, 0, 2 * position + 1)
+        sample.pack_into(self.__buffer, offset)
+        struct.pack_into(self.__SEQUENCE_FORMAT, self.__buffer, 0, 2 * position + 2)
+
+    def __len__(self) -> int:
+        return min(self.__read_write_position(), self.capacity)
+
+    def __copy(self, start: int, end: int) -> "tuple[int, telemetry_batch.TelemetryBatch]":
+        """
+        Copies the records from position start up to end, at most 2 slices if the ring wraps.
+
+        Returns the position of the first copied record and the records,
+        without those the writer lapped meanwhile.
+        """
+        first = start % self.capacity
+        last = first + end - start
+        if last <= self.capacity:
+            records = self.__records[first:last].copy()
+        else:
+            records = np.concatenate(
+                (self.__records[first:], self.__records[: last - self.capacity])
+            )
+
+        oldest_intact = self.__read_oldest_intact()
+        if oldest_intact > start:
+            records = records[oldest_intact - start :]
+            start = oldest_intact
+
+        return start, telemetry_batch.TelemetryBatch(records)
+
+    def __search_time(self, start: int, end: int, time_since_boot: float) -> int:
+        """
+        Binary search in place over the positions from start up to end.
+
+        Returns the first position with a sample at or after the time, end if there is none.
+        """
+        times = self.__records["time_since_boot"]
+        while start < end:
+            middle = (start + end) // 2
+            if times[middle % self.capacity] < time_since_boot:
+                start = middle + 1
+            else:
+                end = middle
+
+        return start
+
+    def snapshot(self) -> "tuple[int, telemetry_batch.TelemetryBatch]":
+        """
+        Copies the kept samples.
+
+        Returns the position of the first sample, which counts appends since creation,
+        and the samples oldest first.
+        """
+        end = self.__read_write_position()
+        return self.__copy(max(end - self.capacity, 0), end)
+
+    def get_last(self, seconds: float) -> telemetry_batch.TelemetryBatch:
+        """
+        Returns the samples within seconds of the newest one, oldest first.
+        """
+        end = self.__read_write_position()
+        start = max(end - self.capacity, 0)
+        if end == start:
+            return self.__copy(start, end)[1]
+
+        newest_time = self.__records["time_since_boot"][(end - 1) % self.capacity]
+        first = self.__search_time(start, end, newest_time - seconds * 1000.0)
+        return self.__copy(first, end)[1]
+
+    def get_statistics(self, field: str, seconds: float) -> FieldStatistics:
+        """
+        Statistics of the field over the samples within seconds of the newest one.
+        Absent values are left out.
+        """
+        batch = self.get_last(seconds)
+        bit = 1 << self.__field_index(field)
+        values = batch[field][(batch["present"] & bit) != 0].astype(np.float64)
+
+        if len(values) == 0:
+            return FieldStatistics(0, np.nan, np.nan, np.nan, np.nan)
+
+        return FieldStatistics(
+            len(values),
+            float(np.mean(values)),
+            float(np.var(values)),
+            float(np.min(values)),
+            float(np.max(values)),
+        )
+
+    def find_nearest(self, time_since_boot: int) -> "int | None":
+        """
+        Returns the position of the kept sample closest in time, the earlier one on a tie,
+        None if the history is empty.
+        """
+        times = self.__records["time_since_boot"]
+        while True:
+            end = self.__read_write_position()
+            start = max(end - self.capacity, 0)
+            if end == start:
+                return None
+
+            after = self.__search_time(start, end, time_since_boot)
+            if after == end:
+                nearest = end - 1
+            elif (
+                after > start
+                and time_since_boot - times[(after - 1) % self.capacity]
+                <= times[after % self.capacity] - time_since_boot
+            ):
+                nearest = after - 1
+            else:
+                nearest = after
+
+            # Search again if the writer lapped the positions read meanwhile
+            if self.__read_oldest_intact() <= start:
+                return nearest
+
+    def get_sample(self, position: int) -> "telemetry.TelemetryData | None":
+        """
+        Returns the sample at the position, None if it is no longer or not yet kept.
+        """
+        end = self.__read_write_position()
+        if position < max(end - self.capacity, 0) or position >= end:
+            return None
+
+        sample = telemetry.TelemetryData.from_buffer(
+            self.__buffer,
+            self.__HEADER_SIZE + (position % self.capacity) * telemetry.TELEMETRY_SIZE,
+        )
+        # Overwritten while unpacking
+        if position < self.__read_oldest_intact():
+            return None
+
+        return sample
+
+    @staticmethod
+    def __field_index(field: str) -> int:
+        """
+        Bit of the field in the presence mask.
+
+        Raises `ValueError` for an unknown field.
+        """
+        for i, (name, _) in enumerate(telemetry.TELEMETRY_FIELD_FORMATS):
+            if name == field:
+                return i
+
+        raise ValueError(f"Unknown telemetry field: {field}")
+
+    def close(self) -> None:
+        """
+        Detaches this process from the shared memory.
+        """
+        # The views must be released before the shared memory can be closed
+        del self.__records
+        if self.is_read_only():
+            self.__buffer.release()
+        del self.__buffer
+        self.__shared_memory.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory, call once from the creating process after all workers have stopped.
+        """
+        self.close()
+        self.__shared_memory.unlink()
@@ -4,10 +4,9 @@ Telemtry worker that gathers GPS data.
 
 import os
 import pathlib
-import time
-import queue
 
 from pymavlink import mavutil
+from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
 from . import telemetry
 from ..common.modules.logger import logger
@@ -20,7 +19,9 @@ from ..common.modules.logger import logger
 
 def telemetry_worker(
     connection: mavutil.mavfile,
-    telemetry_queue: queue.Queue,
+    fusion_mode: telemetry.FusionMode,
+    emit_period: float,
+    telemetry_queue: queue_proxy_wrapper.QueueProxyWrapper,
     worker_ctrl: worker_controller.WorkerController,
     # Add other necessary worker arguments here
 ) -> None:
@@ -29,6 +30,8 @@ def telemetry_worker(
 
     args...
     connection: MAVLink connection object for receiving messages
+    fusion_mode: When to combine attitude and position into TelemetryData
+    emit_period: Minimum seconds between STREAMING outputs, 0 for every update
     telemetry_queue: Queue to send TelemetryData objects to Command worker
      worker_ctrl: Worker controller for graceful shutdown
     """
@@ -53,7 +56,9 @@ def telemetry_worker(
     #                          ↓ BOOTCAMPERS MODIFY BELOW THIS COMMENT ↓
     # =============================================================================================
     # Instantiate class object (telemetry.Telemetry)
-    result, telemetry_obj = telemetry.Telemetry.create(connection, local_logger)
+    result, telemetry_obj = telemetry.Telemetry.create(
+        connection, local_logger, fusion_mode, emit_period
+    )
     if not result or telemetry_obj is None:
         local_logger.error("Failed to create Telemetry")
         return
@@ -62,11 +67,13 @@ def telemetry_worker(
     while not worker_ctrl.is_exit_requested():
         telemetry_data = telemetry_obj.run()
         if telemetry_data is not None:
-            telemetry_queue.queue.put(telemetry_data)
-            local_logger.info(f"Sent TelemetryData to Command worker: {telemetry_data}")
+            # Never stalls, the queue's overflow policy decides what is lost
+            if telemetry_queue.put(telemetry_data):
+                local_logger.info(f"Sent TelemetryData to Command worker: {telemetry_data}")
+            else:
+                local_logger.warning("Telemetry queue full, TelemetryData dropped")
         else:
             local_logger.warning("Telemetry timeout - restarting collection")
-        time.sleep(0.1)
 
 
 # =================================================================================================
@@ -0,0 +1,106 @@
+"""
+Benchmark of the QueueProxyWrapper backends. To run:
+```
+python -m tests.benchmarks.queue_backend_benchmark
+```
+"""
+
+import multiprocessing as mp
+import multiprocessing.managers
+import time
+
+from utilities.workers import queue_proxy_wrapper
+
+
+MESSAGE_COUNT = 20000
+QUEUE_MAX_SIZE = 50
+# Paced well below the throughput of both backends, so the queue is mostly empty
+# and latency is the cost of a hand-off rather than the time spent queued behind others
+PACED_MESSAGE_COUNT = 2000
+PACED_PERIOD = 0.001  # seconds
+# Roughly the shape of TelemetryData: timestamp and 12 floats
+PAYLOAD_FIELD_COUNT = 12
+
+
+def producer(
+    message_count: int,
+    period: float,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+) -> None:
+    """
+    Puts timestamped payloads into the queue every period seconds, then a sentinel.
+
+    period: 0 to put as fast as the queue allows, keeping it full.
+    """
+    fields = tuple(float(i) for i in range(PAYLOAD_FIELD_COUNT))
+    next_put_time = time.monotonic()
+    for _ in range(message_count):
+        if period > 0.0:
+            next_put_time += period
+            time.sleep(max(next_put_time - time.monotonic(), 0.0))
+
+        output_queue.put((time.monotonic_ns(),) + fields)
+
+    output_queue.put(None)
+
+
+def run_backend(
+    mp_manager: multiprocessing.managers.SyncManager,
+    backend: queue_proxy_wrapper.QueueBackend,
+    message_count: int,
+    period: float,
+) -> "tuple[float, float, float]":
+    """
+    Runs a single producer process against the main process as consumer.
+
+    Returns messages per second, p50 and p99 latency in microseconds.
+    """
+    test_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+
+    worker = mp.Process(target=producer, args=(message_count, period, test_queue))
+
+    latencies = []
+    start_time = time.monotonic()
+    worker.start()
+    while True:
+        item = test_queue.get()
+        if item is None:
+            break
+
+        latencies.append(time.monotonic_ns() - item[0])
+
+    duration = time.monotonic() - start_time
+    worker.join()
+    test_queue.unlink()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] / 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] / 1000
+
+    return len(latencies) / duration, p50, p99
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    mp_manager = mp.Manager()
+
+    # Saturated: throughput, latency includes waiting behind a full queue
+    # Paced: latency of a single hand-off at a telemetry-like rate
+    runs = (("saturated", MESSAGE_COUNT, 0.0), ("paced", PACED_MESSAGE_COUNT, PACED_PERIOD))
+    for run_name, message_count, period in runs:
+        for backend in queue_proxy_wrapper.QueueBackend:
+            messages_per_second, p50, p99 = run_backend(mp_manager, backend, message_count, period)
+            print(
+                f"{run_name:>9} {backend.name:>13}: {messages_per_second:10.0f} msg/s, "
+                f"latency p50 {p50:9.1f} us, p99 {p99:9.1f} us"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
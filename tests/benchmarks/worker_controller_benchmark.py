@@ -0,0 +1,99 @@
+"""
+Benchmark of the WorkerController checks done every worker loop iteration. To run:
+```
+python -m tests.benchmarks.worker_controller_benchmark
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import worker_controller
+
+
+CHECK_DURATION = 1.0  # seconds
+WORKER_COUNTS = [1, 4]
+
+
+class QueueWorkerController:
+    """
+    Previous implementation for comparison: exit through `mp.Queue.empty()`,
+    pause through a `BoundedSemaphore`.
+    """
+
+    def __init__(self) -> None:
+        self.__pause = mp.BoundedSemaphore(1)
+        self.__exit_queue = mp.Queue(1)
+
+    def check_pause(self) -> None:
+        """
+        Blocks while paused.
+        """
+        self.__pause.acquire()
+        self.__pause.release()
+
+    def is_exit_requested(self) -> bool:
+        """
+        Returns whether exit was requested.
+        """
+        return not self.__exit_queue.empty()
+
+
+def checker(
+    controller: "worker_controller.WorkerController | QueueWorkerController",
+    result_queue: "mp.Queue[int]",
+) -> None:
+    """
+    Runs the worker loop checks without any work for CHECK_DURATION, then reports the count.
+    """
+    count = 0
+    end_time = time.monotonic() + CHECK_DURATION
+    while time.monotonic() < end_time:
+        controller.check_pause()
+        _ = controller.is_exit_requested()
+        count += 1
+
+    result_queue.put(count)
+
+
+def run_controller(
+    controller: "worker_controller.WorkerController | QueueWorkerController", worker_count: int
+) -> float:
+    """
+    Runs the checks in worker_count processes at once.
+
+    Returns loop iterations per second per worker.
+    """
+    result_queue: "mp.Queue[int]" = mp.Queue()
+    workers = [
+        mp.Process(target=checker, args=(controller, result_queue)) for _ in range(worker_count)
+    ]
+    for worker in workers:
+        worker.start()
+
+    counts = [result_queue.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    return sum(counts) / worker_count / CHECK_DURATION
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    for worker_count in WORKER_COUNTS:
+        before = run_controller(QueueWorkerController(), worker_count)
+        after = run_controller(worker_controller.WorkerController(), worker_count)
+        print(
+            f"{worker_count} workers: queue and semaphore {before:12.0f} checks/s, "
+            f"shared memory flags {after:12.0f} checks/s ({after / before:.1f}x)"
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
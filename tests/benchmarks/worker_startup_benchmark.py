@@ -0,0 +1,90 @@
+"""
+Benchmark of the time from starting a worker process to its first loop iteration. To run:
+```
+python -m tests.benchmarks.worker_startup_benchmark
+```
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import process_start
+from utilities.workers import worker_controller
+
+
+START_COUNT = 5
+PRELOAD_MODULES = ["utilities.workers.process_start", "utilities.workers.worker_controller"]
+
+
+def worker(
+    controller: worker_controller.WorkerController,
+    activation: "process_start.WorkerActivation | None",
+) -> None:
+    """
+    Waits for activation if spare, then runs loop iterations until exit is requested,
+    like `worker_manager.run_worker()`.
+    """
+    if activation is not None and activation.wait() < 0:
+        return
+
+    controller.mark_worker_started()
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        time.sleep(0.001)
+
+
+def time_to_first_loop(is_spare: bool) -> float:
+    """
+    Starts a worker (or a spare, then activates it) and waits for its first loop iteration.
+
+    Returns the time in seconds from start or activation to the first loop iteration.
+    """
+    controller = worker_controller.WorkerController()
+    activation = process_start.WorkerActivation() if is_spare else None
+    process = mp.Process(target=worker, args=(controller, activation))
+
+    if activation is not None:
+        process_start.start_process(process)
+        # Spare is ready long before it is needed
+        time.sleep(1.0)
+
+    start_time = time.monotonic()
+    if activation is not None:
+        activation.activate(0)
+    else:
+        process_start.start_process(process)
+
+    while controller.get_first_check_time() == 0.0:
+        time.sleep(0.0001)
+
+    startup_time = controller.get_first_check_time() - start_time
+
+    controller.request_exit()
+    process.join()
+
+    return startup_time
+
+
+def main() -> int:
+    """
+    Main function.
+    """
+    for start_method in process_start.StartMethod:
+        process_start.set_start_method(start_method, PRELOAD_MODULES)
+
+        for is_spare in (False, True):
+            startup_times = [time_to_first_loop(is_spare) for _ in range(START_COUNT)]
+            kind = "spare" if is_spare else "new"
+            print(
+                f"{start_method.name:10} {kind:5}: "
+                f"mean {sum(startup_times) / START_COUNT * 1000.0:8.2f}ms, "
+                f"max {max(startup_times) * 1000.0:8.2f}ms"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    result_main = main()
+    if result_main < 0:
+        print(f"ERROR: Status code: {result_main}")
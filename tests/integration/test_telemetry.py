@@ -12,6 +12,7 @@ from pymavlink import mavutil
 from modules.common.modules.logger import logger
 from modules.common.modules.logger import logger_main_setup
 from modules.common.modules.read_yaml import read_yaml
+from modules.telemetry import telemetry
 from modules.telemetry import telemetry_worker
 from utilities.workers import queue_proxy_wrapper
 from utilities.workers import worker_controller
@@ -139,6 +140,8 @@ def main() -> int:
 
     telemetry_worker.telemetry_worker(
         connection,
+        telemetry.FusionMode.PAIRED,
+        0.0,
         telemetry_queue_proxy,
         worker_ctrl,
     )
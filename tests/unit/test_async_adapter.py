@@ -0,0 +1,181 @@
+"""
+Test the asyncio adapters wait without blocking the event loop.
+"""
+
+import asyncio
+import multiprocessing as mp
+import time
+
+import pytest
+
+from utilities.workers import async_adapter
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+PRODUCER_DELAY = 0.2  # seconds
+MAX_WAKE_LATENCY = 0.1  # seconds
+QUEUE_MAX_SIZE = 4
+
+
+def delayed_producer(output_queue: queue_proxy_wrapper.QueueProxyWrapper, item: object) -> None:
+    """
+    Puts the item after PRODUCER_DELAY.
+    """
+    time.sleep(PRODUCER_DELAY)
+    output_queue.put(item)
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> queue_proxy_wrapper.QueueManager:  # type: ignore
+    """
+    Manager for the queues.
+    """
+    manager = queue_proxy_wrapper.QueueManager()
+    # Shut down explicitly after the tests
+    # pylint: disable-next=consider-using-with
+    manager.start()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(params=list(queue_proxy_wrapper.QueueBackend))
+def test_queue(
+    mp_manager: queue_proxy_wrapper.QueueManager, request: pytest.FixtureRequest
+) -> queue_proxy_wrapper.QueueProxyWrapper:  # type: ignore
+    """
+    Bounded queue of every backend.
+    """
+    bounded_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, request.param)
+    yield bounded_queue  # type: ignore
+    bounded_queue.unlink()
+
+
+class TestAsyncQueueProxyWrapper:
+    """
+    Awaiting queues.
+    """
+
+    def test_get_from_process(self, test_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        Get wakes as soon as another process puts, while other tasks keep running.
+        """
+
+        async def run() -> "tuple[object, float, int]":
+            async_queue = async_adapter.AsyncQueueProxyWrapper(test_queue)
+            ticks = 0
+
+            async def tick() -> None:
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.create_task(tick())
+            start_time = time.perf_counter()
+            item = await async_queue.get()
+            elapsed_time = time.perf_counter() - start_time
+            ticker.cancel()
+            async_queue.shutdown()
+
+            return item, elapsed_time, ticks
+
+        producer = mp.Process(target=delayed_producer, args=(test_queue, "item"))
+        producer.start()
+
+        item, elapsed_time, ticks = asyncio.run(run())
+        producer.join()
+
+        assert item == "item"
+        assert elapsed_time < PRODUCER_DELAY + MAX_WAKE_LATENCY
+        # The event loop was not blocked while waiting
+        assert ticks > 0
+
+    def test_cancelled_get_keeps_item(
+        self, test_queue: queue_proxy_wrapper.QueueProxyWrapper
+    ) -> None:
+        """
+        An item that arrives after a get timed out is returned by the next get.
+        """
+
+        async def run() -> "list":
+            async_queue = async_adapter.AsyncQueueProxyWrapper(test_queue)
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(async_queue.get(), 0.05)
+
+            await async_queue.put(1)
+            await async_queue.put(2)
+            items = [await async_queue.get(), await async_queue.get()]
+            async_queue.shutdown()
+
+            return items
+
+        assert asyncio.run(run()) == [1, 2]
+
+    def test_get_many_after_close(self, test_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        A pending get_many ends with the sentinel once the queue is closed.
+        """
+        test_queue.add_consumers(1)
+
+        async def run() -> "list":
+            async_queue = async_adapter.AsyncQueueProxyWrapper(test_queue)
+            task = asyncio.create_task(async_queue.get_many())
+            await asyncio.sleep(0.05)
+            test_queue.close()
+            items = await asyncio.wait_for(task, MAX_WAKE_LATENCY)
+            async_queue.shutdown()
+
+            return items
+
+        assert asyncio.run(run()) == [None]
+
+
+class TestAsyncWorkerController:
+    """
+    Awaiting exit and pause requests.
+    """
+
+    def test_wait_for_exit(self) -> None:
+        """
+        Waiting ends shortly after exit is requested.
+        """
+        controller = worker_controller.WorkerController()
+
+        async def run() -> float:
+            async_controller = async_adapter.AsyncWorkerController(controller)
+            waiter = asyncio.create_task(async_controller.wait_for_exit())
+            await asyncio.sleep(0.05)
+            assert not waiter.done()
+
+            start_time = time.perf_counter()
+            await async_controller.request_exit()
+            await asyncio.wait_for(waiter, MAX_WAKE_LATENCY)
+
+            return time.perf_counter() - start_time
+
+        assert asyncio.run(run()) < MAX_WAKE_LATENCY
+        assert controller.is_exit_requested()
+
+    def test_pause_resume(self) -> None:
+        """
+        Check pause waits until resume.
+        """
+        controller = worker_controller.WorkerController()
+
+        async def run() -> None:
+            async_controller = async_adapter.AsyncWorkerController(controller)
+            await async_controller.request_pause()
+            waiter = asyncio.create_task(async_controller.check_pause())
+            await asyncio.sleep(0.05)
+            assert not waiter.done()
+
+            await async_controller.request_resume()
+            await asyncio.wait_for(waiter, MAX_WAKE_LATENCY)
+
+        asyncio.run(run())
@@ -0,0 +1,173 @@
+"""
+Test the autoscaler scales on sustained backlog and idleness only.
+"""
+
+import threading
+
+import pytest
+
+from utilities.workers import autoscaler
+from utilities.workers import execution_mode
+from utilities.workers import queue_stats
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+SAMPLE_PERIOD = 1.0  # seconds
+
+
+@pytest.fixture
+def worker_autoscaler() -> autoscaler.Autoscaler:
+    """
+    Autoscaler between 1 and 3 workers, scaling after 2 agreeing samples without cooldown.
+    """
+    return autoscaler.Autoscaler(1, 3, sustained_samples=2, cooldown=0.0)
+
+
+class StatsFeed:
+    """
+    Snapshots of a single input queue at SAMPLE_PERIOD intervals.
+    """
+
+    def __init__(self) -> None:
+        self.__timestamp = 0.0
+        self.__puts = 0
+        self.__gets = 0
+        self.__get_blocked_time = 0.0
+
+    def next(
+        self, depth: int, idle_fraction: float, worker_count: int
+    ) -> "list[queue_stats.QueueStatsSnapshot]":
+        """
+        Returns the snapshot after a period with the depth at the end
+        and the workers idle for idle_fraction of it.
+        """
+        self.__timestamp += SAMPLE_PERIOD
+        self.__gets += 10
+        self.__puts = self.__gets + depth
+        self.__get_blocked_time += idle_fraction * SAMPLE_PERIOD * worker_count
+
+        return [
+            queue_stats.QueueStatsSnapshot(
+                self.__timestamp,
+                self.__puts,
+                self.__gets,
+                depth,
+                0.0,
+                self.__get_blocked_time,
+                {reason: 0 for reason in queue_stats.DropReason},
+            )
+        ]
+
+
+class TestAutoscaler:
+    """
+    Scaling decisions.
+    """
+
+    def test_scale_up_sustained_backlog(self, worker_autoscaler: autoscaler.Autoscaler) -> None:
+        """
+        Only a backlog seen in consecutive samples adds a worker.
+        """
+        feed = StatsFeed()
+        assert worker_autoscaler.sample(feed.next(0, 0.0, 1), 1) == 0
+        assert worker_autoscaler.sample(feed.next(10, 0.0, 1), 1) == 0
+        # Interrupted
+        assert worker_autoscaler.sample(feed.next(1, 0.0, 1), 1) == 0
+        assert worker_autoscaler.sample(feed.next(10, 0.0, 1), 1) == 0
+        assert worker_autoscaler.sample(feed.next(10, 0.0, 1), 1) == 1
+
+    def test_scale_down_idle(self, worker_autoscaler: autoscaler.Autoscaler) -> None:
+        """
+        An empty queue with idle workers removes a worker, a busy empty queue does not.
+        """
+        feed = StatsFeed()
+        assert worker_autoscaler.sample(feed.next(0, 1.0, 2), 2) == 0
+        # Empty but the workers are busy
+        assert worker_autoscaler.sample(feed.next(0, 0.1, 2), 2) == 0
+        assert worker_autoscaler.sample(feed.next(0, 0.1, 2), 2) == 0
+        assert worker_autoscaler.sample(feed.next(0, 0.9, 2), 2) == 0
+        assert worker_autoscaler.sample(feed.next(0, 0.9, 2), 2) == -1
+
+    def test_scale_down_without_gets(self, worker_autoscaler: autoscaler.Autoscaler) -> None:
+        """
+        Waits still blocked are not recorded yet, no gets at all means every worker waited.
+        """
+        for timestamp in range(2):
+            snapshot = queue_stats.QueueStatsSnapshot(
+                float(timestamp),
+                5,
+                5,
+                1,
+                0.0,
+                0.0,
+                {reason: 0 for reason in queue_stats.DropReason},
+            )
+            assert worker_autoscaler.sample([snapshot], 2) == 0
+
+        snapshot = queue_stats.QueueStatsSnapshot(
+            2.0, 5, 5, 1, 0.0, 0.0, {reason: 0 for reason in queue_stats.DropReason}
+        )
+        assert worker_autoscaler.sample([snapshot], 2) == -1
+
+    def test_bounds(self, worker_autoscaler: autoscaler.Autoscaler) -> None:
+        """
+        Never scales beyond the bounds.
+        """
+        feed = StatsFeed()
+        for _ in range(5):
+            assert worker_autoscaler.sample(feed.next(100, 0.0, 3), 3) == 0
+
+        for _ in range(5):
+            assert worker_autoscaler.sample(feed.next(0, 1.0, 1), 1) == 0
+
+    def test_cooldown(self) -> None:
+        """
+        Samples right after scaling are ignored.
+        """
+        worker_autoscaler = autoscaler.Autoscaler(1, 3, sustained_samples=1, cooldown=60.0)
+        feed = StatsFeed()
+        assert worker_autoscaler.sample(feed.next(10, 0.0, 1), 1) == 0
+        assert worker_autoscaler.sample(feed.next(10, 0.0, 1), 1) == 1
+        assert worker_autoscaler.sample(feed.next(10, 0.0, 2), 2) == 0
+
+    def test_invalid_bounds(self) -> None:
+        """
+        Minimum must be positive and at most the maximum.
+        """
+        with pytest.raises(ValueError):
+            autoscaler.Autoscaler(0, 2)
+
+        with pytest.raises(ValueError):
+            autoscaler.Autoscaler(3, 2)
+
+
+class TestRetiringWorkers:
+    """
+    Tracking scaled down workers until they exit.
+    """
+
+    def test_reap_and_stuck(self) -> None:
+        """
+        A worker is reaped once it exits, and reported as stuck once before.
+        """
+        retiring_workers = autoscaler.RetiringWorkers(retire_timeout=0.0)
+        controller = worker_controller.WorkerController()
+        release = threading.Event()
+        worker = execution_mode.ThreadWorker(release.wait, ())
+        worker.start()
+
+        retiring_workers.add(worker, controller)
+        assert controller.is_exit_requested()
+        assert not retiring_workers.reap()
+        assert [stuck_worker for stuck_worker, _ in retiring_workers.find_stuck()] == [worker]
+        assert not retiring_workers.find_stuck()
+
+        release.set()
+        worker.join(1.0)
+        assert retiring_workers.reap() == [(worker, controller)]
+        assert len(retiring_workers) == 0
@@ -0,0 +1,166 @@
+"""
+Test the broadcast channel delivers every item to every subscriber.
+"""
+
+import multiprocessing as mp
+import queue
+
+import pytest
+
+from utilities.workers import broadcast_channel
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+CHANNEL_MAX_SIZE = 4
+ITEM_COUNT = 100
+
+
+def collector(subscription: broadcast_channel.Subscription, output_queue: "mp.Queue[list]") -> None:
+    """
+    Gets items until the sentinel, then reports them.
+    """
+    items = []
+    while True:
+        for item in subscription.get_many():
+            if item is None:
+                output_queue.put(items)
+                return
+
+            items.append(item)
+
+
+@pytest.fixture
+def channel() -> broadcast_channel.BroadcastChannel:  # type: ignore
+    """
+    Small channel.
+    """
+    test_channel = broadcast_channel.BroadcastChannel(CHANNEL_MAX_SIZE)
+    yield test_channel  # type: ignore
+    test_channel.unlink()
+
+
+class TestBroadcastChannel:
+    """
+    Fan-out, overruns and close.
+    """
+
+    def test_every_subscriber_gets_every_item(
+        self, channel: broadcast_channel.BroadcastChannel
+    ) -> None:
+        """
+        Subscribers do not steal items from each other.
+        """
+        first = channel.subscribe("first")
+        second = channel.subscribe("second")
+
+        assert channel.put_many([1, 2, 3]) == 3
+
+        assert first.get_many() == [1, 2, 3]
+        assert second.get() == 1
+        assert second.get_many() == [2, 3]
+        with pytest.raises(queue.Empty):
+            first.get_nowait()
+
+    def test_subscription_starts_at_next_write(
+        self, channel: broadcast_channel.BroadcastChannel
+    ) -> None:
+        """
+        Items written before subscribing are not delivered.
+        """
+        channel.put(0)
+        subscription = channel.subscribe("late")
+        channel.put(1)
+
+        assert subscription.get_many(block=False) == [1]
+
+    def test_slow_subscriber_overruns(self, channel: broadcast_channel.BroadcastChannel) -> None:
+        """
+        A slow subscriber skips overwritten items without affecting the others.
+        """
+        fast = channel.subscribe("fast")
+        slow = channel.subscribe("slow")
+
+        items = list(range(CHANNEL_MAX_SIZE * 2))
+        for item in items:
+            channel.put(item)
+            assert fast.get_nowait() == item
+
+        stats = channel.get_stats()
+        assert stats.writes == len(items)
+        assert stats.subscribers["fast"] == (len(items), 0, 0)
+        assert stats.subscribers["slow"] == (0, CHANNEL_MAX_SIZE, 0)
+
+        assert slow.get_many() == items[-CHANNEL_MAX_SIZE:]
+
+        stats = channel.get_stats()
+        assert stats.subscribers["slow"] == (CHANNEL_MAX_SIZE, 0, CHANNEL_MAX_SIZE)
+
+    def test_close(self, channel: broadcast_channel.BroadcastChannel) -> None:
+        """
+        Remaining items are still read, then the sentinel, and puts are refused.
+        """
+        subscription = channel.subscribe("subscriber")
+        channel.put(1)
+        channel.close()
+
+        assert not channel.put(2)
+        assert subscription.get() == 1
+        assert subscription.get() is None
+        assert subscription.get_many() == [None]
+
+    def test_processes(self) -> None:
+        """
+        Subscribers in other processes get every item in order.
+        """
+        # Large enough that nothing is overwritten
+        large_channel = broadcast_channel.BroadcastChannel(ITEM_COUNT)
+        output_queue: "mp.Queue[list]" = mp.Queue()
+        workers = [
+            mp.Process(target=collector, args=(large_channel.subscribe(name), output_queue))
+            for name in ("first", "second")
+        ]
+        for worker in workers:
+            worker.start()
+
+        for item in range(ITEM_COUNT):
+            large_channel.put(item)
+
+        large_channel.close()
+
+        results = [output_queue.get(timeout=5.0) for _ in workers]
+        for worker in workers:
+            worker.join(1.0)
+
+        large_channel.unlink()
+
+        assert results == [list(range(ITEM_COUNT))] * 2
+
+    def test_shared_subscription(self) -> None:
+        """
+        Workers sharing a subscription split its items.
+        """
+        large_channel = broadcast_channel.BroadcastChannel(ITEM_COUNT)
+        subscription = large_channel.subscribe("group")
+        output_queue: "mp.Queue[list]" = mp.Queue()
+        workers = [
+            mp.Process(target=collector, args=(subscription, output_queue)) for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+
+        for item in range(ITEM_COUNT):
+            large_channel.put(item)
+
+        large_channel.close()
+
+        results = [output_queue.get(timeout=5.0) for _ in workers]
+        for worker in workers:
+            worker.join(1.0)
+
+        large_channel.unlink()
+
+        assert sorted(results[0] + results[1]) == list(range(ITEM_COUNT))
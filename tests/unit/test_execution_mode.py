@@ -0,0 +1,115 @@
+"""
+Test thread and asyncio workers behave like processes for the worker manager.
+"""
+
+import asyncio
+
+import pytest
+
+from utilities.workers import execution_mode
+from utilities.workers import worker_controller
+
+
+def thread_worker(controller: worker_controller.WorkerController, is_failing: bool) -> None:
+    """
+    Checks the controller until exit is requested, like `worker_manager.run_worker()`.
+    """
+    controller.mark_worker_started()
+    try:
+        while not controller.is_exit_requested():
+            if is_failing:
+                raise ValueError("Worker failed")
+    finally:
+        controller.acknowledge_exit()
+
+
+async def asyncio_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Awaits until exit is requested.
+    """
+    controller.mark_worker_started()
+    while not controller.is_exit_requested():
+        await asyncio.sleep(0.001)
+
+
+async def hung_asyncio_worker() -> None:
+    """
+    Never returns on its own.
+    """
+    while True:
+        await asyncio.sleep(0.001)
+
+
+class TestExecutionMode:
+    """
+    Start, join, exit code and exit acknowledgement within main.
+    """
+
+    def test_thread_workers_acknowledge(self) -> None:
+        """
+        Thread workers in main each acknowledge an exit request once.
+        """
+        controller = worker_controller.WorkerController()
+        workers = []
+        for _ in range(3):
+            worker_child = controller.create_child()
+            worker_child.add_workers(1)
+            workers.append(execution_mode.ThreadWorker(thread_worker, (worker_child, False)))
+
+        for worker in workers:
+            worker.start()
+
+        controller.request_exit()
+
+        assert controller.wait_for_all_acknowledged(5.0)
+        assert controller.get_acknowledged_count() == 3
+
+        for worker in workers:
+            worker.join(5.0)
+            assert not worker.is_alive()
+            assert worker.exitcode == 0
+
+    @pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+    def test_thread_worker_exit_code(self) -> None:
+        """
+        A thread worker that raised has a failure exit code.
+        """
+        worker = execution_mode.ThreadWorker(
+            thread_worker, (worker_controller.WorkerController(), True)
+        )
+        worker.start()
+        worker.join(5.0)
+
+        assert worker.exitcode == 1
+        assert worker.pid is None
+
+    def test_asyncio_worker(self) -> None:
+        """
+        Asyncio workers run on the shared event loop until exit is requested.
+        """
+        controller = worker_controller.WorkerController()
+        worker = execution_mode.AsyncioWorker(asyncio_worker, (controller,))
+        worker.start()
+
+        worker.join(0.1)
+        assert worker.is_alive()
+        assert worker.exitcode is None
+        assert controller.get_first_check_time() > 0.0
+
+        controller.request_exit()
+        worker.join(5.0)
+
+        assert not worker.is_alive()
+        assert worker.exitcode == 0
+
+    def test_asyncio_worker_kill(self) -> None:
+        """
+        Killing an asyncio worker cancels it.
+        """
+        worker = execution_mode.AsyncioWorker(hung_asyncio_worker, ())
+        worker.start()
+        worker.kill()
+        worker.join(5.0)
+
+        assert not worker.is_alive()
+        assert worker.exitcode == 1
@@ -0,0 +1,204 @@
+"""
+Test the mailbox keeps only the latest value for every reader.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+import pytest
+
+from utilities.workers import mailbox
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+WRITE_COUNT = 100000
+READER_COUNT = 2
+PUT_DELAY = 0.1  # seconds
+JOIN_TIMEOUT = 30.0  # seconds
+
+
+def writer(test_mailbox: mailbox.Mailbox) -> None:
+    """
+    Puts values of varying size, then closes the mailbox.
+    """
+    for i in range(1, WRITE_COUNT + 1):
+        test_mailbox.put((i, bytes(i % 100)))
+
+    test_mailbox.close()
+
+
+def reader(test_mailbox: mailbox.Mailbox, results: mp.Queue) -> None:
+    """
+    Gets values until the sentinel, reports the number of values
+    and whether each one was intact and newer than the previous one.
+    """
+    count = 0
+    is_consistent = True
+    last_i = 0
+    while True:
+        # Polling reads overlap writes far more often than blocked reads woken after them
+        try:
+            item = test_mailbox.get(False)
+        except queue.Empty:
+            continue
+        # Report instead of dying so that the test fails rather than waits
+        except Exception:  # pylint: disable=broad-exception-caught
+            is_consistent = False
+            break
+
+        if item is None:
+            break
+
+        i, payload = item
+        is_consistent = is_consistent and i > last_i and len(payload) == i % 100
+        last_i = i
+        count += 1
+
+    results.put((count, is_consistent))
+
+
+def put_until_closed(test_mailbox: mailbox.Mailbox) -> None:
+    """
+    Puts values until the mailbox refuses them.
+    """
+    i = 1
+    while test_mailbox.put(i):
+        i += 1
+
+
+def get_once(test_mailbox: mailbox.Mailbox, results: mp.Queue) -> None:
+    """
+    Reports the value got by a new reader.
+    """
+    results.put(test_mailbox.get(timeout=JOIN_TIMEOUT))
+
+
+@pytest.fixture
+def test_mailbox() -> mailbox.Mailbox:  # type: ignore
+    """
+    Mailbox unlinked after the test.
+    """
+    mailbox_instance = mailbox.Mailbox()
+    yield mailbox_instance  # type: ignore
+    mailbox_instance.unlink()
+
+
+class TestMailbox:
+    """
+    Conflation, independent readers and concurrent use.
+    """
+
+    def test_conflation(self, test_mailbox: mailbox.Mailbox) -> None:
+        """
+        Only the latest value is got, and only once.
+        """
+        assert test_mailbox.read() == (0, None)
+        with pytest.raises(queue.Empty):
+            test_mailbox.get(False)
+
+        test_mailbox.put(1)
+        test_mailbox.put(2)
+        assert test_mailbox.read() == (2, 2)
+        assert test_mailbox.get() == 2
+        assert test_mailbox.get_many(block=False) == []
+
+        assert test_mailbox.put_many([3, 4]) == 2
+        assert test_mailbox.get_version() == 3
+        assert test_mailbox.get_many() == [4]
+        with pytest.raises(queue.Empty):
+            test_mailbox.get(timeout=0.0)
+
+    def test_independent_readers(self, test_mailbox: mailbox.Mailbox) -> None:
+        """
+        A value got by one reader is still new to the others.
+        """
+        results = mp.Queue()
+        test_mailbox.put(1)
+
+        # A copy starts with the versions its reader had seen, so copy before the get
+        other_reader = mp.Process(target=get_once, args=(test_mailbox, results))
+        other_reader.start()
+        assert test_mailbox.get() == 1
+
+        assert results.get(timeout=JOIN_TIMEOUT) == 1
+        other_reader.join(JOIN_TIMEOUT)
+
+    def test_thread_readers(self, test_mailbox: mailbox.Mailbox) -> None:
+        """
+        Readers in one process each get every value.
+        """
+        first_reader = test_mailbox.create_reader()
+        second_reader = test_mailbox.create_reader()
+        test_mailbox.put(1)
+
+        assert first_reader.get(False) == 1
+        assert first_reader.get_many(block=False) == []
+        assert second_reader.get(False) == 1
+
+        test_mailbox.close()
+        assert first_reader.get_many() == [None]
+        assert second_reader.is_closed()
+
+    def test_blocking_get(self, test_mailbox: mailbox.Mailbox) -> None:
+        """
+        A blocked get wakes up on put, and on close with the sentinel.
+        """
+        putter = threading.Timer(PUT_DELAY, test_mailbox.put, (1,))
+        putter.start()
+        assert test_mailbox.get(timeout=JOIN_TIMEOUT) == 1
+        putter.join()
+
+        closer = threading.Timer(PUT_DELAY, test_mailbox.close)
+        closer.start()
+        assert test_mailbox.get(timeout=JOIN_TIMEOUT) is None
+        closer.join()
+
+        assert not test_mailbox.put(2)
+
+    def test_close_during_puts(self, test_mailbox: mailbox.Mailbox) -> None:
+        """
+        A put racing with close never overwrites the sentinel.
+        """
+        writers = [
+            mp.Process(target=put_until_closed, args=(test_mailbox,)) for _ in range(READER_COUNT)
+        ]
+        for writer_process in writers:
+            writer_process.start()
+
+        while test_mailbox.get_version() < WRITE_COUNT // 10:
+            time.sleep(0)
+
+        test_mailbox.close()
+        version, item = test_mailbox.read()
+        for writer_process in writers:
+            writer_process.join(JOIN_TIMEOUT)
+
+        assert item is None
+        assert test_mailbox.read() == (version, None)
+        assert test_mailbox.get(timeout=0.0) is None
+
+    def test_concurrent(self, test_mailbox: mailbox.Mailbox) -> None:
+        """
+        Readers in other processes only get intact values, in order, while the writer puts.
+        """
+        results = mp.Queue()
+        workers = [
+            mp.Process(target=reader, args=(test_mailbox, results)) for _ in range(READER_COUNT)
+        ]
+        workers.append(mp.Process(target=writer, args=(test_mailbox,)))
+        for worker in workers:
+            worker.start()
+
+        reader_results = [results.get(timeout=JOIN_TIMEOUT) for _ in range(READER_COUNT)]
+        for worker in workers:
+            worker.join(JOIN_TIMEOUT)
+
+        for count, is_consistent in reader_results:
+            assert is_consistent
+            assert 0 < count <= WRITE_COUNT
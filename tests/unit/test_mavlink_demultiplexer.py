@@ -0,0 +1,154 @@
+"""
+Test the demultiplexer reads each message once for every consumer.
+"""
+
+import socket
+import threading
+
+import pytest
+from pymavlink import mavutil
+
+from modules.demultiplexer import mavlink_demultiplexer
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def connections() -> "tuple[mavutil.mavfile, mavutil.mavfile]":  # type: ignore
+    """
+    Receiving and sending ends of a UDP MAVLink connection on localhost.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        port = free_socket.getsockname()[1]
+
+    receiver = mavutil.mavlink_connection(f"udpin:127.0.0.1:{port}")
+    sender = mavutil.mavlink_connection(f"udpout:127.0.0.1:{port}", source_system=1)
+    yield receiver, sender
+    sender.close()
+    receiver.close()
+
+
+def send_attitude(sender: mavutil.mavfile, time_boot_ms: int) -> None:
+    """
+    Sends an ATTITUDE message.
+    """
+    sender.mav.attitude_send(time_boot_ms, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+def send_heartbeat(sender: mavutil.mavfile) -> None:
+    """
+    Sends a HEARTBEAT message.
+    """
+    sender.mav.heartbeat_send(
+        mavutil.mavlink.MAV_TYPE_QUADROTOR, mavutil.mavlink.MAV_AUTOPILOT_GENERIC, 0, 0, 0
+    )
+
+
+class TestMavlinkDemultiplexer:
+    """
+    Dispatch to slots and handlers, timeouts and consumers in several threads.
+    """
+
+    def test_shared_instance(self, connections: "tuple[mavutil.mavfile, mavutil.mavfile]") -> None:
+        """
+        Consumers of the same connection in a process get the same demultiplexer.
+        """
+        receiver, sender = connections
+
+        demultiplexer = mavlink_demultiplexer.MavlinkDemultiplexer.get(receiver)
+
+        assert mavlink_demultiplexer.MavlinkDemultiplexer.get(receiver) is demultiplexer
+        assert mavlink_demultiplexer.MavlinkDemultiplexer.get(sender) is not demultiplexer
+
+    def test_dispatch(self, connections: "tuple[mavutil.mavfile, mavutil.mavfile]") -> None:
+        """
+        Every slot and handler of a type gets each message, the latest one is kept.
+        """
+        receiver, sender = connections
+        demultiplexer = mavlink_demultiplexer.MavlinkDemultiplexer.get(receiver)
+        attitude_slot_1 = demultiplexer.subscribe("ATTITUDE")
+        attitude_slot_2 = demultiplexer.subscribe("ATTITUDE")
+        heartbeat_slot = demultiplexer.subscribe("HEARTBEAT")
+        handled_times = []
+        demultiplexer.add_handler(
+            "ATTITUDE", lambda message: handled_times.append(message.time_boot_ms)
+        )
+
+        send_attitude(sender, 1)
+        send_attitude(sender, 2)
+        send_heartbeat(sender)
+
+        assert demultiplexer.wait([heartbeat_slot], 1.0)
+        assert handled_times == [1, 2]
+        assert attitude_slot_1.take().time_boot_ms == 2
+        assert attitude_slot_2.take().time_boot_ms == 2
+        assert heartbeat_slot.take() is not None
+
+        # Taken until the next message
+        assert attitude_slot_1.take() is None
+        assert not demultiplexer.wait([attitude_slot_1, heartbeat_slot], 0.0)
+
+    def test_timeout(self, connections: "tuple[mavutil.mavfile, mavutil.mavfile]") -> None:
+        """
+        A slot that is ready is kept when waiting for another one times out.
+        """
+        receiver, sender = connections
+        demultiplexer = mavlink_demultiplexer.MavlinkDemultiplexer.get(receiver)
+        attitude_slot = demultiplexer.subscribe("ATTITUDE")
+        position_slot = demultiplexer.subscribe("LOCAL_POSITION_NED")
+
+        send_attitude(sender, 1)
+
+        assert not demultiplexer.wait([attitude_slot, position_slot], 0.2)
+        assert attitude_slot.is_ready()
+        assert not position_slot.is_ready()
+
+    def test_consumer_threads(self, connections: "tuple[mavutil.mavfile, mavutil.mavfile]") -> None:
+        """
+        Consumers waiting in different threads each get their messages.
+        """
+        receiver, sender = connections
+        demultiplexer = mavlink_demultiplexer.MavlinkDemultiplexer.get(receiver)
+        attitude_slot = demultiplexer.subscribe("ATTITUDE")
+        heartbeat_slot = demultiplexer.subscribe("HEARTBEAT")
+        results = {}
+
+        def consume(slot: mavlink_demultiplexer.LatestMessage) -> None:
+            results[slot.message_type] = demultiplexer.wait([slot], 2.0)
+
+        threads = [
+            threading.Thread(target=consume, args=(slot,))
+            for slot in (attitude_slot, heartbeat_slot)
+        ]
+        for thread in threads:
+            thread.start()
+
+        send_heartbeat(sender)
+        send_attitude(sender, 1)
+
+        for thread in threads:
+            thread.join()
+
+        assert results == {"ATTITUDE": True, "HEARTBEAT": True}
+
+    def test_wait_any(self, connections: "tuple[mavutil.mavfile, mavutil.mavfile]") -> None:
+        """
+        Waiting for any slot returns on the first message of either type.
+        """
+        receiver, sender = connections
+        demultiplexer = mavlink_demultiplexer.MavlinkDemultiplexer.get(receiver)
+        attitude_slot = demultiplexer.subscribe("ATTITUDE")
+        heartbeat_slot = demultiplexer.subscribe("HEARTBEAT")
+
+        send_attitude(sender, 1)
+
+        assert demultiplexer.wait_any([attitude_slot, heartbeat_slot], 1.0)
+        assert attitude_slot.is_ready()
+        assert not heartbeat_slot.is_ready()
+
+        _ = attitude_slot.take()
+        assert not demultiplexer.wait_any([attitude_slot, heartbeat_slot], 0.0)
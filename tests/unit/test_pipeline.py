@@ -0,0 +1,209 @@
+"""
+Test pipeline graph validation, and starting and stopping a built pipeline.
+"""
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import worker_controller
+
+# Pipeline imports the logger of the common submodule
+logger = pytest.importorskip("modules.common.modules.logger.logger")
+pipeline = pytest.importorskip("utilities.workers.pipeline")
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+ITEM_COUNT = 10
+WORKER_COUNT = 2
+JOIN_TIMEOUT = 10.0  # seconds
+
+
+def double(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Puts twice every item until the sentinel.
+    """
+    while not controller.is_exit_requested():
+        item = input_queue.get()
+        if item is None:
+            break
+
+        output_queue.put(2 * item)
+
+
+def add_one(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Puts every item plus 1 until the sentinel.
+    """
+    while not controller.is_exit_requested():
+        item = input_queue.get()
+        if item is None:
+            break
+
+        output_queue.put(item + 1)
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> queue_proxy_wrapper.QueueManager:  # type: ignore
+    """
+    Manager for the queues of the MANAGER backend.
+    """
+    manager = queue_proxy_wrapper.QueueManager()
+    # Shut down explicitly after the tests
+    # pylint: disable-next=consider-using-with
+    manager.start()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(scope="module")
+def local_logger() -> "logger.Logger":
+    """
+    Logger for validation errors.
+    """
+    result, logger_instance = logger.Logger.create("test_pipeline", False)
+    assert result
+    assert logger_instance is not None
+    return logger_instance
+
+
+def build(
+    builder: "pipeline.PipelineBuilder",
+    mp_manager: queue_proxy_wrapper.QueueManager,
+    local_logger: "logger.Logger",
+) -> "pipeline.Pipeline | None":
+    """
+    Builds with a new controller, returns None if the builder rejects the graph.
+    """
+    result, built_pipeline = builder.build(
+        mp_manager, worker_controller.WorkerController(), local_logger
+    )
+    assert result == (built_pipeline is not None)
+    return built_pipeline
+
+
+class TestValidation:
+    """
+    Graphs rejected by `build()`.
+    """
+
+    def test_undeclared_endpoint(
+        self, mp_manager: queue_proxy_wrapper.QueueManager, local_logger: "logger.Logger"
+    ) -> None:
+        """
+        Edges from or to a stage that was never added.
+        """
+        builder = pipeline.PipelineBuilder().add_stage("double", double, 1)
+        builder.add_edge("in", "missing", "double").add_edge("out", "double", None)
+        assert build(builder, mp_manager, local_logger) is None
+
+        builder = pipeline.PipelineBuilder().add_stage("double", double, 1)
+        builder.add_edge("in", None, "double").add_edge("out", "double", "missing")
+        assert build(builder, mp_manager, local_logger) is None
+
+    def test_duplicate_names(
+        self, mp_manager: queue_proxy_wrapper.QueueManager, local_logger: "logger.Logger"
+    ) -> None:
+        """
+        Stages and edges must be unique.
+        """
+        builder = pipeline.PipelineBuilder().add_stage("double", double, 1)
+        builder.add_stage("double", double, 1)
+        builder.add_edge("in", None, "double").add_edge("out", "double", None)
+        assert build(builder, mp_manager, local_logger) is None
+
+        builder = pipeline.PipelineBuilder().add_stage("double", double, 1)
+        builder.add_edge("in", None, "double").add_edge("in", "double", None)
+        assert build(builder, mp_manager, local_logger) is None
+
+    def test_cycle(
+        self, mp_manager: queue_proxy_wrapper.QueueManager, local_logger: "logger.Logger"
+    ) -> None:
+        """
+        Edges looping back to a stage, directly or through others.
+        """
+        builder = pipeline.PipelineBuilder().add_stage("double", double, 1)
+        builder.add_edge("in", None, "double").add_edge("loop", "double", "double")
+        assert build(builder, mp_manager, local_logger) is None
+
+        builder = pipeline.PipelineBuilder()
+        builder.add_stage("double", double, 1).add_stage("add_one", add_one, 1)
+        builder.add_edge("in", None, "double").add_edge("forward", "double", "add_one")
+        builder.add_edge("back", "add_one", "double").add_edge("out", "add_one", None)
+        assert build(builder, mp_manager, local_logger) is None
+
+    def test_queue_size(
+        self, mp_manager: queue_proxy_wrapper.QueueManager, local_logger: "logger.Logger"
+    ) -> None:
+        """
+        Queues must be bounded for shared memory and fit a sentinel per consumer.
+        """
+        builder = pipeline.PipelineBuilder().add_stage("double", double, 1)
+        builder.add_edge(
+            "in", None, "double", backend=queue_proxy_wrapper.QueueBackend.SHARED_MEMORY
+        )
+        builder.add_edge("out", "double", None)
+        assert build(builder, mp_manager, local_logger) is None
+
+        builder = pipeline.PipelineBuilder().add_stage("double", double, QUEUE_MAX_SIZE + 1)
+        builder.add_edge("in", None, "double", QUEUE_MAX_SIZE).add_edge("out", "double", None)
+        assert build(builder, mp_manager, local_logger) is None
+
+
+class TestPipeline:
+    """
+    Running a built pipeline.
+    """
+
+    @pytest.mark.parametrize(
+        "backend",
+        [queue_proxy_wrapper.QueueBackend.MANAGER, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY],
+    )
+    def test_start_and_stop(
+        self,
+        mp_manager: queue_proxy_wrapper.QueueManager,
+        local_logger: "logger.Logger",
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Items flow through every stage, stop wakes and joins every worker.
+        """
+        builder = pipeline.PipelineBuilder()
+        builder.add_stage("double", double, WORKER_COUNT).add_stage("add_one", add_one, 1)
+        builder.add_edge("in", None, "double", QUEUE_MAX_SIZE, backend)
+        builder.add_edge("middle", "double", "add_one", QUEUE_MAX_SIZE, backend)
+        builder.add_edge("out", "add_one", None, ITEM_COUNT + 1, backend)
+        test_pipeline = build(builder, mp_manager, local_logger)
+        assert test_pipeline is not None
+
+        test_pipeline.start()
+        input_queue = test_pipeline.get_queue("in")
+        for item in range(ITEM_COUNT):
+            input_queue.put(item)
+
+        output_queue = test_pipeline.get_queue("out")
+        results = [output_queue.get(timeout=JOIN_TIMEOUT) for _ in range(ITEM_COUNT)]
+        stats = test_pipeline.get_stats()
+
+        # Workers are blocked in get, only the close sentinels wake them
+        # Stop before asserting, running workers would keep the test process alive
+        join_times = test_pipeline.stop(JOIN_TIMEOUT)
+
+        assert sorted(results) == [2 * item + 1 for item in range(ITEM_COUNT)]
+        # Counted by main, a worker counts its put only after the item is visible
+        assert (stats["in"].puts, stats["out"].gets) == (ITEM_COUNT, ITEM_COUNT)
+        assert [len(join_times["double"]), len(join_times["add_one"])] == [WORKER_COUNT, 1]
+        for stage_join_times in join_times.values():
+            assert all(join_time < JOIN_TIMEOUT for join_time in stage_join_times)
@@ -0,0 +1,74 @@
+"""
+Test the priority queue ordering.
+"""
+
+from utilities.workers import priority_queue_proxy_wrapper
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+Priority = priority_queue_proxy_wrapper.Priority
+
+
+class TestPriorityBatchQueue:
+    """
+    Ordering without a manager, the proxy only forwards calls.
+    """
+
+    def test_strict_priority(self) -> None:
+        """
+        More urgent classes first, FIFO within a class.
+        """
+        # Setup
+        priority_queue = priority_queue_proxy_wrapper.PriorityBatchQueue()
+        entries = [
+            (Priority.LOW, "low"),
+            (Priority.NORMAL, "normal 1"),
+            (Priority.CRITICAL, "critical"),
+            (Priority.NORMAL, "normal 2"),
+        ]
+        expected = ["critical", "normal 1", "normal 2", "low"]
+
+        # Run
+        priority_queue.put_many(entries)
+        actual = priority_queue.get_many()
+
+        # Test
+        assert actual == expected
+
+    def test_bounded_starvation(self) -> None:
+        """
+        A low priority item is overtaken at most starvation_limit times per class of difference.
+        """
+        # Setup
+        starvation_limit = 2
+        priority_queue = priority_queue_proxy_wrapper.PriorityBatchQueue(0, starvation_limit)
+        priority_queue.put((Priority.HIGH, "high"))
+        for i in range(10):
+            priority_queue.put((Priority.CRITICAL, i))
+
+        # Run
+        actual = priority_queue.get_many()
+
+        # Test
+        overtaken_count = actual.index("high")
+        assert overtaken_count <= starvation_limit * (Priority.HIGH - Priority.CRITICAL)
+
+    def test_sentinel_last(self) -> None:
+        """
+        The sentinel is served after queued items, even less urgent later ones.
+        """
+        # Setup
+        priority_queue = priority_queue_proxy_wrapper.PriorityBatchQueue()
+        priority_queue.put((Priority.CRITICAL, "critical"))
+
+        # Run
+        priority_queue.put(None)
+        priority_queue.put((Priority.LOW, "low"))
+        actual = priority_queue.get_many()
+
+        # Test
+        assert actual == ["critical", "low", None]
@@ -0,0 +1,73 @@
+"""
+Test spare workers wait for activation and report their first loop iteration.
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import process_start
+from utilities.workers import worker_controller
+
+
+def spare(
+    controller: worker_controller.WorkerController,
+    activation: process_start.WorkerActivation,
+    slot_queue: "mp.Queue[int]",
+) -> None:
+    """
+    Reports the slot it is activated as, then checks its controller once.
+    """
+    slot = activation.wait()
+    slot_queue.put(slot)
+    if slot < 0:
+        return
+
+    controller.mark_worker_started()
+    _ = controller.is_exit_requested()
+
+
+class TestProcessStart:
+    """
+    Spare workers and first loop iteration timing.
+    """
+
+    def test_activate(self) -> None:
+        """
+        An activated spare runs as the given slot and records its first check.
+        """
+        controller = worker_controller.WorkerController()
+        activation = process_start.WorkerActivation()
+        slot_queue: "mp.Queue[int]" = mp.Queue()
+        process = mp.Process(target=spare, args=(controller, activation, slot_queue))
+        process_start.start_process(process)
+
+        time.sleep(0.1)
+        assert slot_queue.empty()
+        assert controller.get_first_check_time() == 0.0
+
+        activation_time = time.monotonic()
+        activation.activate(3)
+        process.join(5.0)
+
+        assert slot_queue.get() == 3
+        assert controller.get_first_check_time() >= activation_time
+
+        controller.reset_first_check_time()
+        assert controller.get_first_check_time() == 0.0
+
+    def test_cancel(self) -> None:
+        """
+        A cancelled spare exits without running.
+        """
+        controller = worker_controller.WorkerController()
+        activation = process_start.WorkerActivation()
+        slot_queue: "mp.Queue[int]" = mp.Queue()
+        process = mp.Process(target=spare, args=(controller, activation, slot_queue))
+        process_start.start_process(process)
+
+        activation.cancel()
+        process.join(5.0)
+
+        assert slot_queue.get() < 0
+        assert controller.get_first_check_time() == 0.0
+        assert process.exitcode == 0
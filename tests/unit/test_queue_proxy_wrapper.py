@@ -0,0 +1,296 @@
+"""
+Test batch operations, statistics and overflow policies of the queue wrapper.
+"""
+
+import collections.abc
+import multiprocessing as mp
+import multiprocessing.managers
+import queue
+import threading
+import time
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_stats
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+SHORT_TIMEOUT = 0.05  # seconds
+CONSUMER_DELAY = 0.1  # seconds
+
+# Takes maxsize and keyword arguments of QueueProxyWrapper
+QueueFactory = collections.abc.Callable[..., queue_proxy_wrapper.QueueProxyWrapper]
+
+
+def put_items(output_queue: queue_proxy_wrapper.QueueProxyWrapper, count: int) -> None:
+    """
+    Puts count items.
+    """
+    for i in range(count):
+        output_queue.put(i)
+
+
+def create_full_queue(
+    create_queue: QueueFactory,
+    overflow_policy: queue_proxy_wrapper.OverflowPolicy,
+    **kwargs: object,
+) -> queue_proxy_wrapper.QueueProxyWrapper:
+    """
+    Queue with the policy holding items 0 to QUEUE_MAX_SIZE - 1 .
+    """
+    test_queue = create_queue(overflow_policy=overflow_policy, **kwargs)
+    put_items(test_queue, QUEUE_MAX_SIZE)
+    return test_queue
+
+
+@pytest.fixture(scope="module")
+def batch_manager() -> queue_proxy_wrapper.QueueManager:  # type: ignore
+    """
+    Manager with native batch operations.
+    """
+    manager = queue_proxy_wrapper.QueueManager()
+    # Shut down explicitly after the tests
+    # pylint: disable-next=consider-using-with
+    manager.start()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(scope="module")
+def plain_manager() -> multiprocessing.managers.SyncManager:  # type: ignore
+    """
+    Manager without batch operations, the wrapper falls back to 1 call per item.
+    """
+    manager = mp.Manager()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(params=["batch_manager", "plain_manager", "shared_memory"])
+def create_queue(
+    request: pytest.FixtureRequest,
+    batch_manager: queue_proxy_wrapper.QueueManager,
+    plain_manager: multiprocessing.managers.SyncManager,
+) -> QueueFactory:  # type: ignore
+    """
+    Creates queues of every backend, unlinked after the test.
+    """
+    queues = []
+
+    def create(
+        maxsize: int = QUEUE_MAX_SIZE, **kwargs: object
+    ) -> queue_proxy_wrapper.QueueProxyWrapper:
+        if request.param == "shared_memory":
+            test_queue = queue_proxy_wrapper.QueueProxyWrapper(
+                batch_manager, maxsize, queue_proxy_wrapper.QueueBackend.SHARED_MEMORY, **kwargs
+            )
+        elif request.param == "batch_manager":
+            test_queue = queue_proxy_wrapper.QueueProxyWrapper(batch_manager, maxsize, **kwargs)
+        else:
+            test_queue = queue_proxy_wrapper.QueueProxyWrapper(plain_manager, maxsize, **kwargs)
+
+        queues.append(test_queue)
+        return test_queue
+
+    yield create  # type: ignore
+
+    for test_queue in queues:
+        test_queue.unlink()
+
+
+class TestBatch:
+    """
+    put_many and get_many.
+    """
+
+    def test_order(self, create_queue: QueueFactory) -> None:
+        """
+        Batches keep the order of items, also across single puts and gets.
+        """
+        test_queue = create_queue()
+
+        assert test_queue.put_many([0, 1]) == 2
+        assert test_queue.put(2)
+        assert test_queue.put_many([3]) == 1
+
+        assert test_queue.get() == 0
+        assert test_queue.get_many(2) == [1, 2]
+        assert test_queue.get_many() == [3]
+
+    def test_partial_put(self, create_queue: QueueFactory) -> None:
+        """
+        A batch that does not fit puts its first items and reports how many.
+        """
+        test_queue = create_queue()
+
+        assert test_queue.put_many(list(range(6)), timeout=SHORT_TIMEOUT) == QUEUE_MAX_SIZE
+        assert test_queue.put_many([6], block=False) == 0
+
+        assert test_queue.get_many(timeout=SHORT_TIMEOUT) == list(range(QUEUE_MAX_SIZE))
+
+    def test_empty_get(self, create_queue: QueueFactory) -> None:
+        """
+        Getting a batch from an empty queue returns no items once the timeout passes.
+        """
+        test_queue = create_queue()
+
+        assert test_queue.get_many(block=False) == []
+        assert test_queue.get_many(timeout=SHORT_TIMEOUT) == []
+
+
+class TestStats:
+    """
+    Counters shared by every process using the queue.
+    """
+
+    def test_counters(self, create_queue: QueueFactory) -> None:
+        """
+        Puts, gets, depth and high water mark, a rejected put is a drop.
+        """
+        test_queue = create_queue()
+
+        put_items(test_queue, 3)
+        test_queue.get()
+        assert test_queue.get_many() == [1, 2]
+        test_queue.put(3)
+
+        stats = test_queue.get_stats()
+        assert (stats.puts, stats.gets, stats.depth, stats.high_water_mark) == (4, 3, 1, 3)
+        assert stats.drops == 0
+
+        put_items(test_queue, QUEUE_MAX_SIZE - 1)
+        with pytest.raises(queue.Full):
+            test_queue.put(0, block=False)
+
+        stats = test_queue.get_stats()
+        assert (stats.puts, stats.depth, stats.high_water_mark) == (7, 4, 4)
+        assert stats.drops_by_reason[queue_stats.DropReason.REJECTED] == 1
+        assert stats.drops == 1
+
+    def test_depth_after_drop_oldest(self, create_queue: QueueFactory) -> None:
+        """
+        Evicted items count as drops and leave the depth, not as gets.
+        """
+        test_queue = create_queue(overflow_policy=queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST)
+
+        put_items(test_queue, QUEUE_MAX_SIZE + 2)
+
+        stats = test_queue.get_stats()
+        assert (stats.puts, stats.gets, stats.depth) == (QUEUE_MAX_SIZE + 2, 0, QUEUE_MAX_SIZE)
+        assert stats.high_water_mark == QUEUE_MAX_SIZE
+        assert stats.drops_by_reason[queue_stats.DropReason.OLDEST] == 2
+
+        assert test_queue.get_many() == [2, 3, 4, 5]
+        assert test_queue.get_stats().depth == 0
+
+    def test_shared(self, create_queue: QueueFactory) -> None:
+        """
+        Operations in other processes are counted.
+        """
+        test_queue = create_queue()
+
+        worker = mp.Process(target=put_items, args=(test_queue, 2))
+        worker.start()
+        worker.join()
+        test_queue.get_many(timeout=SHORT_TIMEOUT)
+
+        stats = test_queue.get_stats()
+        assert (stats.puts, stats.gets, stats.depth) == (2, 2, 0)
+
+
+class TestOverflowPolicy:
+    """
+    Blocking puts on a full queue.
+    """
+
+    def test_block(self, create_queue: QueueFactory) -> None:
+        """
+        Waits until a consumer makes space.
+        """
+        test_queue = create_full_queue(create_queue, queue_proxy_wrapper.OverflowPolicy.BLOCK)
+        consumer = threading.Timer(CONSUMER_DELAY, test_queue.get)
+        consumer.start()
+
+        start_time = time.perf_counter()
+        assert test_queue.put(QUEUE_MAX_SIZE)
+        assert time.perf_counter() - start_time >= CONSUMER_DELAY / 2
+        consumer.join()
+
+        assert test_queue.get_many() == [1, 2, 3, 4]
+        assert test_queue.get_stats().drops == 0
+
+    def test_block_with_timeout(self, create_queue: QueueFactory) -> None:
+        """
+        Drops the new item after the overflow timeout.
+        """
+        test_queue = create_full_queue(
+            create_queue,
+            queue_proxy_wrapper.OverflowPolicy.BLOCK_WITH_TIMEOUT,
+            overflow_timeout=SHORT_TIMEOUT,
+        )
+
+        start_time = time.perf_counter()
+        assert not test_queue.put(QUEUE_MAX_SIZE)
+        assert time.perf_counter() - start_time >= SHORT_TIMEOUT
+
+        assert test_queue.get_many() == [0, 1, 2, 3]
+        assert test_queue.get_stats().drops_by_reason[queue_stats.DropReason.TIMEOUT] == 1
+
+    def test_drop_newest(self, create_queue: QueueFactory) -> None:
+        """
+        Drops the new items, also the ones of a batch that do not fit.
+        """
+        test_queue = create_full_queue(create_queue, queue_proxy_wrapper.OverflowPolicy.DROP_NEWEST)
+
+        assert not test_queue.put(QUEUE_MAX_SIZE)
+        test_queue.get()
+        assert test_queue.put_many([5, 6]) == 1
+
+        assert test_queue.get_many() == [1, 2, 3, 5]
+        assert test_queue.get_stats().drops_by_reason[queue_stats.DropReason.NEWEST] == 2
+
+    def test_drop_oldest(self, create_queue: QueueFactory) -> None:
+        """
+        Evicts the oldest items for the new ones.
+        """
+        test_queue = create_full_queue(create_queue, queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST)
+
+        assert test_queue.put(4)
+        assert test_queue.put_many([5, 6]) == 2
+
+        assert test_queue.get_many() == [3, 4, 5, 6]
+        assert test_queue.get_stats().drops_by_reason[queue_stats.DropReason.OLDEST] == 3
+
+    def test_sample(self, create_queue: QueueFactory) -> None:
+        """
+        Keeps every other overflowing item by evicting the oldest.
+        """
+        test_queue = create_full_queue(
+            create_queue, queue_proxy_wrapper.OverflowPolicy.SAMPLE, sample_every=2
+        )
+
+        assert [test_queue.put(item) for item in range(4, 8)] == [False, True, False, True]
+
+        assert test_queue.get_many() == [2, 3, 5, 7]
+        stats = test_queue.get_stats()
+        assert stats.drops_by_reason[queue_stats.DropReason.SAMPLED] == 2
+        assert stats.drops_by_reason[queue_stats.DropReason.OLDEST] == 2
+
+    def test_caller_limit(self, create_queue: QueueFactory) -> None:
+        """
+        Non-blocking and timed puts ignore the policy and raise.
+        """
+        test_queue = create_full_queue(create_queue, queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST)
+
+        with pytest.raises(queue.Full):
+            test_queue.put(QUEUE_MAX_SIZE, block=False)
+        with pytest.raises(queue.Full):
+            test_queue.put(QUEUE_MAX_SIZE, timeout=SHORT_TIMEOUT)
+
+        assert test_queue.get_many() == [0, 1, 2, 3]
@@ -0,0 +1,289 @@
+"""
+Test the queue close protocol wakes blocked workers quickly.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+
+import pytest
+
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import queue_stats
+from utilities.workers import worker_controller
+
+
+# Test functions use test fixture signature names and access class privates
+# No enable
+# pylint: disable=protected-access,redefined-outer-name
+
+
+MAX_SHUTDOWN_TIME = 0.1  # seconds
+BLOCK_SETTLE_TIME = 0.3  # seconds
+QUEUE_MAX_SIZE = 2
+POLL_INTERVAL = 0.01  # seconds
+
+
+def consumer(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Blocks in get until the sentinel arrives.
+    """
+    while not controller.is_exit_requested():
+        if input_queue.get() is None:
+            break
+
+
+def timed_consumer(input_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+    """
+    Polls with timed gets until the sentinel arrives, only a sentinel stops it.
+    """
+    while True:
+        try:
+            if input_queue.get(timeout=POLL_INTERVAL) is None:
+                break
+        except queue.Empty:
+            pass
+
+
+def producer(
+    output_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Blocks in put on a full queue until it is closed.
+    """
+    while not controller.is_exit_requested():
+        if not output_queue.put(0):
+            break
+
+
+def shutdown(
+    controller: worker_controller.WorkerController,
+    queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
+    workers: "list[mp.Process]",
+) -> float:
+    """
+    Requests exit, closes the queues and joins the workers.
+
+    Returns the total shutdown time in seconds.
+    """
+    start_time = time.perf_counter()
+    controller.request_exit()
+    for worker_queue in queues:
+        worker_queue.close()
+
+    for worker in workers:
+        worker.join(1.0)
+
+    return time.perf_counter() - start_time
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> queue_proxy_wrapper.QueueManager:  # type: ignore
+    """
+    Manager for the queues.
+    """
+    manager = queue_proxy_wrapper.QueueManager()
+    # Shut down explicitly after the tests
+    # pylint: disable-next=consider-using-with
+    manager.start()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(params=list(queue_proxy_wrapper.QueueBackend))
+def backend(request: pytest.FixtureRequest) -> queue_proxy_wrapper.QueueBackend:
+    """
+    Every queue backend.
+    """
+    return request.param
+
+
+class TestClose:
+    """
+    Closing a queue wakes blocked readers and writers.
+    """
+
+    def test_blocked_consumers(
+        self,
+        mp_manager: queue_proxy_wrapper.QueueManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        More consumers than queue slots, all blocked on an empty queue.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        test_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+        consumer_count = QUEUE_MAX_SIZE + 1
+        test_queue.add_consumers(consumer_count)
+        workers = [
+            mp.Process(target=consumer, args=(test_queue, controller))
+            for _ in range(consumer_count)
+        ]
+        for worker in workers:
+            worker.start()
+
+        time.sleep(BLOCK_SETTLE_TIME)
+
+        # Run
+        shutdown_time = shutdown(controller, [test_queue], workers)
+
+        # Test
+        assert all(not worker.is_alive() for worker in workers)
+        assert shutdown_time < MAX_SHUTDOWN_TIME
+
+        test_queue.unlink()
+
+    def test_sentinel_per_consumer(
+        self,
+        mp_manager: queue_proxy_wrapper.QueueManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        More consumers than queue slots, each one gets its own sentinel.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        test_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+        consumer_count = 2 * QUEUE_MAX_SIZE + 1
+        test_queue.add_consumers(consumer_count)
+        workers = [
+            mp.Process(target=timed_consumer, args=(test_queue,)) for _ in range(consumer_count)
+        ]
+        for worker in workers:
+            worker.start()
+
+        time.sleep(BLOCK_SETTLE_TIME)
+
+        # Run
+        shutdown(controller, [test_queue], workers)
+
+        # Test
+        is_alive = [worker.is_alive() for worker in workers]
+        for worker in workers:
+            worker.kill()
+        assert not any(is_alive)
+
+        test_queue.unlink()
+
+    def test_blocked_producers(
+        self,
+        mp_manager: queue_proxy_wrapper.QueueManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Producers blocked on a full queue without consumers.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        test_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+        workers = [mp.Process(target=producer, args=(test_queue, controller)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+
+        time.sleep(BLOCK_SETTLE_TIME)
+
+        # Run
+        shutdown_time = shutdown(controller, [test_queue], workers)
+
+        # Test
+        assert all(not worker.is_alive() for worker in workers)
+        assert shutdown_time < MAX_SHUTDOWN_TIME
+        assert not test_queue.put(0)
+
+        test_queue.unlink()
+
+    def test_items_before_sentinel(
+        self,
+        mp_manager: queue_proxy_wrapper.QueueManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Queued items are kept and got before the sentinel.
+        """
+        test_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+        test_queue.add_consumers(1)
+        test_queue.put(1)
+
+        test_queue.close()
+
+        assert [test_queue.get(timeout=1.0) for _ in range(2)] == [1, None]
+        stats = test_queue.get_stats()
+        assert (stats.depth, stats.drops) == (0, 0)
+
+        test_queue.unlink()
+
+    def test_discard_without_consumers(
+        self,
+        mp_manager: queue_proxy_wrapper.QueueManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Items nobody takes are discarded as drops to fit the sentinels, not left in the depth.
+        """
+        test_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+        test_queue.add_consumers(1)
+        for item in range(QUEUE_MAX_SIZE):
+            test_queue.put(item)
+
+        test_queue.close()
+
+        assert test_queue.get(timeout=1.0) is None
+        stats = test_queue.get_stats()
+        assert stats.depth == 0
+        assert stats.drops_by_reason[queue_stats.DropReason.CLOSED] == QUEUE_MAX_SIZE
+
+        test_queue.unlink()
+
+    def test_unbounded_queue(self, mp_manager: queue_proxy_wrapper.QueueManager) -> None:
+        """
+        Unbounded queues get a sentinel per consumer too.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        test_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, 0)
+        test_queue.add_consumers(2)
+        workers = [mp.Process(target=consumer, args=(test_queue, controller)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+
+        time.sleep(BLOCK_SETTLE_TIME)
+
+        # Run
+        shutdown_time = shutdown(controller, [test_queue], workers)
+
+        # Test
+        assert all(not worker.is_alive() for worker in workers)
+        assert shutdown_time < MAX_SHUTDOWN_TIME
+
+    def test_pipeline(
+        self,
+        mp_manager: queue_proxy_wrapper.QueueManager,
+        backend: queue_proxy_wrapper.QueueBackend,
+    ) -> None:
+        """
+        Producers and consumers on the same queue stop together.
+        """
+        # Setup
+        controller = worker_controller.WorkerController()
+        test_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE, backend)
+        test_queue.add_consumers(2)
+        workers = [mp.Process(target=producer, args=(test_queue, controller)) for _ in range(2)]
+        workers += [mp.Process(target=consumer, args=(test_queue, controller)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+
+        time.sleep(BLOCK_SETTLE_TIME)
+
+        # Run
+        shutdown_time = shutdown(controller, [test_queue], workers)
+
+        # Test
+        assert all(not worker.is_alive() for worker in workers)
+        assert shutdown_time < MAX_SHUTDOWN_TIME
+
+        test_queue.unlink()
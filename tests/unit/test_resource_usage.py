@@ -0,0 +1,71 @@
+"""
+Test resource usage is read from /proc.
+"""
+
+import os
+import time
+
+import pytest
+
+from utilities.workers import resource_usage
+
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="Requires /proc")
+
+
+class TestResourceUsage:
+    """
+    Samples and history.
+    """
+
+    def test_read_process_sample(self) -> None:
+        """
+        The current process uses memory, CPU time and file descriptors.
+        """
+        sample = resource_usage.read_process_sample(os.getpid())
+
+        assert sample is not None
+        assert sample.rss > 0
+        assert sample.cpu_time > 0.0
+        assert sample.open_fds > 0
+        assert sample.voluntary_switches >= 0
+        assert sample.involuntary_switches >= 0
+
+    def test_missing_process(self) -> None:
+        """
+        A process that does not exist has no sample.
+        """
+        # Larger than any pid_max
+        assert resource_usage.read_process_sample(2**23) is None
+
+    def test_history(self) -> None:
+        """
+        The history keeps the latest samples and measures CPU usage between the last 2.
+        """
+        history = resource_usage.ResourceHistory(os.getpid(), 2)
+        for _ in range(3):
+            sample = resource_usage.read_process_sample(os.getpid())
+            assert sample is not None
+            history.samples.append(sample)
+
+            # Busy
+            end_time = time.monotonic() + 0.1
+            while time.monotonic() < end_time:
+                pass
+
+        assert len(history.samples) == 2
+        assert 0.0 < history.get_cpu_usage() <= 1.5
+        assert history.get_peak_rss() > 0
+
+    def test_sampler(self) -> None:
+        """
+        Samples each slot with a process, forgets slots that were scaled down.
+        """
+        sampler = resource_usage.ResourceSampler(2)
+        for _ in range(3):
+            histories = sampler.sample([os.getpid(), None])
+
+        assert list(histories) == [0]
+        assert len(histories[0].samples) == 2
+
+        assert not sampler.sample([])
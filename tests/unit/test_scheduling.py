@@ -0,0 +1,84 @@
+"""
+Test worker scheduling is applied to a running process.
+"""
+
+import multiprocessing as mp
+import os
+import time
+
+import pytest
+
+from utilities.workers import scheduling
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"), reason="Scheduling is only supported on Linux"
+)
+
+
+def sleeper() -> None:
+    """
+    Waits to be terminated.
+    """
+    time.sleep(10.0)
+
+
+@pytest.fixture
+def process() -> mp.Process:  # type: ignore
+    """
+    Running process to apply scheduling to.
+    """
+    sleeper_process = mp.Process(target=sleeper)
+    sleeper_process.start()
+    yield sleeper_process  # type: ignore
+    sleeper_process.terminate()
+    sleeper_process.join()
+
+
+class TestWorkerScheduling:
+    """
+    Applying CPU affinity, nice value and scheduling class.
+    """
+
+    def test_affinity_and_nice(self, process: mp.Process) -> None:
+        """
+        Affinity and a less favourable nice value need no privileges.
+        """
+        assert process.pid is not None
+        cpu = min(os.sched_getaffinity(0))
+        nice = min(os.getpriority(os.PRIO_PROCESS, 0) + 5, 19)
+
+        worker_scheduling = scheduling.WorkerScheduling(cpu_affinity={cpu}, nice=nice)
+
+        assert len(worker_scheduling.apply(process.pid)) == 0
+        assert os.sched_getaffinity(process.pid) == {cpu}
+        assert os.getpriority(os.PRIO_PROCESS, process.pid) == nice
+
+    def test_default_changes_nothing(self, process: mp.Process) -> None:
+        """
+        Without settings the process keeps the scheduling of its parent.
+        """
+        assert process.pid is not None
+
+        assert len(scheduling.WorkerScheduling().apply(process.pid)) == 0
+        assert os.sched_getaffinity(process.pid) == os.sched_getaffinity(0)
+        assert os.sched_getscheduler(process.pid) == os.sched_getscheduler(0)
+
+    def test_failures_are_reported(self, process: mp.Process) -> None:
+        """
+        Each failing setting is reported and the others are still applied.
+        """
+        assert process.pid is not None
+        nice = min(os.getpriority(os.PRIO_PROCESS, 0) + 5, 19)
+
+        worker_scheduling = scheduling.WorkerScheduling(cpu_affinity={-1}, nice=nice)
+        errors = worker_scheduling.apply(process.pid)
+
+        assert len(errors) == 1
+        assert errors[0].startswith("CPU affinity")
+        assert os.getpriority(os.PRIO_PROCESS, process.pid) == nice
@@ -0,0 +1,209 @@
+"""
+Test the shared memory ring delivers every item once under concurrent producers and consumers,
+and keeps working after a worker dies mid-operation.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import time
+
+import pytest
+
+from utilities.workers import shared_memory_ring
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+RING_MAX_SIZE = 4
+SLOT_SIZE = 64  # bytes
+PRODUCER_COUNT = 3
+CONSUMER_COUNT = 3
+ITEMS_PER_PRODUCER = 2000
+BATCH_SIZE = 3
+JOIN_TIMEOUT = 30.0  # seconds
+SHORT_TIMEOUT = 0.1  # seconds
+
+
+def producer(ring: shared_memory_ring.SharedMemoryRing, producer_id: int) -> None:
+    """
+    Puts (producer_id, i) items, alternating single puts and batches.
+    """
+    i = 0
+    while i < ITEMS_PER_PRODUCER:
+        if i % 2 == 0:
+            ring.put((producer_id, i))
+            i += 1
+            continue
+
+        batch = [(producer_id, j) for j in range(i, min(i + BATCH_SIZE, ITEMS_PER_PRODUCER))]
+        i += ring.put_many(batch)
+
+
+def consumer(ring: shared_memory_ring.SharedMemoryRing, results: mp.Queue) -> None:
+    """
+    Gets items, alternating single gets and batches, until a sentinel.
+    Reports the items received.
+    """
+    received = []
+    while True:
+        items = [ring.get()] if len(received) % 2 == 0 else ring.get_many(BATCH_SIZE)
+        received.extend(item for item in items if item is not None)
+        if None in items:
+            # A batch can hold the sentinels of other consumers
+            for _ in range(items.count(None) - 1):
+                ring.put(None)
+            break
+
+    results.put(received)
+
+
+def stopper(ring: shared_memory_ring.SharedMemoryRing) -> None:
+    """
+    Puts a sentinel per consumer.
+    """
+    for _ in range(CONSUMER_COUNT):
+        ring.put(None)
+
+
+def die_after_claim(ring: shared_memory_ring.SharedMemoryRing, step: str) -> None:
+    """
+    Claims a slot for a put (step "write") or get (step "read") and exits right after,
+    like a worker killed mid-operation.
+    """
+
+    def exit_process(*_: object) -> None:
+        os._exit(0)
+
+    # Replaces the private step after the claim, only in this process
+    setattr(shared_memory_ring.SharedMemoryRing, f"_SharedMemoryRing__{step}", exit_process)
+    if step == "write":
+        ring.put(None)
+    else:
+        ring.get()
+
+
+def run_die_after_claim(ring: shared_memory_ring.SharedMemoryRing, step: str) -> None:
+    """
+    Runs `die_after_claim()` in another process until it exits.
+    """
+    worker = mp.Process(target=die_after_claim, args=(ring, step))
+    worker.start()
+    worker.join(JOIN_TIMEOUT)
+
+
+@pytest.fixture
+def ring() -> shared_memory_ring.SharedMemoryRing:  # type: ignore
+    """
+    Small ring, so that producers and consumers wrap around it often.
+    """
+    ring_instance = shared_memory_ring.SharedMemoryRing(RING_MAX_SIZE, SLOT_SIZE)
+    yield ring_instance  # type: ignore
+    ring_instance.unlink()
+
+
+class TestSharedMemoryRing:
+    """
+    Order, limits and concurrent use.
+    """
+
+    def test_fifo(self, ring: shared_memory_ring.SharedMemoryRing) -> None:
+        """
+        Items come out in order, a full ring refuses puts and an empty one refuses gets.
+        """
+        assert ring.put_many([0, 1, 2]) == 3
+        ring.put(3)
+        assert ring.full()
+        with pytest.raises(queue.Full):
+            ring.put(4, False)
+        assert ring.put_many([4, 5], timeout=0.0) == 0
+
+        assert ring.get() == 0
+        assert ring.get_many() == [1, 2, 3]
+        assert ring.empty()
+        with pytest.raises(queue.Empty):
+            ring.get(False)
+
+        with pytest.raises(ValueError):
+            ring.put(bytes(SLOT_SIZE))
+
+    def test_multiple_producers_and_consumers(
+        self, ring: shared_memory_ring.SharedMemoryRing
+    ) -> None:
+        """
+        Every item is received exactly once.
+        """
+        results = mp.Queue()
+        producers = [
+            mp.Process(target=producer, args=(ring, producer_id))
+            for producer_id in range(PRODUCER_COUNT)
+        ]
+        consumers = [
+            mp.Process(target=consumer, args=(ring, results)) for _ in range(CONSUMER_COUNT)
+        ]
+        for worker in consumers + producers:
+            worker.start()
+
+        for worker in producers:
+            worker.join(JOIN_TIMEOUT)
+
+        # Ring operations have no timeout once claimed, only wait on the workers here
+        stopper_process = mp.Process(target=stopper, args=(ring,))
+        stopper_process.start()
+
+        received = []
+        try:
+            for _ in range(CONSUMER_COUNT):
+                received += results.get(timeout=JOIN_TIMEOUT)
+        except queue.Empty:
+            pass
+
+        workers = producers + consumers + [stopper_process]
+        for worker in workers:
+            worker.join(JOIN_TIMEOUT)
+
+        hung = [worker for worker in workers if worker.is_alive()]
+        for worker in hung:
+            worker.kill()
+        assert len(hung) == 0
+
+        expected = [
+            (producer_id, i)
+            for producer_id in range(PRODUCER_COUNT)
+            for i in range(ITEMS_PER_PRODUCER)
+        ]
+        assert sorted(received) == expected
+
+    def test_dead_writer(self, ring: shared_memory_ring.SharedMemoryRing) -> None:
+        """
+        A slot claimed by a writer that died is skipped instead of waited on forever.
+        """
+        run_die_after_claim(ring, "write")
+        ring.put(0)
+
+        start_time = time.monotonic()
+        assert ring.get(timeout=SHORT_TIMEOUT) == 0
+        assert time.monotonic() - start_time < JOIN_TIMEOUT
+
+        # The skipped slot is free again, every other slot still works
+        for lap in range(2):
+            assert ring.put_many(list(range(RING_MAX_SIZE)), timeout=SHORT_TIMEOUT) == RING_MAX_SIZE
+            assert ring.get_many() == list(range(RING_MAX_SIZE)), lap
+
+    def test_dead_reader(self, ring: shared_memory_ring.SharedMemoryRing) -> None:
+        """
+        A slot claimed by a reader that died is taken over by the writer one lap ahead.
+        """
+        assert ring.put_many(list(range(RING_MAX_SIZE))) == RING_MAX_SIZE
+        run_die_after_claim(ring, "read")
+
+        # The item the reader took is lost
+        assert ring.get_many() == list(range(1, RING_MAX_SIZE))
+
+        # Its slot is reused and counted as free again
+        for lap in range(2):
+            assert ring.put_many(list(range(RING_MAX_SIZE)), timeout=SHORT_TIMEOUT) == RING_MAX_SIZE
+            assert ring.get_many() == list(range(RING_MAX_SIZE)), lap
@@ -0,0 +1,83 @@
+"""
+Test the spare pool keeps started workers ready to replace others.
+"""
+
+import multiprocessing as mp
+
+from utilities.workers import process_start
+from utilities.workers import spare_pool
+from utilities.workers import worker_controller
+
+
+SPARE_COUNT = 2
+JOIN_TIMEOUT = 5.0  # seconds
+
+
+def spare(activation: process_start.WorkerActivation) -> None:
+    """
+    Waits for activation, exits at once.
+    """
+    activation.wait()
+
+
+def create_spare() -> spare_pool.SpareWorker:
+    """
+    Unstarted spare worker.
+    """
+    activation = process_start.WorkerActivation()
+    return spare_pool.SpareWorker(
+        mp.Process(target=spare, args=(activation,)),
+        worker_controller.WorkerController(),
+        activation,
+    )
+
+
+class TestSparePool:
+    """
+    Replenishing, taking and cancelling spares.
+    """
+
+    def test_take_and_cancel(self) -> None:
+        """
+        Taken spares are running, cancelled spares exit without running.
+        """
+        pool = spare_pool.SparePool(SPARE_COUNT, create_spare)
+        assert pool.replenish()
+
+        spare_worker = pool.take()
+        assert spare_worker is not None
+        assert spare_worker.worker.is_alive()
+        spare_worker.activation.activate(0)
+        spare_worker.worker.join(JOIN_TIMEOUT)
+
+        assert pool.replenish()
+        remaining_workers = []
+        for _ in range(SPARE_COUNT):
+            remaining_worker = pool.take()
+            assert remaining_worker is not None
+            remaining_workers.append(remaining_worker)
+
+        assert pool.take() is None
+
+        for remaining_worker in remaining_workers:
+            remaining_worker.activation.cancel()
+            remaining_worker.worker.join(JOIN_TIMEOUT)
+            assert remaining_worker.worker.exitcode == 0
+
+    def test_cancel_and_join(self) -> None:
+        """
+        Spares still in the pool exit when cancelled and are forgotten.
+        """
+        pool = spare_pool.SparePool(SPARE_COUNT, create_spare)
+        assert pool.replenish()
+
+        pool.cancel()
+        pool.join(JOIN_TIMEOUT)
+        assert pool.take() is None
+
+    def test_creation_fails(self) -> None:
+        """
+        A spare that cannot be created is reported.
+        """
+        pool = spare_pool.SparePool(SPARE_COUNT, lambda: None)
+        assert not pool.replenish()
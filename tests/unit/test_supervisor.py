@@ -0,0 +1,158 @@
+"""
+Test the restart supervisor backs off and breaks crash loops.
+"""
+
+import time
+
+import pytest
+
+from utilities.workers import supervisor
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+INITIAL_BACKOFF = 0.01  # seconds
+
+
+@pytest.fixture
+def restart_supervisor() -> supervisor.RestartSupervisor:
+    """
+    Supervisor of 1 worker without jitter.
+    """
+    return supervisor.RestartSupervisor(
+        1,
+        initial_backoff=INITIAL_BACKOFF,
+        max_backoff=INITIAL_BACKOFF * 4,
+        jitter=0.0,
+        crash_loop_restarts=4,
+    )
+
+
+def crash(restart_supervisor: supervisor.RestartSupervisor) -> float:
+    """
+    Records a crash and restarts as soon as allowed.
+
+    Returns the backoff in seconds.
+    """
+    restart_supervisor.record_exit(0, 1)
+    state = restart_supervisor.get_states()[0]
+    if state.next_restart_time is None:
+        return 0.0
+
+    backoff = state.next_restart_time - time.monotonic()
+    while not restart_supervisor.is_restart_due(0):
+        time.sleep(0.001)
+
+    restart_supervisor.record_start(0, True)
+
+    return backoff
+
+
+class ExitedWorker:
+    """
+    Worker that is running while its exit code is None.
+    """
+
+    def __init__(self, exitcode: int | None) -> None:
+        self.exitcode = exitcode
+
+    def is_alive(self) -> bool:
+        """
+        Returns whether the worker is running.
+        """
+        return self.exitcode is None
+
+
+class TestRestartSupervisor:
+    """
+    Restart decisions.
+    """
+
+    def test_exponential_backoff(self, restart_supervisor: supervisor.RestartSupervisor) -> None:
+        """
+        Consecutive crashes double the backoff up to the maximum.
+        """
+        restart_supervisor.record_start(0, False)
+        assert not restart_supervisor.is_restart_due(0)
+
+        backoffs = [crash(restart_supervisor) for _ in range(4)]
+
+        expected = [INITIAL_BACKOFF, INITIAL_BACKOFF * 2, INITIAL_BACKOFF * 4, INITIAL_BACKOFF * 4]
+        assert backoffs == pytest.approx(expected, abs=0.005)
+        assert restart_supervisor.get_states()[0].restart_count == 4
+
+    def test_crash_loop(self, restart_supervisor: supervisor.RestartSupervisor) -> None:
+        """
+        Restarting stops after too many restarts within the window, until a deliberate start.
+        """
+        restart_supervisor.record_start(0, False)
+        for _ in range(4):
+            crash(restart_supervisor)
+
+        restart_supervisor.record_exit(0, 1)
+        state = restart_supervisor.get_states()[0]
+        assert state.is_crash_looping
+        assert not restart_supervisor.is_restart_due(0)
+
+        restart_supervisor.record_start(0, False)
+        assert not state.is_crash_looping
+        assert state.get_uptime() >= 0.0
+
+    @pytest.mark.parametrize(
+        "policy, exit_code, is_restarted",
+        [
+            (supervisor.RestartPolicy.ALWAYS, 0, True),
+            (supervisor.RestartPolicy.ON_FAILURE, 0, False),
+            (supervisor.RestartPolicy.ON_FAILURE, -9, True),
+            (supervisor.RestartPolicy.NEVER, 1, False),
+        ],
+    )
+    def test_policy(
+        self, policy: supervisor.RestartPolicy, exit_code: int, is_restarted: bool
+    ) -> None:
+        """
+        The policy decides which exits are restarted.
+        """
+        restart_supervisor = supervisor.RestartSupervisor(1, policy, initial_backoff=0.0)
+        restart_supervisor.record_start(0, False)
+        restart_supervisor.record_exit(0, exit_code)
+
+        assert restart_supervisor.is_restart_due(0) == is_restarted
+        assert restart_supervisor.get_states()[0].is_stopped != is_restarted
+
+    def test_resize(self) -> None:
+        """
+        Removed slots are forgotten, added slots start fresh.
+        """
+        restart_supervisor = supervisor.RestartSupervisor(2)
+        restart_supervisor.record_start(1, False)
+        restart_supervisor.record_start(1, True)
+
+        restart_supervisor.resize(1)
+        restart_supervisor.resize(3)
+
+        states = restart_supervisor.get_states()
+        assert [state.slot for state in states] == [0, 1, 2]
+        assert states[1].restart_count == 0
+        assert states[1].start_time is None
+
+    def test_check_workers(self) -> None:
+        """
+        Each exit of a started worker is recorded once, its restart is due until done.
+        """
+        restart_supervisor = supervisor.RestartSupervisor(3, initial_backoff=0.0, jitter=0.0)
+        restart_supervisor.record_start(0, False)
+        restart_supervisor.record_start(1, False)
+        # Slot 2 was never started
+        workers = [ExitedWorker(None), ExitedWorker(1), ExitedWorker(1)]
+
+        assert restart_supervisor.check_workers(workers) == ([1], [1])
+        assert restart_supervisor.check_workers(workers) == ([], [1])
+
+        restart_supervisor.record_start(1, True)
+        workers[1] = ExitedWorker(None)
+        assert restart_supervisor.check_workers(workers) == ([], [])
+        assert not restart_supervisor.is_crash_looping()
@@ -0,0 +1,96 @@
+"""
+Test attitude and position are estimated at common timestamps.
+"""
+
+import math
+
+import numpy as np
+import pytest
+from pymavlink import mavutil
+
+from modules.telemetry import telemetry_alignment
+
+
+WINDOW = 1000  # ms
+
+
+def attitude(
+    time_boot_ms: int, roll: float = 0.0, yaw: float = 0.0, yaw_speed: float = 0.0
+) -> mavutil.mavlink.MAVLink_attitude_message:
+    """
+    ATTITUDE message.
+    """
+    return mavutil.mavlink.MAVLink_attitude_message(
+        time_boot_ms, roll, 0.0, yaw, 0.0, 0.0, yaw_speed
+    )
+
+
+def position(time_boot_ms: int, x: float) -> mavutil.mavlink.MAVLink_local_position_ned_message:
+    """
+    LOCAL_POSITION_NED message.
+    """
+    return mavutil.mavlink.MAVLink_local_position_ned_message(
+        time_boot_ms, x, 0.0, -10.0, 1.0, 0.0, 0.0
+    )
+
+
+class TestTelemetryAligner:
+    """
+    Interpolation and which timestamps are estimated.
+    """
+
+    def test_position_interpolation(self) -> None:
+        """
+        Position is interpolated linearly at the timestamps of attitude.
+        """
+        aligner = telemetry_alignment.TelemetryAligner(WINDOW)
+        aligner.add_position(position(0, 0.0))
+        aligner.add_position(position(100, 10.0))
+        for time_boot_ms in range(0, 101, 20):
+            aligner.add_attitude(attitude(time_boot_ms, yaw_speed=time_boot_ms / 100.0))
+
+        times, positions, attitudes = aligner.align()
+
+        assert list(times) == [0, 20, 40, 60, 80, 100]
+        np.testing.assert_allclose(positions[:, 0], times / 10.0)
+        np.testing.assert_allclose(positions[:, 2], -10.0)
+        np.testing.assert_allclose(attitudes[:, 5], times / 100.0)
+
+    def test_attitude_interpolation(self) -> None:
+        """
+        Attitude is interpolated along the shorter rotation, across the yaw wrap-around.
+        """
+        aligner = telemetry_alignment.TelemetryAligner(WINDOW)
+        aligner.add_attitude(attitude(0, roll=0.5, yaw=3.0))
+        aligner.add_attitude(attitude(100, roll=0.5, yaw=-3.0))
+        aligner.add_position(position(0, 0.0))
+        aligner.add_position(position(50, 0.0))
+        aligner.add_position(position(100, 0.0))
+
+        times, _, attitudes = aligner.align()
+
+        assert list(times) == [0, 50, 100]
+        assert abs(attitudes[1, 2]) == pytest.approx(math.pi)
+        np.testing.assert_allclose(attitudes[:, 0], 0.5)
+        np.testing.assert_allclose(attitudes[[0, 2], 2], [3.0, -3.0])
+
+    def test_covered_timestamps_once(self) -> None:
+        """
+        Timestamps are estimated once both streams reach them, and only once.
+        """
+        aligner = telemetry_alignment.TelemetryAligner(WINDOW)
+        aligner.add_position(position(0, 0.0))
+        aligner.add_attitude(attitude(0))
+        aligner.add_attitude(attitude(20))
+        aligner.add_attitude(attitude(40))
+
+        times, _, _ = aligner.align()
+        assert list(times) == [0]
+
+        times, _, _ = aligner.align()
+        assert len(times) == 0
+
+        aligner.add_position(position(30, 3.0))
+        times, positions, _ = aligner.align()
+        assert list(times) == [20, 30]
+        np.testing.assert_allclose(positions[:, 0], [2.0, 3.0])
@@ -0,0 +1,103 @@
+"""
+Test the packed layout of telemetry data and its batches.
+"""
+
+import math
+import pickle
+
+import numpy as np
+import pytest
+
+# Telemetry imports the logger of the common submodule
+telemetry = pytest.importorskip("modules.telemetry.telemetry")
+telemetry_batch = pytest.importorskip("modules.telemetry.telemetry_batch")
+
+
+def create_telemetry_data(time_since_boot: int) -> "telemetry.TelemetryData":
+    """
+    Telemetry data with a missing attitude.
+    """
+    return telemetry.TelemetryData(
+        time_since_boot=time_since_boot,
+        x=1.5,
+        y=-2.25,
+        z=30.0,
+        x_velocity=0.1,
+        y_velocity=0.2,
+        z_velocity=0.3,
+        position_age=0,
+    )
+
+
+def assert_same_fields(
+    actual: "telemetry.TelemetryData", expected: "telemetry.TelemetryData"
+) -> None:
+    """
+    Compares every field.
+    """
+    for name, _ in telemetry.TELEMETRY_FIELD_FORMATS:
+        assert getattr(actual, name) == getattr(expected, name), name
+
+
+class TestTelemetryData:
+    """
+    Packing, pickling and batches.
+    """
+
+    def test_pack(self) -> None:
+        """
+        Packing keeps values and None fields, at any offset of a buffer.
+        """
+        telemetry_data = create_telemetry_data(1000)
+
+        packed = telemetry_data.to_bytes()
+        assert len(packed) == telemetry.TELEMETRY_SIZE
+
+        buffer = bytearray(3 + telemetry.TELEMETRY_SIZE)
+        telemetry_data.pack_into(buffer, 3)
+        assert buffer[3:] == packed
+
+        unpacked = telemetry.TelemetryData.from_buffer(memoryview(buffer), 3)
+        assert_same_fields(unpacked, telemetry_data)
+        assert unpacked.roll is None
+        assert unpacked.attitude_age is None
+
+    def test_pickle(self) -> None:
+        """
+        Pickles as the packed layout.
+        """
+        telemetry_data = create_telemetry_data(1000)
+
+        pickled = pickle.dumps(telemetry_data, pickle.HIGHEST_PROTOCOL)
+
+        assert len(pickled) < telemetry.TELEMETRY_SIZE + 80
+        assert_same_fields(pickle.loads(pickled), telemetry_data)
+
+    def test_batch(self) -> None:
+        """
+        Batches have a column per field and convert back to the same samples.
+        """
+        samples = [create_telemetry_data(i * 100) for i in range(5)]
+
+        batch = telemetry_batch.TelemetryBatch.from_telemetry(samples)
+
+        assert telemetry_batch.TELEMETRY_DTYPE.itemsize == telemetry.TELEMETRY_SIZE
+        assert len(batch) == 5
+        assert list(batch["time_since_boot"]) == [0, 100, 200, 300, 400]
+        assert np.all(batch["x"] == 1.5)
+        assert all(math.isnan(roll) for roll in batch["roll"])
+        for actual, expected in zip(batch.to_telemetry(), samples):
+            assert_same_fields(actual, expected)
+
+    def test_batch_from_buffer(self) -> None:
+        """
+        A batch wraps packed samples without copying them.
+        """
+        buffer = bytearray(2 * telemetry.TELEMETRY_SIZE)
+        create_telemetry_data(100).pack_into(buffer, 0)
+        create_telemetry_data(200).pack_into(buffer, telemetry.TELEMETRY_SIZE)
+
+        batch = telemetry_batch.TelemetryBatch.from_buffer(buffer)
+        create_telemetry_data(300).pack_into(buffer, telemetry.TELEMETRY_SIZE)
+
+        assert list(batch["time_since_boot"]) == [100, 300]
@@ -0,0 +1,127 @@
+"""
+Test the shared memory ring of recent telemetry data.
+"""
+
+import math
+import pickle
+
+import pytest
+
+# Telemetry imports the logger of the common submodule
+telemetry = pytest.importorskip("modules.telemetry.telemetry")
+telemetry_history = pytest.importorskip("modules.telemetry.telemetry_history")
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+CAPACITY = 8
+
+
+@pytest.fixture
+def history() -> telemetry_history.TelemetryHistory:  # type: ignore
+    """
+    History of CAPACITY samples.
+    """
+    telemetry_history_instance = telemetry_history.TelemetryHistory(CAPACITY)
+    yield telemetry_history_instance  # type: ignore
+    telemetry_history_instance.unlink()
+
+
+def append_samples(history: "telemetry_history.TelemetryHistory", count: int) -> None:
+    """
+    Samples every 100 ms with x counting up, roll present every other sample.
+    """
+    for i in range(count):
+        history.append(
+            telemetry.TelemetryData(
+                time_since_boot=i * 100, x=float(i), roll=0.5 if i % 2 == 0 else None
+            )
+        )
+
+
+class TestTelemetryHistory:
+    """
+    Appending, queries and read-only copies.
+    """
+
+    def test_wrap_around(self, history: "telemetry_history.TelemetryHistory") -> None:
+        """
+        Keeps the newest CAPACITY samples, oldest first.
+        """
+        append_samples(history, 3)
+        start, batch = history.snapshot()
+        assert start == 0
+        assert list(batch["x"]) == [0.0, 1.0, 2.0]
+
+        append_samples(history, 20)
+        start, batch = history.snapshot()
+        assert len(history) == CAPACITY
+        assert start == 3 + 20 - CAPACITY
+        assert list(batch["x"]) == [float(i) for i in range(20 - CAPACITY, 20)]
+
+    def test_window_statistics(self, history: "telemetry_history.TelemetryHistory") -> None:
+        """
+        Statistics cover the last seconds and leave out absent values.
+        """
+        append_samples(history, 6)
+
+        assert list(history.get_last(0.2)["x"]) == [3.0, 4.0, 5.0]
+
+        statistics = history.get_statistics("x", 0.2)
+        assert statistics.count == 3
+        assert statistics.mean == pytest.approx(4.0)
+        assert statistics.variance == pytest.approx(2.0 / 3.0)
+        assert (statistics.minimum, statistics.maximum) == (3.0, 5.0)
+
+        assert history.get_statistics("roll", 0.2).count == 1
+        assert math.isnan(history.get_statistics("yaw", 0.2).mean)
+        with pytest.raises(ValueError):
+            history.get_statistics("altitude", 0.2)
+
+    def test_window_across_wrap(self, history: "telemetry_history.TelemetryHistory") -> None:
+        """
+        Windows and nearest samples are found where the ring wraps.
+        """
+        append_samples(history, CAPACITY + 4)
+
+        assert list(history.get_last(0.25)["x"]) == [9.0, 10.0, 11.0]
+        assert list(history.get_last(0.55)["x"]) == [float(i) for i in range(6, 12)]
+        assert list(history.get_last(10.0)["x"]) == [float(i) for i in range(4, 12)]
+        assert history.find_nearest(749) == 7
+        assert history.find_nearest(751) == 8
+
+    def test_find_nearest(self, history: "telemetry_history.TelemetryHistory") -> None:
+        """
+        Finds the closest sample by time, positions stay valid until overwritten.
+        """
+        assert history.find_nearest(0) is None
+
+        append_samples(history, 10)
+
+        assert history.find_nearest(449) == 4
+        assert history.find_nearest(450) == 4
+        assert history.find_nearest(451) == 5
+        assert history.find_nearest(-1000) == 10 - CAPACITY
+        assert history.find_nearest(5000) == 9
+        assert history.get_sample(5).x == 5.0
+        assert history.get_sample(0) is None
+        assert history.get_sample(10) is None
+
+    def test_read_only_copy(self, history: "telemetry_history.TelemetryHistory") -> None:
+        """
+        Pickled copies see appends of the creator and cannot append.
+        """
+        copy = pickle.loads(pickle.dumps(history))
+        assert copy.is_read_only()
+        assert not history.is_read_only()
+
+        append_samples(history, 2)
+        assert list(copy.get_last(1.0)["x"]) == [0.0, 1.0]
+
+        with pytest.raises(ValueError):
+            copy.append(telemetry.TelemetryData(time_since_boot=300))
+
+        copy.close()
@@ -0,0 +1,175 @@
+"""
+Test the watchdog tells hung workers from live ones.
+"""
+
+import multiprocessing as mp
+import threading
+import time
+
+from utilities.workers import execution_mode
+from utilities.workers import mailbox
+from utilities.workers import watchdog
+from utilities.workers import worker_controller
+
+
+STALL_DEADLINE = 0.2  # seconds
+INPUT_WAIT_SLICE = 0.02  # seconds
+
+
+def live_worker(
+    controller: worker_controller.WorkerController, worker_watchdog: watchdog.Watchdog, slot: int
+) -> None:
+    """
+    Checks its controller every loop until exit.
+    """
+    controller.attach_watchdog(worker_watchdog, slot)
+    while not controller.is_exit_requested():
+        controller.check_pause()
+        time.sleep(0.01)
+
+
+def hung_worker(
+    controller: worker_controller.WorkerController, worker_watchdog: watchdog.Watchdog, slot: int
+) -> None:
+    """
+    Checks its controller once, then blocks forever.
+    """
+    controller.attach_watchdog(worker_watchdog, slot)
+    _ = controller.is_exit_requested()
+    mp.Event().wait()
+
+
+def idle_worker(
+    controller: worker_controller.WorkerController,
+    worker_watchdog: watchdog.Watchdog,
+    slot: int,
+    input_mailbox: mailbox.Mailbox,
+) -> None:
+    """
+    Waits for input in slices shorter than the deadline until the sentinel.
+    """
+    controller.attach_watchdog(worker_watchdog, slot)
+    while not controller.is_exit_requested():
+        if input_mailbox.get_many(timeout=INPUT_WAIT_SLICE) == [None]:
+            break
+
+
+class TestWatchdog:
+    """
+    Stall detection through controller checks.
+    """
+
+    def test_hung_worker_is_stalled(self) -> None:
+        """
+        Only the worker that stopped checking its controller misses the deadline.
+        """
+        controller = worker_controller.WorkerController()
+        worker_watchdog = watchdog.Watchdog(2, STALL_DEADLINE)
+        workers = [
+            mp.Process(target=live_worker, args=(controller, worker_watchdog, 0)),
+            mp.Process(target=hung_worker, args=(controller, worker_watchdog, 1)),
+        ]
+        for worker in workers:
+            worker.start()
+
+        time.sleep(STALL_DEADLINE * 2)
+
+        assert not worker_watchdog.is_stalled(0)
+        assert worker_watchdog.is_stalled(1)
+        stall_times = worker_watchdog.get_stall_times()
+        assert stall_times[0] < STALL_DEADLINE < stall_times[1]
+
+        controller.request_exit()
+        workers[0].join(1.0)
+        workers[1].kill()
+        workers[1].join()
+
+    def test_paused_worker_is_not_stalled(self) -> None:
+        """
+        A worker waiting in check pause still beats.
+        """
+        controller = worker_controller.WorkerController()
+        worker_watchdog = watchdog.Watchdog(1, STALL_DEADLINE)
+        controller.request_pause()
+        worker = mp.Process(target=live_worker, args=(controller, worker_watchdog, 0))
+        worker.start()
+
+        time.sleep(STALL_DEADLINE * 2)
+
+        assert not worker_watchdog.is_stalled(0)
+
+        controller.request_exit()
+        worker.join(1.0)
+        assert not worker.is_alive()
+
+    def test_idle_worker_is_not_stalled(self) -> None:
+        """
+        A worker waiting for input with a timeout still beats, puts never wait for it.
+        """
+        controller = worker_controller.WorkerController()
+        worker_watchdog = watchdog.Watchdog(1, STALL_DEADLINE)
+        input_mailbox = mailbox.Mailbox()
+        worker = mp.Process(
+            target=idle_worker, args=(controller, worker_watchdog, 0, input_mailbox)
+        )
+        worker.start()
+
+        time.sleep(STALL_DEADLINE * 2)
+
+        assert not worker_watchdog.is_stalled(0)
+
+        input_mailbox.close()
+        worker.join(1.0)
+        assert not worker.is_alive()
+        input_mailbox.unlink()
+
+    def test_stall_stats(self) -> None:
+        """
+        Stalls are summarized.
+        """
+        stats = watchdog.StallStats()
+        stats.record_stall(1.0)
+        stats.record_stall(3.0)
+
+        assert stats.stall_count == 2
+        assert stats.longest_stall_time == 3.0
+        assert stats.total_stall_time == 4.0
+
+
+class TestStallMonitor:
+    """
+    Which stalled workers are killed and which are only reported.
+    """
+
+    def test_check_workers(self) -> None:
+        """
+        Stalled processes are killed every check, stalled threads are reported once per stall.
+        """
+        controller = worker_controller.WorkerController()
+        worker_watchdog = watchdog.Watchdog(3, STALL_DEADLINE)
+        stall_monitor = watchdog.StallMonitor(worker_watchdog)
+        release = threading.Event()
+        workers = [
+            mp.Process(target=live_worker, args=(controller, worker_watchdog, 0)),
+            mp.Process(target=hung_worker, args=(controller, worker_watchdog, 1)),
+            execution_mode.ThreadWorker(release.wait, ()),
+        ]
+        for worker in workers:
+            worker.start()
+
+        time.sleep(STALL_DEADLINE * 2)
+
+        assert stall_monitor.check_workers(workers) == ([1], [2])
+        assert stall_monitor.check_workers(workers) == ([1], [])
+        assert stall_monitor.has_unkillable_stall()
+
+        release.set()
+        workers[2].join(1.0)
+        assert stall_monitor.check_workers(workers) == ([1], [])
+        assert not stall_monitor.has_unkillable_stall()
+        assert worker_watchdog.stats.stall_count == 4
+
+        controller.request_exit()
+        workers[0].join(1.0)
+        workers[1].kill()
+        workers[1].join()
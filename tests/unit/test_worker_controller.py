@@ -0,0 +1,214 @@
+"""
+Test the worker controller requests reach worker processes.
+"""
+
+import multiprocessing as mp
+import time
+
+from utilities.workers import worker_controller
+
+
+BLOCK_SETTLE_TIME = 0.2  # seconds
+MAX_WAKE_LATENCY = 0.1  # seconds
+
+
+def paused_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Blocks in check pause, then exits.
+    """
+    controller.check_pause()
+
+
+class TestWorkerController:
+    """
+    Exit and pause requests.
+    """
+
+    def test_exit(self) -> None:
+        """
+        Exit can be requested and cleared repeatedly.
+        """
+        controller = worker_controller.WorkerController()
+        assert not controller.is_exit_requested()
+
+        controller.request_exit()
+        controller.request_exit()
+        assert controller.is_exit_requested()
+
+        controller.clear_exit()
+        assert not controller.is_exit_requested()
+
+    def test_resume_wakes_paused_worker(self) -> None:
+        """
+        A paused worker blocks until resume.
+        """
+        controller = worker_controller.WorkerController()
+        controller.request_pause()
+        worker = mp.Process(target=paused_worker, args=(controller,))
+        worker.start()
+
+        time.sleep(BLOCK_SETTLE_TIME)
+        assert worker.is_alive()
+
+        controller.request_resume()
+        worker.join(MAX_WAKE_LATENCY)
+        assert not worker.is_alive()
+
+    def test_exit_wakes_paused_worker(self) -> None:
+        """
+        A paused worker continues once exit is requested so that it can shut down.
+        """
+        controller = worker_controller.WorkerController()
+        controller.request_pause()
+        worker = mp.Process(target=paused_worker, args=(controller,))
+        worker.start()
+
+        time.sleep(BLOCK_SETTLE_TIME)
+        assert worker.is_alive()
+
+        controller.request_exit()
+        worker.join(MAX_WAKE_LATENCY)
+        assert not worker.is_alive()
+
+
+def looping_worker(controller: worker_controller.WorkerController) -> None:
+    """
+    Loops until exit is requested.
+    """
+    while not controller.is_exit_requested():
+        time.sleep(0.001)
+
+
+class TestExitAcknowledgement:
+    """
+    Workers acknowledge exit requests.
+    """
+
+    def test_all_acknowledged(self) -> None:
+        """
+        Waiting ends as soon as every worker saw the request, for every request.
+        """
+        controller = worker_controller.WorkerController()
+        controller.add_workers(3)
+        assert not controller.wait_for_all_acknowledged(0.0)
+
+        for _ in range(2):
+            workers = [mp.Process(target=looping_worker, args=(controller,)) for _ in range(3)]
+            for worker in workers:
+                worker.start()
+
+            time.sleep(BLOCK_SETTLE_TIME)
+
+            start_time = time.perf_counter()
+            controller.request_exit()
+            assert controller.wait_for_all_acknowledged(1.0)
+            assert time.perf_counter() - start_time < MAX_WAKE_LATENCY
+            assert controller.get_acknowledged_count() == 3
+
+            for worker in workers:
+                worker.join()
+
+            controller.clear_exit()
+
+    def test_missing_acknowledgement(self) -> None:
+        """
+        Waiting times out if a registered worker never acknowledges.
+        """
+        controller = worker_controller.WorkerController()
+        controller.add_workers(1)
+        controller.request_exit()
+
+        # Main does not acknowledge
+        assert controller.is_exit_requested()
+        assert not controller.wait_for_all_acknowledged(0.05)
+        assert controller.get_acknowledged_count() == 0
+
+
+class TestHierarchy:
+    """
+    Child controllers inherit requests from their ancestors.
+    """
+
+    def test_inherited_exit(self) -> None:
+        """
+        Exit of the root reaches every child, exit of a child only that child.
+        """
+        root = worker_controller.WorkerController()
+        first = root.create_child()
+        second = root.create_child()
+
+        first.request_exit()
+        assert first.is_exit_requested()
+        assert not second.is_exit_requested()
+        assert not root.is_exit_requested()
+
+        first.clear_exit()
+        root.request_exit()
+        assert first.is_exit_requested()
+        assert second.is_exit_requested()
+
+        root.clear_exit()
+        assert not first.is_exit_requested()
+
+    def test_pause_child_only(self) -> None:
+        """
+        Pausing a child blocks only its workers, resuming the parent does not resume it.
+        """
+        root = worker_controller.WorkerController()
+        paused = root.create_child()
+        running = root.create_child()
+
+        paused.request_pause()
+        root.request_resume()
+        paused_worker_process = mp.Process(target=paused_worker, args=(paused,))
+        running_worker_process = mp.Process(target=paused_worker, args=(running,))
+        paused_worker_process.start()
+        running_worker_process.start()
+
+        running_worker_process.join(1.0)
+        time.sleep(BLOCK_SETTLE_TIME)
+        assert not running_worker_process.is_alive()
+        assert paused_worker_process.is_alive()
+
+        paused.request_resume()
+        paused_worker_process.join(MAX_WAKE_LATENCY)
+        assert not paused_worker_process.is_alive()
+
+    def test_parent_pause_wakes_on_parent_resume(self) -> None:
+        """
+        A worker paused through an ancestor continues when the ancestor resumes.
+        """
+        root = worker_controller.WorkerController()
+        child = root.create_child().create_child()
+
+        root.request_pause()
+        worker = mp.Process(target=paused_worker, args=(child,))
+        worker.start()
+
+        time.sleep(BLOCK_SETTLE_TIME)
+        assert worker.is_alive()
+
+        root.request_resume()
+        worker.join(MAX_WAKE_LATENCY)
+        assert not worker.is_alive()
+
+    def test_root_counts_child_acknowledgements(self) -> None:
+        """
+        Workers of children acknowledge the root's exit request.
+        """
+        root = worker_controller.WorkerController()
+        children = [root.create_child() for _ in range(2)]
+        for child in children:
+            child.add_workers(1)
+
+        workers = [mp.Process(target=looping_worker, args=(child,)) for child in children]
+        for worker in workers:
+            worker.start()
+
+        time.sleep(BLOCK_SETTLE_TIME)
+        root.request_exit()
+        assert root.wait_for_all_acknowledged(1.0)
+        assert root.get_acknowledged_count() == 2
+
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,189 @@
+"""
+Test worker properties validation and autoscaling of the worker manager.
+"""
+
+import time
+
+import pytest
+
+from utilities.workers import autoscaler
+from utilities.workers import execution_mode
+from utilities.workers import mailbox
+from utilities.workers import queue_proxy_wrapper
+from utilities.workers import scheduling
+from utilities.workers import worker_controller
+
+# Worker manager imports the logger of the common submodule
+logger = pytest.importorskip("modules.common.modules.logger.logger")
+worker_manager = pytest.importorskip("utilities.workers.worker_manager")
+
+
+# Test functions use test fixture signature names
+# No enable
+# pylint: disable=redefined-outer-name
+
+
+QUEUE_MAX_SIZE = 4
+INPUT_WAIT_SLICE = 0.02  # seconds
+RETIRE_TIMEOUT = 5.0  # seconds
+JOIN_TIMEOUT = 5.0  # seconds
+
+
+def idle_worker(
+    input_queue: queue_proxy_wrapper.QueueProxyWrapper,
+    controller: worker_controller.WorkerController,
+) -> None:
+    """
+    Waits for input in slices until exit or the sentinel.
+    """
+    while not controller.is_exit_requested():
+        if None in input_queue.get_many(timeout=INPUT_WAIT_SLICE):
+            break
+
+
+@pytest.fixture(scope="module")
+def mp_manager() -> queue_proxy_wrapper.QueueManager:  # type: ignore
+    """
+    Manager for the input queues.
+    """
+    manager = queue_proxy_wrapper.QueueManager()
+    # Shut down explicitly after the tests
+    # pylint: disable-next=consider-using-with
+    manager.start()
+    yield manager  # type: ignore
+    manager.shutdown()
+
+
+@pytest.fixture(scope="module")
+def local_logger() -> "logger.Logger":
+    """
+    Logger for the worker managers.
+    """
+    result, logger_instance = logger.Logger.create("test_worker_manager", False)
+    assert result
+    assert logger_instance is not None
+    return logger_instance
+
+
+def create_manager(
+    count: int,
+    input_queue: "queue_proxy_wrapper.QueueProxyWrapper | mailbox.Mailbox",
+    controller: worker_controller.WorkerController,
+    local_logger: "logger.Logger",
+) -> "worker_manager.WorkerManager | None":
+    """
+    Idle workers scaled between 1 and count after every sample, None if rejected.
+    """
+    result, properties = worker_manager.WorkerProperties.create(
+        count=count,
+        target=idle_worker,
+        work_arguments=(),
+        input_queues=[input_queue],
+        output_queues=[],
+        controller=controller,
+        local_logger=local_logger,
+    )
+    assert result
+    assert properties is not None
+
+    result, manager = worker_manager.WorkerManager.create(
+        worker_properties=properties,
+        local_logger=local_logger,
+        worker_autoscaler=autoscaler.Autoscaler(1, count, sustained_samples=1, cooldown=0.0),
+    )
+    assert result == (manager is not None)
+    return manager
+
+
+class TestWorkerProperties:
+    """
+    Settings rejected by `WorkerProperties.create()`.
+    """
+
+    @pytest.mark.parametrize(
+        "worker_execution_mode",
+        [execution_mode.ExecutionMode.THREAD, execution_mode.ExecutionMode.ASYNCIO],
+    )
+    def test_scheduling_requires_process(
+        self,
+        local_logger: "logger.Logger",
+        worker_execution_mode: execution_mode.ExecutionMode,
+    ) -> None:
+        """
+        Scheduling cannot apply to workers running in main, so it is rejected, not dropped.
+        """
+        properties_arguments = {
+            "count": 1,
+            "target": idle_worker,
+            "work_arguments": (),
+            "input_queues": [],
+            "output_queues": [],
+            "controller": worker_controller.WorkerController(),
+            "local_logger": local_logger,
+        }
+
+        result, properties = worker_manager.WorkerProperties.create(
+            **properties_arguments,
+            worker_scheduling=scheduling.WorkerScheduling(nice=1),
+            worker_execution_mode=worker_execution_mode,
+        )
+        assert not result
+        assert properties is None
+
+        result, _ = worker_manager.WorkerProperties.create(
+            **properties_arguments, worker_execution_mode=worker_execution_mode
+        )
+        assert result
+
+        result, _ = worker_manager.WorkerProperties.create(
+            **properties_arguments, worker_scheduling=scheduling.WorkerScheduling(nice=1)
+        )
+        assert result
+
+
+class TestAutoscaling:
+    """
+    Scaling on the input queue statistics.
+    """
+
+    def test_input_without_stats(self, local_logger: "logger.Logger") -> None:
+        """
+        Autoscaling on a mailbox is rejected instead of never scaling.
+        """
+        input_mailbox = mailbox.Mailbox()
+
+        manager = create_manager(
+            2, input_mailbox, worker_controller.WorkerController(), local_logger
+        )
+        assert manager is None
+
+        input_mailbox.unlink()
+
+    def test_retired_worker_exits(
+        self, mp_manager: queue_proxy_wrapper.QueueManager, local_logger: "logger.Logger"
+    ) -> None:
+        """
+        An idle worker retired while waiting for input exits and is unregistered.
+        """
+        input_queue = queue_proxy_wrapper.QueueProxyWrapper(mp_manager, QUEUE_MAX_SIZE)
+        controller = worker_controller.WorkerController()
+        manager = create_manager(2, input_queue, controller, local_logger)
+        assert manager is not None
+        manager.start_workers()
+
+        # The first sample only records the statistics
+        assert manager.check_and_scale_workers() == 2
+        assert manager.check_and_scale_workers() == 1
+        assert input_queue.get_consumer_count() == 2
+
+        deadline = time.monotonic() + RETIRE_TIMEOUT
+        while input_queue.get_consumer_count() > 1 and time.monotonic() < deadline:
+            time.sleep(INPUT_WAIT_SLICE)
+            manager.check_and_scale_workers()
+
+        assert input_queue.get_consumer_count() == 1
+
+        controller.request_exit()
+        input_queue.close()
+        assert len(manager.join_workers(JOIN_TIMEOUT)) == 1
+        input_queue.unlink()
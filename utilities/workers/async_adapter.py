@@ -0,0 +1,141 @@
+"""
+asyncio adapters for queues and the worker controller.
+"""
+
+import asyncio
+import collections.abc
+import concurrent.futures
+import functools
+
+from . import queue_proxy_wrapper
+from . import worker_controller
+
+
+class AsyncQueueProxyWrapper:
+    """
+    Awaitable put/get on a `QueueProxyWrapper` (or anything with the same surface, like `Mailbox`).
+
+    Blocking calls run on a dedicated thread so the event loop stays free and the default
+    executor is not starved. A cancelled get does not lose its item: the underlying get keeps
+    running and the next get returns its result. Blocked gets return the sentinel (None) once
+    the queue is closed, so close queues before stopping the event loop.
+    """
+
+    def __init__(self, wrapped_queue: queue_proxy_wrapper.QueueProxyWrapper) -> None:
+        """
+        wrapped_queue: Queue to adapt.
+        """
+        self.queue = wrapped_queue
+        self.__get_executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.__put_executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.__pending_get: "asyncio.Future | None" = None
+
+    async def __await_pending_get(self, function: collections.abc.Callable[[], object]) -> object:
+        """
+        Starts function unless a previous get is still pending, then waits for the result.
+        """
+        if self.__pending_get is None:
+            loop = asyncio.get_running_loop()
+            self.__pending_get = loop.run_in_executor(self.__get_executor, function)
+
+        # Shielded so that cancelling this call leaves the get pending for the next call
+        result = await asyncio.shield(self.__pending_get)
+        self.__pending_get = None
+
+        return result
+
+    async def get(self) -> object:
+        """
+        Waits for an item.
+        """
+        return await self.__await_pending_get(self.queue.get)
+
+    async def get_many(self, max_items: int = 0) -> "list":
+        """
+        Waits for at least 1 item, then gets everything available.
+
+        max_items: Maximum number of items to get, `max_items <= 0` means no limit.
+        """
+        return await self.__await_pending_get(functools.partial(self.queue.get_many, max_items))
+
+    async def put(self, item: object) -> bool:
+        """
+        Puts an item according to the queue's overflow policy.
+        If cancelled, the item may still be put.
+
+        Returns whether the item was put.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.__put_executor, functools.partial(self.queue.put, item)
+        )
+
+    def shutdown(self) -> None:
+        """
+        Releases the threads and abandons a pending get, which ends once the queue is closed.
+        """
+        if self.__pending_get is not None:
+            # Cancelled so that its result is not delivered to a closed event loop
+            self.__pending_get.cancel()
+            self.__pending_get = None
+
+        self.__get_executor.shutdown(wait=False, cancel_futures=True)
+        self.__put_executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncWorkerController:
+    """
+    Awaitable exit and pause on a `WorkerController`.
+    """
+
+    __POLL_INTERVAL = 0.05  # seconds
+
+    def __init__(self, controller: worker_controller.WorkerController) -> None:
+        """
+        controller: Controller to adapt.
+        """
+        self.controller = controller
+
+    async def __run(self, function: collections.abc.Callable[[], object]) -> object:
+        """
+        Runs the blocking function on the default executor.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, function)
+
+    async def request_exit(self) -> None:
+        """
+        Requests worker processes to exit.
+        """
+        await self.__run(self.controller.request_exit)
+
+    async def clear_exit(self) -> None:
+        """
+        Clears the exit request condition.
+        """
+        await self.__run(self.controller.clear_exit)
+
+    async def request_pause(self) -> None:
+        """
+        Requests worker processes to pause.
+        """
+        await self.__run(self.controller.request_pause)
+
+    async def request_resume(self) -> None:
+        """
+        Requests worker processes to resume.
+        """
+        await self.__run(self.controller.request_resume)
+
+    async def check_pause(self) -> None:
+        """
+        Waits while main has requested a pause, without blocking the event loop.
+        """
+        await self.__run(self.controller.check_pause)
+
+    async def wait_for_exit(self) -> None:
+        """
+        Waits until main has requested an exit.
+        """
+        while not self.controller.is_exit_requested():
+            await asyncio.sleep(self.__POLL_INTERVAL)
@@ -0,0 +1,185 @@
+"""
+Worker count decisions from input queue statistics.
+"""
+
+import time
+
+from . import execution_mode
+from . import queue_stats
+from . import worker_controller
+
+
+class Autoscaler:  # pylint: disable=too-many-instance-attributes
+    """
+    Scales a stage between min_workers and max_workers from its input queues.
+
+    Backlog: queued items per worker. A sustained backlog above scale_up_backlog adds
+    a worker. A sustained empty queue with workers idle (blocked in get) for at least
+    idle_fraction of the time removes a worker. Separate thresholds, the number of
+    consecutive samples and the cooldown after every change are the hysteresis.
+    """
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        scale_up_backlog: float = 2.0,
+        idle_fraction: float = 0.8,
+        sustained_samples: int = 3,
+        cooldown: float = 5.0,
+    ) -> None:
+        """
+        min_workers: Minimum number of workers, must be greater than 0 .
+        max_workers: Maximum number of workers, must be at least min_workers.
+        scale_up_backlog: Queued items per worker above which to scale up.
+        idle_fraction: Fraction of time workers wait for input above which to scale down.
+        sustained_samples: Consecutive samples that must agree before scaling.
+        cooldown: Time in seconds after scaling during which samples are ignored.
+        """
+        if not 0 < min_workers <= max_workers:
+            raise ValueError(
+                f"Autoscaler requires 0 < min_workers <= max_workers, "
+                f"got {min_workers} and {max_workers}"
+            )
+
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.__scale_up_backlog = scale_up_backlog
+        self.__idle_fraction = idle_fraction
+        self.__sustained_samples = sustained_samples
+        self.__cooldown = cooldown
+
+        self.__previous_stats: "list[queue_stats.QueueStatsSnapshot] | None" = None
+        self.__cooldown_end_time = 0.0
+        # Positive for consecutive scale up samples, negative for scale down
+        self.__streak = 0
+
+    def sample(self, input_stats: "list[queue_stats.QueueStatsSnapshot]", worker_count: int) -> int:
+        """
+        input_stats: Current statistics of each input queue, in the same order every call.
+        worker_count: Current number of workers.
+
+        Returns the change in workers: 1, -1 or 0 .
+        """
+        previous_stats = self.__previous_stats
+        self.__previous_stats = input_stats
+        if previous_stats is None or len(input_stats) == 0 or worker_count <= 0:
+            return 0
+
+        if time.monotonic() < self.__cooldown_end_time:
+            self.__streak = 0
+            return 0
+
+        backlog = max(stats.depth for stats in input_stats) / worker_count
+
+        # Workers of a stage wait for input in parallel, so blocked time adds up per worker
+        idle_fraction = 1.0
+        for stats, previous in zip(input_stats, previous_stats):
+            duration = stats.timestamp - previous.timestamp
+            if duration <= 0.0:
+                return 0
+
+            # A wait is only recorded once its get returns, without gets every worker waited
+            if stats.gets == previous.gets:
+                continue
+
+            blocked_time = stats.get_blocked_time - previous.get_blocked_time
+            idle_fraction = min(idle_fraction, blocked_time / (duration * worker_count))
+
+        if backlog > self.__scale_up_backlog and worker_count < self.max_workers:
+            self.__streak = max(self.__streak, 0) + 1
+        elif (
+            backlog == 0.0
+            and idle_fraction >= self.__idle_fraction
+            and worker_count > self.min_workers
+        ):
+            self.__streak = min(self.__streak, 0) - 1
+        else:
+            self.__streak = 0
+
+        if abs(self.__streak) < self.__sustained_samples:
+            return 0
+
+        change = 1 if self.__streak > 0 else -1
+        self.__streak = 0
+        self.__cooldown_end_time = time.monotonic() + self.__cooldown
+
+        return change
+
+
+class RetiringWorkers:
+    """
+    Scaled down workers finishing their current item, until they exit.
+
+    A retired worker exits when it next checks its controller, so workers must get their
+    input with a timeout and check their controller in between (see `command_worker`).
+    A worker blocked in a get without timeout never sees the request and is stuck.
+    """
+
+    def __init__(self, retire_timeout: float = 10.0) -> None:
+        """
+        retire_timeout: Time in seconds after which a worker still running is stuck.
+        """
+        self.__retire_timeout = retire_timeout
+        # With their controllers and the time (time.monotonic()) they were retired
+        self.__workers: (
+            "list[tuple[execution_mode.Worker, worker_controller.WorkerController, float]]"
+        ) = []
+        # Already reported as stuck
+        self.__stuck_worker_names: "set[str]" = set()
+
+    def __len__(self) -> int:
+        return len(self.__workers)
+
+    def add(
+        self, worker: execution_mode.Worker, controller: worker_controller.WorkerController
+    ) -> None:
+        """
+        Requests the worker to exit and tracks it until it does.
+        """
+        controller.request_exit()
+        self.__workers.append((worker, controller, time.monotonic()))
+
+    def get_workers(self) -> "list[execution_mode.Worker]":
+        """
+        Returns the workers still retiring.
+        """
+        return [worker for worker, _, _ in self.__workers]
+
+    def reap(self) -> "list[tuple[execution_mode.Worker, worker_controller.WorkerController]]":
+        """
+        Joins the workers that have exited and stops tracking them.
+
+        Returns the exited workers with their controllers.
+        """
+        exited_workers = []
+        retiring_workers = []
+        for worker, controller, retire_time in self.__workers:
+            if worker.is_alive():
+                retiring_workers.append((worker, controller, retire_time))
+                continue
+
+            worker.join()
+            self.__stuck_worker_names.discard(worker.name)
+            exited_workers.append((worker, controller))
+
+        self.__workers = retiring_workers
+
+        return exited_workers
+
+    def find_stuck(self) -> "list[tuple[execution_mode.Worker, float]]":
+        """
+        Returns the workers that became stuck since the previous call,
+        with their time in seconds since retiring.
+        """
+        stuck_workers = []
+        for worker, _, retire_time in self.__workers:
+            retiring_duration = time.monotonic() - retire_time
+            if (
+                retiring_duration > self.__retire_timeout
+                and worker.name not in self.__stuck_worker_names
+            ):
+                self.__stuck_worker_names.add(worker.name)
+                stuck_workers.append((worker, retiring_duration))
+
+        return stuck_workers
@@ -0,0 +1,386 @@
+"""
+Broadcast channel, every subscriber gets every item.
+"""
+
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import pickle
+import queue
+import struct
+import time
+
+
+class BroadcastStatsSnapshot:
+    """
+    Counters of a channel and its subscribers at a point in time.
+    """
+
+    def __init__(
+        self,
+        timestamp: float,  # s, time.monotonic()
+        writes: int,
+        subscribers: "dict[str, tuple[int, int, int]]",  # name: reads, lag, overruns
+    ) -> None:
+        self.timestamp = timestamp
+        self.writes = writes
+        self.subscribers = subscribers
+
+    def get_throughput(self, previous: "BroadcastStatsSnapshot") -> "tuple[float, float]":
+        """
+        previous: Older snapshot of the same channel.
+
+        Returns writes per second and reads per second of all subscribers since previous.
+        """
+        duration = self.timestamp - previous.timestamp
+        if duration <= 0.0:
+            return 0.0, 0.0
+
+        reads = sum(reads for reads, _, _ in self.subscribers.values())
+        previous_reads = sum(reads for reads, _, _ in previous.subscribers.values())
+        return (self.writes - previous.writes) / duration, (reads - previous_reads) / duration
+
+    def __str__(self) -> str:
+        subscribers = ", ".join(
+            f"{name}: reads: {reads}, lag: {lag}, overruns: {overruns}"
+            for name, (reads, lag, overruns) in self.subscribers.items()
+        )
+        return f"writes: {self.writes} ({subscribers})"
+
+
+class BroadcastChannel:  # pylint: disable=too-many-instance-attributes
+    """
+    Single ring in shared memory that every subscriber reads with its own cursor.
+
+    Producers write each item once, subscribers never steal items from each other.
+    Writers never wait for readers: a subscriber that falls more than maxsize items behind
+    skips the overwritten items, which are counted as overruns for that subscriber only.
+
+    Producers use the channel, consumers use a `Subscription` from `subscribe()`.
+    Both have the same put/get surface as `QueueProxyWrapper`.
+    """
+
+    __POSITION_FORMAT = "=Q"
+    __SLOT_HEADER_FORMAT = "=QI"  # sequence, payload length
+    __HEADER_SIZE = struct.calcsize(__POSITION_FORMAT)
+    __SLOT_HEADER_SIZE = struct.calcsize(__SLOT_HEADER_FORMAT)
+    __DEFAULT_SLOT_SIZE = 1024  # bytes
+    __DEFAULT_MAX_SUBSCRIBERS = 8
+
+    # Subscriber counters
+    __CURSOR = 0
+    __READS = 1
+    __OVERRUNS = 2
+    __FIELD_COUNT = 3
+
+    def __init__(
+        self,
+        maxsize: int,
+        slot_size: int = __DEFAULT_SLOT_SIZE,
+        max_subscribers: int = __DEFAULT_MAX_SUBSCRIBERS,
+    ) -> None:
+        """
+        maxsize: Number of items kept for slow subscribers, must be greater than 0 .
+        slot_size: Maximum size of a pickled item in bytes, must be greater than 0 .
+        max_subscribers: Maximum number of subscriptions, must be greater than 0 .
+        """
+        if maxsize <= 0:
+            raise ValueError(f"Broadcast channel requires maxsize > 0, got {maxsize}")
+
+        if slot_size <= 0:
+            raise ValueError(f"Broadcast channel requires slot_size > 0, got {slot_size}")
+
+        if max_subscribers <= 0:
+            raise ValueError(
+                f"Broadcast channel requires max_subscribers > 0, got {max_subscribers}"
+            )
+
+        self.maxsize = maxsize
+        self.__slot_size = slot_size
+        self.__slot_stride = self.__SLOT_HEADER_SIZE + slot_size
+        self.__max_subscribers = max_subscribers
+
+        self.__shared_memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER_SIZE + maxsize * self.__slot_stride,
+        )
+
+        buffer = self.__shared_memory.buf
+        struct.pack_into(self.__POSITION_FORMAT, buffer, 0, 0)
+        for i in range(maxsize):
+            # Sequence 0 is never published
+            struct.pack_into(self.__SLOT_HEADER_FORMAT, buffer, self.__slot_offset(i), 0, 0)
+
+        # Serializes writers and lets blocked subscribers sleep until the next write
+        self.__condition = mp.Condition()
+        self.__is_closed = mp.RawValue("b", 0)
+
+        self.__subscriber_names: "list[str]" = []
+        self.__subscriber_locks = [mp.Lock() for _ in range(max_subscribers)]
+        self.__subscriber_counters = mp.RawArray("Q", max_subscribers * self.__FIELD_COUNT)
+
+    def __slot_offset(self, position: int) -> int:
+        """
+        Byte offset of the slot for the position.
+        """
+        return self.__HEADER_SIZE + (position % self.maxsize) * self.__slot_stride
+
+    def __read_write_position(self) -> int:
+        """
+        Position of the next write, which is the number of writes so far.
+        """
+        return struct.unpack_from(self.__POSITION_FORMAT, self.__shared_memory.buf, 0)[0]
+
+    def subscribe(self, name: str) -> "Subscription":
+        """
+        Creates a subscription starting at the next write.
+        Call from the creating process before starting the workers that use it.
+
+        name: Name in the statistics.
+
+        Raises `ValueError` if there are already max_subscribers subscriptions.
+        """
+        index = len(self.__subscriber_names)
+        if index >= self.__max_subscribers:
+            raise ValueError(f"Broadcast channel has at most {self.__max_subscribers} subscribers")
+
+        self.__subscriber_names.append(name)
+        self.__set_counter(index, self.__CURSOR, self.__read_write_position())
+
+        return Subscription(self, index)
+
+    def __get_counter(self, index: int, field: int) -> int:
+        return self.__subscriber_counters[index * self.__FIELD_COUNT + field]
+
+    def __set_counter(self, index: int, field: int, value: int) -> None:
+        self.__subscriber_counters[index * self.__FIELD_COUNT + field] = value
+
+    def _read_available(self, index: int, max_items: int) -> "list":
+        """
+        Reads the items after the subscriber's cursor and advances it.
+        Skips items that were overwritten before they could be read.
+
+        max_items: Maximum number of items to read, `max_items <= 0` means no limit.
+        """
+        buffer = self.__shared_memory.buf
+        items = []
+        with self.__subscriber_locks[index]:
+            cursor = self.__get_counter(index, self.__CURSOR)
+            while max_items <= 0 or len(items) < max_items:
+                write_position = self.__read_write_position()
+                if cursor >= write_position:
+                    break
+
+                oldest = write_position - self.maxsize
+                if cursor < oldest:
+                    self.__set_counter(
+                        index,
+                        self.__OVERRUNS,
+                        self.__get_counter(index, self.__OVERRUNS) + oldest - cursor,
+                    )
+                    cursor = oldest
+
+                # Seqlock read: copy the payload and skip ahead if it was overwritten meanwhile
+                offset = self.__slot_offset(cursor)
+                sequence, length = struct.unpack_from(self.__SLOT_HEADER_FORMAT, buffer, offset)
+                payload_offset = offset + self.__SLOT_HEADER_SIZE
+                payload = bytes(buffer[payload_offset : payload_offset + length])
+                if (
+                    sequence != 2 * cursor + 2
+                    or struct.unpack_from(self.__POSITION_FORMAT, buffer, offset)[0] != sequence
+                ):
+                    continue
+
+                items.append(pickle.loads(payload))
+                cursor += 1
+
+            self.__set_counter(index, self.__CURSOR, cursor)
+            self.__set_counter(
+                index, self.__READS, self.__get_counter(index, self.__READS) + len(items)
+            )
+
+        return items
+
+    def _wait_for_write(self, index: int, timeout: float | None) -> bool:
+        """
+        Waits until there is an item after the subscriber's cursor or the channel is closed.
+
+        Returns whether either happened in time.
+        """
+        with self.__condition:
+            return self.__condition.wait_for(
+                lambda: self.__read_write_position() > self.__get_counter(index, self.__CURSOR)
+                or self.is_closed(),
+                timeout,
+            )
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> bool:
+        """
+        Writes the item for every subscriber, never blocks on slow subscribers.
+
+        block and timeout are only for compatibility with `QueueProxyWrapper`.
+        Returns whether the item was put, False if the channel is closed.
+        Raises `ValueError` if the pickled item does not fit into a slot.
+        """
+        return self.put_many([item], block, timeout) == 1
+
+    def put_many(self, items: "list", block: bool = True, timeout: float | None = None) -> int:
+        """
+        Writes the items in order, waking subscribers once.
+
+        Returns the number of items put, 0 if the channel is closed.
+        Raises `ValueError` if a pickled item does not fit into a slot.
+        """
+        _ = block, timeout
+
+        if self.is_closed():
+            return 0
+
+        payloads = [pickle.dumps(item, pickle.HIGHEST_PROTOCOL) for item in items]
+        for payload in payloads:
+            if len(payload) > self.__slot_size:
+                raise ValueError(
+                    f"Pickled item is {len(payload)} bytes, slot size is {self.__slot_size} bytes"
+                )
+
+        buffer = self.__shared_memory.buf
+        with self.__condition:
+            position = self.__read_write_position()
+            for payload in payloads:
+                offset = self.__slot_offset(position)
+                struct.pack_into(self.__SLOT_HEADER_FORMAT, buffer, offset, 2 * position + 1, 0)
+                payload_offset = offset + self.__SLOT_HEADER_SIZE
+                buffer[payload_offset : payload_offset + len(payload)] = payload
+                struct.pack_into(
+                    self.__SLOT_HEADER_FORMAT, buffer, offset, 2 * position + 2, len(payload)
+                )
+                position += 1
+                struct.pack_into(self.__POSITION_FORMAT, buffer, 0, position)
+
+            self.__condition.notify_all()
+
+        return len(payloads)
+
+    def put_nowait(self, item: object) -> bool:
+        """
+        Equivalent to put(item, False).
+        """
+        return self.put(item, False)
+
+    def get_stats(self) -> BroadcastStatsSnapshot:
+        """
+        Returns the writes and, per subscriber, the reads, the number of unread items (lag),
+        and the number of skipped items (overruns).
+        """
+        write_position = self.__read_write_position()
+        subscribers = {}
+        for index, name in enumerate(self.__subscriber_names):
+            lag = min(write_position - self.__get_counter(index, self.__CURSOR), self.maxsize)
+            subscribers[name] = (
+                self.__get_counter(index, self.__READS),
+                lag,
+                self.__get_counter(index, self.__OVERRUNS),
+            )
+
+        return BroadcastStatsSnapshot(time.monotonic(), write_position, subscribers)
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the channel was closed.
+        """
+        return self.__is_closed.value != 0
+
+    def close(self) -> None:
+        """
+        Refuses further puts and wakes every blocked subscriber.
+        Subscribers read the remaining items, then get the sentinel (None).
+        """
+        with self.__condition:
+            self.__is_closed.value = 1
+            self.__condition.notify_all()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory, call once from the creating process after all workers have stopped.
+        """
+        self.__shared_memory.close()
+        self.__shared_memory.unlink()
+
+
+class Subscription:
+    """
+    Read side of a `BroadcastChannel` with the get surface of `QueueProxyWrapper`.
+
+    Workers sharing a subscription split its items between them like a queue,
+    separate subscriptions each get every item.
+    """
+
+    def __init__(self, channel: BroadcastChannel, index: int) -> None:
+        """
+        Use `BroadcastChannel.subscribe()`.
+        """
+        self.__channel = channel
+        self.__index = index
+        self.maxsize = channel.maxsize
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Gets the next item.
+
+        Returns the sentinel (None) once the channel is closed and every item was read.
+        Raises `queue.Empty` if no item arrived in time.
+        """
+        items = self.get_many(1, block, timeout)
+        if len(items) == 0:
+            raise queue.Empty
+
+        return items[0]
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def get_many(
+        self, max_items: int = 0, block: bool = True, timeout: float | None = None
+    ) -> "list":
+        """
+        Waits for up to timeout for at least 1 item, then gets everything available.
+        A reader killed while blocked here blocks every later put, so workers that can be
+        killed as stalled must use a timeout shorter than their stall deadline.
+
+        max_items: Maximum number of items to get, `max_items <= 0` means no limit.
+
+        Returns the items, empty if none arrived in time,
+        [None] once the channel is closed and every item was read.
+        """
+        # Subscription is the read side of the channel
+        # pylint: disable=protected-access
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            items = self.__channel._read_available(self.__index, max_items)
+            if len(items) > 0:
+                return items
+
+            if self.__channel.is_closed():
+                return [None]
+
+            if not block:
+                return []
+
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            # Another worker on this subscription may take the item first, so read again
+            if not self.__channel._wait_for_write(self.__index, remaining):
+                return []
+
+    def add_consumers(self, count: int) -> None:
+        """
+        Only for compatibility with `QueueProxyWrapper`, every reader sees the sentinel anyway.
+        """
+        _ = count
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the channel was closed.
+        """
+        return self.__channel.is_closed()
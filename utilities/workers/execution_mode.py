@@ -0,0 +1,180 @@
+"""
+Workers that run inside main instead of in their own process.
+"""
+
+import asyncio
+import concurrent.futures
+import enum
+import itertools
+import multiprocessing as mp
+import threading
+import traceback
+
+
+class ExecutionMode(enum.Enum):
+    """
+    What runs a worker.
+
+    PROCESS: Its own process, for CPU-bound workers.
+    THREAD: A thread of main, for I/O-bound workers that block (sleep, queue get).
+        Shares the GIL with main and cannot be killed when hung.
+    ASYNCIO: A task on the event loop thread shared by every ASYNCIO worker of main,
+        for workers that are coroutine functions and never block (see `async_adapter`).
+        Cancelled instead of killed when hung, which only works at an await.
+    """
+
+    PROCESS = 0
+    THREAD = 1
+    ASYNCIO = 2
+
+
+class ThreadWorker:
+    """
+    Worker in a thread of main, with the `mp.Process` methods `WorkerManager` uses.
+    """
+
+    __counter = itertools.count(1)
+
+    def __init__(
+        self,
+        target: "(...) -> object",  # type: ignore
+        args: "tuple",
+    ) -> None:
+        self.__target = target
+        self.__args = args
+        self.name = f"Thread-{next(self.__counter)}"
+        self.__thread = threading.Thread(target=self.__run, name=self.name, daemon=True)
+        # Same process as main, nothing to set the scheduling of
+        self.pid: int | None = None
+        self.exitcode: int | None = None
+
+    def __run(self) -> None:
+        """
+        Thread target, exit code 1 if the worker raised like a process.
+        """
+        try:
+            self.__target(*self.__args)
+            self.exitcode = 0
+        except BaseException:
+            self.exitcode = 1
+            raise
+
+    def start(self) -> None:
+        """
+        Starts the thread.
+        """
+        self.__thread.start()
+
+    def is_alive(self) -> bool:
+        """
+        Returns whether the thread is running.
+        """
+        return self.__thread.is_alive()
+
+    def join(self, timeout: float | None = None) -> None:
+        """
+        Waits for the thread to finish.
+        """
+        self.__thread.join(timeout)
+
+
+class EventLoopThread:
+    """
+    Daemon thread running the event loop that every ASYNCIO worker of main shares.
+    """
+
+    __lock = threading.Lock()
+    __loop: "asyncio.AbstractEventLoop | None" = None
+
+    @classmethod
+    def get_loop(cls) -> asyncio.AbstractEventLoop:
+        """
+        Returns the shared event loop, starting its thread on first use.
+        """
+        with cls.__lock:
+            if cls.__loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="EventLoopThread", daemon=True
+                ).start()
+                cls.__loop = loop
+
+            return cls.__loop
+
+
+class AsyncioWorker:
+    """
+    Worker as a task on the shared event loop, with the `mp.Process` methods
+    `WorkerManager` uses.
+    """
+
+    __counter = itertools.count(1)
+
+    def __init__(
+        self,
+        target: "(...) -> object",  # type: ignore
+        args: "tuple",
+    ) -> None:
+        """
+        target: Coroutine function.
+        """
+        self.__target = target
+        self.__args = args
+        self.__future: "concurrent.futures.Future | None" = None
+        self.name = f"Task-{next(self.__counter)}"
+        # Same process as main, nothing to set the scheduling of
+        self.pid: int | None = None
+
+    def start(self) -> None:
+        """
+        Schedules the task on the shared event loop.
+        """
+        self.__future = asyncio.run_coroutine_threadsafe(
+            self.__target(*self.__args), EventLoopThread.get_loop()
+        )
+        self.__future.add_done_callback(self.__print_exception)
+
+    @staticmethod
+    def __print_exception(future: concurrent.futures.Future) -> None:
+        """
+        Prints the exception the task raised, like a crashed process does.
+        """
+        if not future.cancelled() and future.exception() is not None:
+            traceback.print_exception(future.exception())
+
+    def is_alive(self) -> bool:
+        """
+        Returns whether the task is running.
+        """
+        return self.__future is not None and not self.__future.done()
+
+    def join(self, timeout: float | None = None) -> None:
+        """
+        Waits for the task to finish.
+        """
+        if self.__future is not None:
+            concurrent.futures.wait([self.__future], timeout)
+
+    def kill(self) -> None:
+        """
+        Cancels the task at its next await.
+        """
+        if self.__future is not None:
+            self.__future.cancel()
+
+    @property
+    def exitcode(self) -> int | None:
+        """
+        None while running, 0 if the task returned, 1 if it raised or was cancelled.
+        """
+        if self.__future is None or not self.__future.done():
+            return None
+
+        if self.__future.cancelled() or self.__future.exception() is not None:
+            return 1
+
+        return 0
+
+
+# Anything a worker runs in
+Worker = mp.Process | ThreadWorker | AsyncioWorker
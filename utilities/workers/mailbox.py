@@ -0,0 +1,314 @@
+"""
+Conflating mailbox.
+"""
+
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import pickle
+import queue
+import struct
+import time
+
+
+class Mailbox:
+    """
+    Holds only the latest value: a write overwrites the previous value, read or not.
+
+    Every write increments a version counter. Each reader remembers the last version it got,
+    so `get()` only returns values the reader has not seen and readers never steal values
+    from each other. A process gets its own copy of the mailbox and so its own last version,
+    threads of one process must each read through their own `MailboxReader` from `create_reader()`.
+
+    Has the same put/get surface as `QueueProxyWrapper` so it can replace a queue on a link
+    where only the freshest item matters.
+    """
+
+    __HEADER_FORMAT = "=QI"  # sequence, payload length
+    __HEADER_SIZE = struct.calcsize(__HEADER_FORMAT)
+    # Written separately, so that a reader never pairs a new sequence with an old length
+    __SEQUENCE_FORMAT = "=Q"
+    __LENGTH_FORMAT = "=I"
+    __LENGTH_OFFSET = struct.calcsize(__SEQUENCE_FORMAT)
+    __DEFAULT_SLOT_SIZE = 1024  # bytes
+
+    def __init__(self, slot_size: int = __DEFAULT_SLOT_SIZE) -> None:
+        """
+        slot_size: Maximum size of a pickled value in bytes, must be greater than 0 .
+        """
+        if slot_size <= 0:
+            raise ValueError(f"Mailbox requires slot_size > 0, got {slot_size}")
+
+        self.maxsize = 1
+        self.__slot_size = slot_size
+        self.__last_read_version = 0
+
+        self.__shared_memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER_SIZE + slot_size,
+        )
+        struct.pack_into(self.__HEADER_FORMAT, self.__shared_memory.buf, 0, 0, 0)
+
+        # Serializes writers and lets blocked readers sleep until the next write
+        self.__condition = mp.Condition()
+        self.__is_closed = mp.RawValue("b", 0)
+
+    def __read_sequence(self) -> int:
+        """
+        Sequence is odd while a write is in progress, version is sequence // 2 .
+        """
+        return struct.unpack_from(self.__SEQUENCE_FORMAT, self.__shared_memory.buf, 0)[0]
+
+    def __read_latest(self) -> "tuple[int, object]":
+        """
+        Seqlock read: copy the payload and retry if a write happened meanwhile.
+        """
+        buffer = self.__shared_memory.buf
+        while True:
+            sequence_before = self.__read_sequence()
+            if sequence_before % 2 == 1:
+                time.sleep(0)
+                continue
+
+            (length,) = struct.unpack_from(self.__LENGTH_FORMAT, buffer, self.__LENGTH_OFFSET)
+            payload = bytes(buffer[self.__HEADER_SIZE : self.__HEADER_SIZE + length])
+
+            if self.__read_sequence() == sequence_before:
+                break
+
+        if sequence_before == 0:
+            return 0, None
+
+        return sequence_before // 2, pickle.loads(payload)
+
+    def get_version(self) -> int:
+        """
+        Returns the number of writes so far, 0 if never written.
+        """
+        return self.__read_sequence() // 2
+
+    def read(self) -> "tuple[int, object]":
+        """
+        Returns the latest version and value without marking it as read.
+        The value is None if never written.
+        """
+        return self.__read_latest()
+
+    def __write(self, payload: bytes) -> None:
+        """
+        Seqlock write of the pickled value, call with the condition held.
+        """
+        buffer = self.__shared_memory.buf
+        sequence = self.__read_sequence()
+        struct.pack_into(self.__SEQUENCE_FORMAT, buffer, 0, sequence + 1)
+        buffer[self.__HEADER_SIZE : self.__HEADER_SIZE + len(payload)] = payload
+        struct.pack_into(self.__LENGTH_FORMAT, buffer, self.__LENGTH_OFFSET, len(payload))
+        # Publish last, after the payload and its length
+        struct.pack_into(self.__SEQUENCE_FORMAT, buffer, 0, sequence + 2)
+
+        self.__condition.notify_all()
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> bool:
+        """
+        Overwrites the value, never blocks.
+
+        block and timeout are only for compatibility with `QueueProxyWrapper`.
+        Returns whether the item was put, False if the mailbox is closed.
+        Raises `ValueError` if the pickled item does not fit into the slot.
+        """
+        _ = block, timeout
+
+        payload = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.__slot_size:
+            raise ValueError(
+                f"Pickled item is {len(payload)} bytes, slot size is {self.__slot_size} bytes"
+            )
+
+        with self.__condition:
+            # Checked under the condition, so that no put can overwrite the sentinel of close()
+            if self.is_closed():
+                return False
+
+            self.__write(payload)
+
+        return True
+
+    def _get_newer(
+        self, last_read_version: int, block: bool, timeout: float | None
+    ) -> "tuple[int, object]":
+        """
+        Gets the latest version and value if newer than last_read_version.
+
+        Raises `queue.Empty` if there is no newer value after timeout.
+        """
+        if self.get_version() <= last_read_version:
+            if not block:
+                raise queue.Empty
+
+            with self.__condition:
+                is_updated = self.__condition.wait_for(
+                    lambda: self.get_version() > last_read_version,
+                    timeout,
+                )
+
+            if not is_updated:
+                raise queue.Empty
+
+        return self.__read_latest()
+
+    def create_reader(self) -> "MailboxReader":
+        """
+        Returns a reader with its own last version, starting before the first write.
+        """
+        return MailboxReader(self)
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Gets the latest value if this reader has not seen it yet, skipping older values.
+        A reader killed while blocked here blocks every later put, so workers that can be
+        killed as stalled must use a timeout shorter than their stall deadline.
+
+        Raises `queue.Empty` if there is no new value after timeout.
+        """
+        version, item = self._get_newer(self.__last_read_version, block, timeout)
+        self.__last_read_version = version
+
+        return item
+
+    def put_nowait(self, item: object) -> bool:
+        """
+        Equivalent to put(item, False).
+        """
+        return self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def put_many(self, items: "list", block: bool = True, timeout: float | None = None) -> int:
+        """
+        Only the last item is written, the others would be overwritten anyway.
+
+        Returns the number of items accepted, which is all of them.
+        """
+        if len(items) > 0:
+            self.put(items[-1], block, timeout)
+
+        return len(items)
+
+    def get_many(
+        self, max_items: int = 0, block: bool = True, timeout: float | None = None
+    ) -> "list":
+        """
+        Returns the latest value as a list of at most 1 item, empty if there is no new value.
+
+        max_items is only for compatibility with `QueueProxyWrapper`.
+        """
+        _ = max_items
+
+        try:
+            return [self.get(block, timeout)]
+        except queue.Empty:
+            return []
+
+    def add_consumers(self, count: int) -> None:
+        """
+        Only for compatibility with `QueueProxyWrapper`, every reader sees the sentinel anyway.
+        """
+        _ = count
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the mailbox was closed.
+        """
+        return self.__is_closed.value != 0
+
+    def close(self) -> None:
+        """
+        Writes the sentinel (None) so that every blocked reader wakes up, and refuses later puts.
+        The sentinel stays the latest value, closing again does nothing.
+        """
+        with self.__condition:
+            if self.is_closed():
+                return
+
+            self.__write(pickle.dumps(None, pickle.HIGHEST_PROTOCOL))
+            self.__is_closed.value = 1
+
+    def fill_and_drain_queue(self) -> None:
+        """
+        Writes the sentinel (None) so that every blocked reader wakes up.
+        Prefer `close()`.
+        """
+        self.put(None)
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory, call once from the creating process after all workers have stopped.
+        """
+        self.__shared_memory.close()
+        self.__shared_memory.unlink()
+
+
+class MailboxReader:
+    """
+    Read side of a `Mailbox` with its own last version and the get surface of `QueueProxyWrapper`.
+
+    Workers sharing a reader in one process split the values between them,
+    separate readers each get every value.
+    """
+
+    def __init__(self, mailbox: Mailbox) -> None:
+        """
+        Use `Mailbox.create_reader()`.
+        """
+        self.__mailbox = mailbox
+        self.__last_read_version = 0
+        self.maxsize = mailbox.maxsize
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Gets the latest value if this reader has not seen it yet, skipping older values.
+
+        Raises `queue.Empty` if there is no new value after timeout.
+        """
+        # MailboxReader is the read side of the mailbox
+        # pylint: disable-next=protected-access
+        version, item = self.__mailbox._get_newer(self.__last_read_version, block, timeout)
+        self.__last_read_version = version
+
+        return item
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def get_many(
+        self, max_items: int = 0, block: bool = True, timeout: float | None = None
+    ) -> "list":
+        """
+        Returns the latest value as a list of at most 1 item, empty if there is no new value.
+
+        max_items is only for compatibility with `QueueProxyWrapper`.
+        """
+        _ = max_items
+
+        try:
+            return [self.get(block, timeout)]
+        except queue.Empty:
+            return []
+
+    def add_consumers(self, count: int) -> None:
+        """
+        Only for compatibility with `QueueProxyWrapper`, every reader sees the sentinel anyway.
+        """
+        _ = count
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the mailbox was closed.
+        """
+        return self.__mailbox.is_closed()
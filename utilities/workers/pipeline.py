@@ -0,0 +1,403 @@
+"""
+Declarative worker pipelines.
+"""
+
+import multiprocessing.managers
+
+from modules.common.modules.logger import logger
+from . import execution_mode
+from . import queue_proxy_wrapper
+from . import queue_stats
+from . import scheduling
+from . import worker_controller
+from . import worker_manager
+
+
+class StageSpec:
+    """
+    Declared stage: a worker function run by a number of identical processes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        target: "(...) -> object",  # type: ignore
+        count: int,
+        work_arguments: "tuple",
+        worker_scheduling: scheduling.WorkerScheduling | None,
+        worker_execution_mode: execution_mode.ExecutionMode,
+    ) -> None:
+        self.name = name
+        self.target = target
+        self.count = count
+        self.work_arguments = work_arguments
+        self.worker_scheduling = worker_scheduling
+        self.worker_execution_mode = worker_execution_mode
+
+
+class EdgeSpec:  # pylint: disable=too-many-instance-attributes
+    """
+    Declared edge: a queue from a stage (or main if None) to a stage (or main if None).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: str | None,
+        destination: str | None,
+        maxsize: int,
+        backend: queue_proxy_wrapper.QueueBackend,
+        overflow_policy: queue_proxy_wrapper.OverflowPolicy,
+        edge_queue: "queue_proxy_wrapper.QueueProxyWrapper | None",
+    ) -> None:
+        self.name = name
+        self.source = source
+        self.destination = destination
+        self.maxsize = maxsize
+        self.backend = backend
+        self.overflow_policy = overflow_policy
+        self.edge_queue = edge_queue
+
+
+class PipelineBuilder:
+    """
+    Collects stages and edges, then validates and creates the whole topology at once.
+
+    Each stage gets its own child of the controller, so it can be paused or restarted alone.
+    Each worker gets its stage's work arguments, then the queues of its incoming edges,
+    then the queues of its outgoing edges (both in declaration order), then the controller.
+    This is the argument order of `WorkerProperties`.
+    """
+
+    def __init__(self) -> None:
+        self.__stages: "dict[str, StageSpec]" = {}
+        self.__edges: "dict[str, EdgeSpec]" = {}
+        self.__duplicate_names: "list[str]" = []
+
+    def add_stage(
+        self,
+        name: str,
+        target: "(...) -> object",  # type: ignore
+        count: int,
+        work_arguments: "tuple" = (),
+        worker_scheduling: scheduling.WorkerScheduling | None = None,
+        worker_execution_mode: execution_mode.ExecutionMode = execution_mode.ExecutionMode.PROCESS,
+    ) -> "PipelineBuilder":
+        """
+        Declares a stage.
+
+        name: Unique stage name.
+        target: Worker function.
+        count: Number of workers.
+        work_arguments: Arguments before the queues.
+        worker_scheduling: CPU affinity, nice value and scheduling class of the workers.
+        worker_execution_mode: Whether the workers run as processes, threads or tasks.
+
+        Returns the builder for chaining.
+        """
+        if name in self.__stages:
+            self.__duplicate_names.append(name)
+
+        self.__stages[name] = StageSpec(
+            name, target, count, work_arguments, worker_scheduling, worker_execution_mode
+        )
+        return self
+
+    def add_edge(
+        self,
+        name: str,
+        source: str | None,
+        destination: str | None,
+        maxsize: int = 0,
+        backend: queue_proxy_wrapper.QueueBackend = queue_proxy_wrapper.QueueBackend.MANAGER,
+        overflow_policy: queue_proxy_wrapper.OverflowPolicy = queue_proxy_wrapper.OverflowPolicy.BLOCK,
+        edge_queue: "queue_proxy_wrapper.QueueProxyWrapper | None" = None,
+    ) -> "PipelineBuilder":
+        """
+        Declares a queue between 2 stages.
+
+        name: Unique edge name.
+        source: Producing stage, None if main produces.
+        destination: Consuming stage, None if main consumes.
+        maxsize: Maximum number of items, `maxsize <= 0` means infinite size.
+        backend: Underlying queue implementation.
+        overflow_policy: What a blocking put does when the queue is full.
+        edge_queue: Existing queue to use instead (e.g. a priority queue or mailbox),
+            maxsize, backend and overflow_policy are then ignored.
+
+        Returns the builder for chaining.
+        """
+        if name in self.__edges:
+            self.__duplicate_names.append(name)
+
+        self.__edges[name] = EdgeSpec(
+            name, source, destination, maxsize, backend, overflow_policy, edge_queue
+        )
+        return self
+
+    def __validate(self, local_logger: logger.Logger) -> bool:
+        """
+        Checks that the edges connect declared stages without cycles
+        and that every queue is large enough.
+        """
+        is_valid = True
+        for name in self.__duplicate_names:
+            local_logger.error(f"{name} is declared more than once", True)
+            is_valid = False
+
+        for stage in self.__stages.values():
+            if stage.count <= 0:
+                local_logger.error(f"Stage {stage.name} has {stage.count} workers", True)
+                is_valid = False
+
+        for edge in self.__edges.values():
+            endpoint_counts = []
+            for endpoint in (edge.source, edge.destination):
+                if endpoint is None:
+                    # Main
+                    endpoint_counts.append(1)
+                    continue
+
+                if endpoint not in self.__stages:
+                    local_logger.error(f"Edge {edge.name} uses undeclared stage {endpoint}", True)
+                    is_valid = False
+                    continue
+
+                endpoint_counts.append(self.__stages[endpoint].count)
+
+            if edge.source is not None and edge.source == edge.destination:
+                local_logger.error(f"Edge {edge.name} connects stage {edge.source} to itself", True)
+                is_valid = False
+
+            if edge.edge_queue is not None:
+                maxsize = edge.edge_queue.maxsize
+            else:
+                maxsize = edge.maxsize
+                if edge.backend == queue_proxy_wrapper.QueueBackend.SHARED_MEMORY and maxsize <= 0:
+                    local_logger.error(
+                        f"Edge {edge.name} is in shared memory without maxsize", True
+                    )
+                    is_valid = False
+
+            # Every producer and every consumer can hold an item in flight
+            # Example: Producers 3, consumers 2, so queue maxsize minimum is 3
+            if 0 < maxsize < max(endpoint_counts):
+                local_logger.error(
+                    f"Edge {edge.name} has maxsize {maxsize}, "
+                    f"less than its {max(endpoint_counts)} producers or consumers",
+                    True,
+                )
+                is_valid = False
+
+        cycle = self.__find_cycle()
+        if cycle is not None:
+            # Bounded queues around a cycle can all fill up, then every stage waits on the next
+            local_logger.error(f"Edges form a cycle through stages {' -> '.join(cycle)}", True)
+            is_valid = False
+
+        return is_valid
+
+    def __find_cycle(self) -> "list[str] | None":
+        """
+        Returns the stages of a cycle of edges between different declared stages,
+        first stage repeated at the end, None if there is none. Main is never part of one.
+        """
+        successors: "dict[str, list[str]]" = {name: [] for name in self.__stages}
+        for edge in self.__edges.values():
+            if (
+                edge.source in self.__stages
+                and edge.destination in self.__stages
+                and edge.source != edge.destination
+            ):
+                successors[edge.source].append(edge.destination)
+
+        # Depth first, a stage on the current path reached again closes a cycle
+        finished: "set[str]" = set()
+        for start in self.__stages:
+            path = [start]
+            pending = [iter(successors[start])]
+            while len(pending) > 0:
+                stage = next(pending[-1], None)
+                if stage is None:
+                    finished.add(path.pop())
+                    pending.pop()
+                    continue
+
+                if stage in path:
+                    return path[path.index(stage) :] + [stage]
+
+                if stage not in finished:
+                    path.append(stage)
+                    pending.append(iter(successors[stage]))
+
+        return None
+
+    def build(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        controller: worker_controller.WorkerController,
+        local_logger: logger.Logger,
+    ) -> "tuple[bool, Pipeline | None]":
+        """
+        Validates the declaration, creates the queues and the (not yet started) workers.
+
+        mp_manager: Manager for the MANAGER backend.
+        controller: Parent of the controller of every stage.
+        local_logger: Existing logger from process.
+
+        Returns whether the pipeline was created and the pipeline.
+        """
+        if not self.__validate(local_logger):
+            return False, None
+
+        queues = {}
+        for edge in self.__edges.values():
+            if edge.edge_queue is not None:
+                queues[edge.name] = edge.edge_queue
+                continue
+
+            try:
+                queues[edge.name] = queue_proxy_wrapper.QueueProxyWrapper(
+                    mp_manager,
+                    edge.maxsize,
+                    edge.backend,
+                    overflow_policy=edge.overflow_policy,
+                )
+            except ValueError as e:
+                local_logger.error(f"Failed to create queue for edge {edge.name}: {e}", True)
+                return False, None
+
+        managers = {}
+        for stage in self.__stages.values():
+            result, properties = worker_manager.WorkerProperties.create(
+                count=stage.count,
+                target=stage.target,
+                work_arguments=stage.work_arguments,
+                input_queues=[
+                    queues[edge.name]
+                    for edge in self.__edges.values()
+                    if edge.destination == stage.name
+                ],
+                output_queues=[
+                    queues[edge.name] for edge in self.__edges.values() if edge.source == stage.name
+                ],
+                controller=controller.create_child(),
+                local_logger=local_logger,
+                worker_scheduling=stage.worker_scheduling,
+                worker_execution_mode=stage.worker_execution_mode,
+            )
+            if not result:
+                local_logger.error(f"Failed to create worker properties for {stage.name}", True)
+                return False, None
+
+            # Get Pylance to stop complaining
+            assert properties is not None
+
+            result, manager = worker_manager.WorkerManager.create(
+                worker_properties=properties,
+                local_logger=local_logger,
+            )
+            if not result:
+                local_logger.error(f"Failed to create manager for {stage.name}", True)
+                return False, None
+
+            # Get Pylance to stop complaining
+            assert manager is not None
+
+            managers[stage.name] = manager
+
+        # Main consumes its edges too and needs a sentinel on close
+        for edge in self.__edges.values():
+            if edge.destination is None:
+                queues[edge.name].add_consumers(1)
+
+        return True, Pipeline(managers, queues, controller)
+
+
+class Pipeline:
+    """
+    Created topology, use `PipelineBuilder.build()`.
+    """
+
+    def __init__(
+        self,
+        managers: "dict[str, worker_manager.WorkerManager]",
+        queues: "dict[str, queue_proxy_wrapper.QueueProxyWrapper]",
+        controller: worker_controller.WorkerController,
+    ) -> None:
+        self.__managers = managers
+        self.__queues = queues
+        self.__controller = controller
+
+    def get_queue(self, name: str) -> queue_proxy_wrapper.QueueProxyWrapper:
+        """
+        Returns the queue of the edge, for main to put into or get from.
+        """
+        return self.__queues[name]
+
+    def get_controller(self, stage: str) -> worker_controller.WorkerController:
+        """
+        Returns the controller of the stage, to pause or resume only that stage.
+        """
+        return self.__managers[stage].get_controller()
+
+    def restart_stage(self, stage: str, timeout: float | None = None) -> bool:
+        """
+        Restarts the workers of the stage while the other stages keep running,
+        see `WorkerManager.restart_workers()`.
+
+        Returns whether the stage was restarted.
+        """
+        return self.__managers[stage].restart_workers(timeout)
+
+    def start(self) -> None:
+        """
+        Starts every worker.
+        """
+        for manager in self.__managers.values():
+            manager.start_workers()
+
+    def get_stats(self) -> "dict[str, queue_stats.QueueStatsSnapshot]":
+        """
+        Returns a statistics snapshot of each edge whose queue keeps statistics.
+        """
+        return {
+            name: edge_queue.get_stats()
+            for name, edge_queue in self.__queues.items()
+            if hasattr(edge_queue, "get_stats")
+        }
+
+    def check_and_restart_dead_workers(self) -> bool:
+        """
+        Restarts dead workers of every stage.
+
+        Returns whether all dead workers were able to be restarted.
+        """
+        is_restarted = True
+        for manager in self.__managers.values():
+            is_restarted = manager.check_and_restart_dead_workers() and is_restarted
+
+        return is_restarted
+
+    def stop(self, timeout: float | None = None) -> "dict[str, list[float]]":
+        """
+        Requests exit, closes every queue (waking blocked workers), joins the workers
+        and frees the queues. The controller is left in the exit state, see `clear_exit()`.
+
+        timeout: Time in seconds to wait for each worker, None to wait forever.
+
+        Returns the join time in seconds of each worker per stage.
+        """
+        self.__controller.request_exit()
+
+        for edge_queue in self.__queues.values():
+            edge_queue.close()
+
+        join_times = {
+            name: manager.join_workers(timeout) for name, manager in self.__managers.items()
+        }
+
+        for edge_queue in self.__queues.values():
+            edge_queue.unlink()
+
+        return join_times
@@ -0,0 +1,162 @@
+"""
+Priority queue.
+"""
+
+import enum
+import heapq
+import itertools
+import math
+import multiprocessing.managers
+
+from . import queue_proxy_wrapper
+
+
+class Priority(enum.IntEnum):
+    """
+    Priority classes, lower value is served first.
+    """
+
+    CRITICAL = 0
+    HIGH = 1
+    NORMAL = 2
+    LOW = 3
+
+
+class PriorityBatchQueue(queue_proxy_wrapper.BatchQueue):
+    """
+    Batch queue ordered by priority, FIFO within a priority class. Put and get are O(log n).
+
+    Entries are put as (priority, item) and got as item.
+    The sentinel (None) is put as is and served after everything else,
+    so that consumers get every queued item before they stop.
+    """
+
+    def __init__(self, maxsize: int = 0, starvation_limit: int = 0) -> None:
+        """
+        starvation_limit: If greater than 0, an item is overtaken by at most this many
+            later items per priority class of difference, then it is served regardless.
+            Otherwise strict priority, lower classes can starve.
+        """
+        self.__starvation_limit = starvation_limit
+        self.__sequence = itertools.count()
+        super().__init__(maxsize)
+
+    # Overriding queue.Queue internals, same as queue.PriorityQueue
+    # pylint: disable=attribute-defined-outside-init
+    def _init(self, maxsize: int) -> None:
+        self.queue = []
+
+    def _qsize(self) -> int:
+        return len(self.queue)
+
+    def _put(self, item: "tuple[int, object] | None") -> None:
+        sequence = next(self.__sequence)
+        if item is None:
+            # Keys are finite otherwise
+            heapq.heappush(self.queue, ((math.inf,), sequence, None))
+            return
+
+        priority, item = item
+        if self.__starvation_limit > 0:
+            # Aging: a later item of a more urgent class only wins while it arrived within
+            # starvation_limit items per class of difference
+            key = (sequence + int(priority) * self.__starvation_limit,)
+        else:
+            key = (int(priority),)
+
+        heapq.heappush(self.queue, (key, sequence, item))
+
+    def _get(self) -> object:
+        _, _, item = heapq.heappop(self.queue)
+        return item
+
+
+queue_proxy_wrapper.QueueManager.register("PriorityBatchQueue", PriorityBatchQueue)
+
+
+class PriorityQueueProxyWrapper(queue_proxy_wrapper.QueueProxyWrapper):
+    """
+    QueueProxyWrapper that serves more urgent items first.
+
+    Requires a `QueueManager`, the MANAGER backend, and an overflow policy that does not
+    evict (evicting would remove the most urgent item).
+    """
+
+    def __init__(
+        self,
+        mp_manager: queue_proxy_wrapper.QueueManager,
+        maxsize: int = 0,
+        starvation_limit: int = 0,
+        overflow_policy: queue_proxy_wrapper.OverflowPolicy = queue_proxy_wrapper.OverflowPolicy.BLOCK,
+        overflow_timeout: float = 0.0,
+    ) -> None:
+        """
+        mp_manager: Manager that creates the queue.
+        maxsize: Maximum number of items.
+        starvation_limit: See `PriorityBatchQueue`, `starvation_limit <= 0` is strict priority.
+        overflow_policy: BLOCK, BLOCK_WITH_TIMEOUT or DROP_NEWEST.
+        overflow_timeout: Time in seconds for BLOCK_WITH_TIMEOUT.
+        """
+        if not isinstance(mp_manager, queue_proxy_wrapper.QueueManager):
+            raise ValueError("Priority queue requires a QueueManager")
+
+        if overflow_policy in (
+            queue_proxy_wrapper.OverflowPolicy.DROP_OLDEST,
+            queue_proxy_wrapper.OverflowPolicy.SAMPLE,
+        ):
+            raise ValueError(f"Priority queue does not support {overflow_policy.name}")
+
+        self.__starvation_limit = starvation_limit
+        super().__init__(
+            mp_manager,
+            maxsize,
+            overflow_policy=overflow_policy,
+            overflow_timeout=overflow_timeout,
+        )
+
+    def _create_queue(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        maxsize: int,
+        backend: queue_proxy_wrapper.QueueBackend,
+        slot_size: int,
+    ) -> "tuple[object, bool]":
+        """
+        Creates the priority queue in the manager.
+        """
+        return mp_manager.PriorityBatchQueue(maxsize, self.__starvation_limit), True
+
+    def put(
+        self,
+        item: object,
+        block: bool = True,
+        timeout: float | None = None,
+        priority: Priority = Priority.NORMAL,
+    ) -> bool:
+        """
+        Puts an item with the priority, see `QueueProxyWrapper.put()`.
+        """
+        return super().put((priority, item), block, timeout)
+
+    def put_nowait(self, item: object, priority: Priority = Priority.NORMAL) -> bool:
+        """
+        Equivalent to put(item, False, priority=priority).
+        """
+        return self.put(item, False, priority=priority)
+
+    def put_many(
+        self,
+        items: "list",
+        block: bool = True,
+        timeout: float | None = None,
+        priorities: "list[Priority] | None" = None,
+    ) -> int:
+        """
+        Puts items with their priorities, see `QueueProxyWrapper.put_many()`.
+
+        priorities: Priority of each item, None for all NORMAL.
+        """
+        if priorities is None:
+            priorities = [Priority.NORMAL] * len(items)
+
+        return super().put_many(list(zip(priorities, items)), block, timeout)
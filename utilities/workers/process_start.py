@@ -0,0 +1,99 @@
+"""
+How worker processes are started.
+"""
+
+import enum
+import gc
+import multiprocessing as mp
+
+
+class StartMethod(enum.Enum):
+    """
+    Multiprocessing start method.
+
+    FORK: Copy of main, fastest, shares main's imported modules copy-on-write.
+    FORKSERVER: Copy of a server process that imported the preloaded modules,
+        without main's threads and state.
+    SPAWN: Fresh interpreter that imports everything again, slowest.
+    """
+
+    FORK = "fork"
+    FORKSERVER = "forkserver"
+    SPAWN = "spawn"
+
+
+def set_start_method(start_method: StartMethod, preload_modules: "list[str] | None" = None) -> None:
+    """
+    Sets the start method of every process created afterwards.
+    Call first in main, before creating any controller, queue or manager:
+    their locks only work with processes of the start method they were created with.
+
+    start_method: Start method.
+    preload_modules: Modules the fork server imports once, e.g. the worker modules and pymavlink.
+        Ignored by the other start methods.
+    """
+    mp.set_start_method(start_method.value, force=True)
+
+    if start_method == StartMethod.FORKSERVER and preload_modules is not None:
+        mp.set_forkserver_preload(preload_modules)
+
+
+def is_forking() -> bool:
+    """
+    Returns whether processes created now are forked from main, with copies of the locks
+    that other threads of main may be holding.
+    """
+    return mp.get_start_method() == StartMethod.FORK.value
+
+
+def start_process(process: mp.Process) -> None:
+    """
+    Starts the process. When forking, freezes the objects of main first so that
+    the garbage collector in the worker never writes to them and their pages stay
+    shared copy-on-write instead of being copied into every worker.
+    """
+    if not is_forking():
+        process.start()
+        return
+
+    gc.freeze()
+    try:
+        process.start()
+    finally:
+        # The worker keeps its copy frozen, main collects as usual
+        gc.unfreeze()
+
+
+class WorkerActivation:
+    """
+    Gate a pre-started spare worker waits on until it replaces a worker,
+    so a restart skips process creation and module imports.
+    """
+
+    __CANCELLED = -1
+
+    def __init__(self) -> None:
+        self.__event = mp.Event()
+        self.__slot = mp.RawValue("i", self.__CANCELLED)
+
+    def activate(self, slot: int) -> None:
+        """
+        Lets the spare run as the worker in the slot.
+        """
+        self.__slot.value = slot
+        self.__event.set()
+
+    def cancel(self) -> None:
+        """
+        Lets the spare exit without running.
+        """
+        self.activate(self.__CANCELLED)
+
+    def wait(self) -> int:
+        """
+        Blocks the spare until activated or cancelled.
+
+        Returns the slot to run as, negative if cancelled.
+        """
+        self.__event.wait()
+        return self.__slot.value
@@ -2,24 +2,538 @@
 Queue.
 """
 
+import enum
+import multiprocessing as mp
 import multiprocessing.managers
 import queue
 import time
 
+from . import queue_stats
+from . import shared_memory_ring
 
-class QueueProxyWrapper:
+
+class BatchQueue(queue.Queue):
+    """
+    Queue with batch operations, so a manager proxy can move many items in 1 round trip.
+    """
+
+    def put_many(self, items: "list", block: bool = True, timeout: float | None = None) -> int:
+        """
+        Puts items in order, waiting for space for up to timeout in total.
+
+        Returns the number of items put, the remaining items were not put.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        count = 0
+        with self.not_full:
+            for item in items:
+                while 0 < self.maxsize <= self._qsize():
+                    if not block:
+                        return count
+
+                    if deadline is None:
+                        self.not_full.wait()
+                        continue
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0.0:
+                        return count
+
+                    self.not_full.wait(remaining)
+
+                self._put(item)
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+                count += 1
+
+        return count
+
+    def get_many(
+        self, max_items: int = 0, block: bool = True, timeout: float | None = None
+    ) -> "list":
+        """
+        Waits for up to timeout for at least 1 item, then gets everything available.
+
+        max_items: Maximum number of items to get, `max_items <= 0` means no limit.
+
+        Returns the items, empty if none arrived in time.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.not_empty:
+            while self._qsize() == 0:
+                if not block:
+                    return []
+
+                if deadline is None:
+                    self.not_empty.wait()
+                    continue
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0.0:
+                    return []
+
+                self.not_empty.wait(remaining)
+
+            count = self._qsize()
+            if max_items > 0:
+                count = min(count, max_items)
+
+            items = [self._get() for _ in range(count)]
+            self.not_full.notify(count)
+
+        return items
+
+
+class QueueManager(multiprocessing.managers.SyncManager):
+    """
+    SyncManager which can also create `BatchQueue` proxies.
+    Use instead of `mp.Manager()` for batch operations in a single round trip.
+    """
+
+
+QueueManager.register("BatchQueue", BatchQueue)
+
+
+class QueueBackend(enum.Enum):
+    """
+    Underlying queue implementation.
+
+    MANAGER: Queue proxy from a SyncManager, every operation is a round trip to the server process.
+    SHARED_MEMORY: Ring of fixed-size slots in shared memory, requires `maxsize > 0`.
+    """
+
+    MANAGER = 0
+    SHARED_MEMORY = 1
+
+
+class OverflowPolicy(enum.Enum):
+    """
+    What a blocking put does when the queue is full.
+
+    BLOCK: Wait until there is space.
+    BLOCK_WITH_TIMEOUT: Wait for up to the overflow timeout, then drop the new item.
+    DROP_NEWEST: Drop the new item.
+    DROP_OLDEST: Evict the oldest item to make space for the new item.
+    SAMPLE: Keep every Nth overflowing item by evicting the oldest, drop the rest.
+    """
+
+    BLOCK = 0
+    BLOCK_WITH_TIMEOUT = 1
+    DROP_NEWEST = 2
+    DROP_OLDEST = 3
+    SAMPLE = 4
+
+
+class QueueProxyWrapper:  # pylint: disable=too-many-instance-attributes
     """
     Wrapper for an underlying queue proxy which also stores `maxsize`.
 
     `maxsize <= 0` means infinite size.
+
+    Operations through the wrapper methods are counted in shared statistics,
+    operations directly on `queue` are not.
+
+    Shutdown: `close()` puts a sentinel (None) per attached consumer behind the queued items,
+    which wakes every blocked reader, and refuses blocked and later puts.
     """
 
     __QUEUE_TIMEOUT = 0.1  # seconds
     __QUEUE_DELAY = 0.1  # seconds
+    # Blocking calls recheck whether the queue was closed at least this often
+    __WAKE_INTERVAL = 0.05  # seconds
+    # Longest close() waits for consumers to drain the queued items
+    __CLOSE_TIMEOUT = 1.0  # seconds
+    # close() discards the queued items once consumers take none for this long
+    __CLOSE_STALL_INTERVAL = 0.02  # seconds
+    __DEFAULT_SLOT_SIZE = 1024  # bytes
+    # Other producers can take the evicted space first
+    __EVICTION_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        maxsize: int = 0,
+        backend: QueueBackend = QueueBackend.MANAGER,
+        slot_size: int = __DEFAULT_SLOT_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        overflow_timeout: float = __QUEUE_TIMEOUT,
+        sample_every: int = 2,
+    ) -> None:
+        """
+        mp_manager: Manager for the MANAGER backend. Batch operations are a single round trip
+            if it is a `QueueManager`, otherwise they fall back to 1 round trip per item.
+        maxsize: Maximum number of items.
+        backend: Underlying queue implementation.
+        slot_size: Maximum pickled item size in bytes for the SHARED_MEMORY backend.
+        overflow_policy: What a blocking put without timeout does when the queue is full.
+        overflow_timeout: Time in seconds for BLOCK_WITH_TIMEOUT, must be greater than 0 .
+        sample_every: N for SAMPLE, must be greater than 0 .
+        """
+        self.queue, self.__is_batch_native = self._create_queue(
+            mp_manager, maxsize, backend, slot_size
+        )
 
-    def __init__(self, mp_manager: multiprocessing.managers.SyncManager, maxsize: int = 0) -> None:
-        self.queue = mp_manager.Queue(maxsize)
         self.maxsize = maxsize
+        self.backend = backend
+        self.overflow_policy = overflow_policy
+        self.__overflow_timeout = (
+            overflow_timeout if overflow_timeout > 0.0 else self.__QUEUE_TIMEOUT
+        )
+        self.__sample_every = max(sample_every, 1)
+        # Per producer process
+        self.__overflow_count = 0
+        self.__stats = queue_stats.QueueStats()
+
+        # Plain shared memory, read on every blocking call
+        self.__is_closed = mp.RawValue("b", 0)
+        self.__consumer_count = mp.Value("i", 0)
+
+    def add_consumers(self, count: int) -> None:
+        """
+        Registers consumers, each one gets a sentinel on `close()`.
+        Done by `WorkerManager` for the input queues of its workers.
+        """
+        with self.__consumer_count.get_lock():
+            self.__consumer_count.value += count
+
+    def get_consumer_count(self) -> int:
+        """
+        Returns the number of registered consumers.
+        """
+        return self.__consumer_count.value
+
+    def is_closed(self) -> bool:
+        """
+        Returns whether the queue was closed.
+        """
+        return self.__is_closed.value != 0
+
+    def close(self) -> None:
+        """
+        Closes the queue and wakes every blocked reader and writer.
+
+        1 sentinel (None) is put for each consumer behind the queued items, so consumers
+        get every item before their sentinel. If the sentinels do not all fit, this waits for
+        consumers to take items. Once they stop taking items (e.g. they already exited) or after
+        the close timeout, the queued items are discarded as closed drops to fit the sentinels.
+        Blocked and later puts return False, blocking gets without timeout return
+        the sentinel once the queue is empty.
+        """
+        self.__is_closed.value = 1
+
+        deadline = time.monotonic() + self.__CLOSE_TIMEOUT
+        gets = self.__stats.snapshot().gets
+        missing_count = self.__consumer_count.value
+        while missing_count > 0:
+            try:
+                self.queue.put(None, True, self.__CLOSE_STALL_INTERVAL)
+                self.__stats.record_put(1, 0.0)
+                missing_count -= 1
+                continue
+            except queue.Full:
+                pass
+
+            previous_gets = gets
+            gets = self.__stats.snapshot().gets
+            if gets == previous_gets or time.monotonic() > deadline:
+                self.__discard_items(missing_count)
+                return
+
+    def __discard_items(self, missing_count: int) -> None:
+        """
+        Discards the queued items as closed drops, keeping the sentinels already put,
+        then puts the missing sentinels if they fit.
+        """
+        sentinel_count = 0
+        try:
+            while True:
+                if self.queue.get(False) is None:
+                    sentinel_count += 1
+                else:
+                    self.__stats.record_drop(1, queue_stats.DropReason.CLOSED)
+        except queue.Empty:
+            pass
+
+        try:
+            # Taken back uncounted, so put back uncounted
+            for _ in range(sentinel_count):
+                self.queue.put(None, False)
+
+            for _ in range(missing_count):
+                self.queue.put(None, False)
+                self.__stats.record_put(1, 0.0)
+        except queue.Full:
+            # Writers that were blocked took the space first
+            pass
+
+    def _create_queue(
+        self,
+        mp_manager: multiprocessing.managers.SyncManager,
+        maxsize: int,
+        backend: QueueBackend,
+        slot_size: int,
+    ) -> "tuple[object, bool]":
+        """
+        Creates the underlying queue, subclasses override this for a different queue type.
+
+        Returns the queue and whether it supports batch operations natively.
+        """
+        if backend == QueueBackend.SHARED_MEMORY:
+            return shared_memory_ring.SharedMemoryRing(maxsize, slot_size), True
+
+        if isinstance(mp_manager, QueueManager):
+            return mp_manager.BatchQueue(maxsize), True
+
+        return mp_manager.Queue(maxsize), False
+
+    def get_stats(self) -> queue_stats.QueueStatsSnapshot:
+        """
+        Returns a snapshot of the counters, shared across all processes using this queue.
+        Cheap, does not touch the underlying queue.
+        """
+        return self.__stats.snapshot()
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> bool:
+        """
+        Puts an item into the queue.
+
+        The overflow policy applies to a blocking put without timeout. A non-blocking put
+        or a put with timeout is the caller's own limit and raises `queue.Full` instead.
+
+        Returns whether the item was put, False if the overflow policy dropped it
+        or the queue is closed.
+        """
+        if self.is_closed():
+            return False
+
+        start_time = time.perf_counter()
+        if not block or timeout is not None:
+            try:
+                self.queue.put(item, block, timeout)
+            except queue.Full:
+                self.__stats.record_put(0, time.perf_counter() - start_time)
+                self.__stats.record_drop(1, queue_stats.DropReason.REJECTED)
+                raise
+
+            is_put = True
+        else:
+            is_put = self.__put_with_policy(item)
+
+        self.__stats.record_put(int(is_put), time.perf_counter() - start_time)
+
+        return is_put
+
+    def __put_with_policy(self, item: object) -> bool:
+        """
+        Puts an item according to the overflow policy.
+
+        Returns whether the item was put.
+        """
+        if self.overflow_policy == OverflowPolicy.BLOCK:
+            # Wait in slices so that closing wakes the writer
+            while not self.is_closed():
+                try:
+                    self.queue.put(item, True, self.__WAKE_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+
+            return False
+
+        if self.overflow_policy == OverflowPolicy.BLOCK_WITH_TIMEOUT:
+            try:
+                self.queue.put(item, True, self.__overflow_timeout)
+            except queue.Full:
+                self.__stats.record_drop(1, queue_stats.DropReason.TIMEOUT)
+                return False
+
+            return True
+
+        try:
+            self.queue.put(item, False)
+            return True
+        except queue.Full:
+            pass
+
+        if self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+            self.__stats.record_drop(1, queue_stats.DropReason.NEWEST)
+            return False
+
+        if self.overflow_policy == OverflowPolicy.SAMPLE:
+            self.__overflow_count += 1
+            if self.__overflow_count % self.__sample_every != 0:
+                self.__stats.record_drop(1, queue_stats.DropReason.SAMPLED)
+                return False
+
+        return self.__put_evicting_oldest(item)
+
+    def __put_evicting_oldest(self, item: object) -> bool:
+        """
+        Evicts the oldest items until the new item fits.
+
+        Returns whether the item was put.
+        """
+        for _ in range(self.__EVICTION_ATTEMPTS):
+            try:
+                self.queue.get(False)
+                self.__stats.record_drop(1, queue_stats.DropReason.OLDEST)
+            except queue.Empty:
+                pass
+
+            try:
+                self.queue.put(item, False)
+                return True
+            except queue.Full:
+                continue
+
+        self.__stats.record_drop(1, queue_stats.DropReason.NEWEST)
+        return False
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Gets an item from the queue.
+
+        A blocking get without timeout returns the sentinel (None) once the queue is
+        closed and empty.
+        Raises `queue.Empty` if the queue is still empty after timeout.
+        """
+        start_time = time.perf_counter()
+        try:
+            if block and timeout is None:
+                item = self.__get_until_closed()
+            else:
+                item = self.queue.get(block, timeout)
+        except queue.Empty:
+            self.__stats.record_get(0, time.perf_counter() - start_time)
+            raise
+
+        self.__stats.record_get(1, time.perf_counter() - start_time)
+
+        return item
+
+    def __get_until_closed(self) -> object:
+        """
+        Blocking get in slices so that closing wakes the reader.
+        """
+        while True:
+            try:
+                return self.queue.get(True, self.__WAKE_INTERVAL)
+            except queue.Empty:
+                if self.is_closed():
+                    return None
+
+    def put_nowait(self, item: object) -> bool:
+        """
+        Equivalent to put(item, False).
+        """
+        return self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def put_many(self, items: "list", block: bool = True, timeout: float | None = None) -> int:
+        """
+        Puts items in order, waiting for space for up to timeout in total.
+        The overflow policy applies the same way as for put().
+
+        Returns the number of items put, the remaining items were not put.
+        """
+        if self.is_closed():
+            return 0
+
+        start_time = time.perf_counter()
+        reason = queue_stats.DropReason.REJECTED
+        if not block or timeout is not None:
+            count = self.__put_many(items, block, timeout)
+        elif self.overflow_policy == OverflowPolicy.BLOCK:
+            # Wait in slices so that closing wakes the writer
+            count = 0
+            while count < len(items) and not self.is_closed():
+                count += self.__put_many(items[count:], True, self.__WAKE_INTERVAL)
+        elif self.overflow_policy == OverflowPolicy.BLOCK_WITH_TIMEOUT:
+            count = self.__put_many(items, True, self.__overflow_timeout)
+            reason = queue_stats.DropReason.TIMEOUT
+        elif self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+            count = self.__put_many(items, False, None)
+            reason = queue_stats.DropReason.NEWEST
+        else:
+            # Evicting is per item, the policy records its own drops
+            count = sum(self.__put_with_policy(item) for item in items)
+            self.__stats.record_put(count, time.perf_counter() - start_time)
+            return count
+
+        self.__stats.record_put(count, time.perf_counter() - start_time)
+        if count < len(items):
+            self.__stats.record_drop(len(items) - count, reason)
+
+        return count
+
+    def get_many(
+        self, max_items: int = 0, block: bool = True, timeout: float | None = None
+    ) -> "list":
+        """
+        Waits for up to timeout for at least 1 item, then gets everything available.
+
+        max_items: Maximum number of items to get, `max_items <= 0` means no limit.
+
+        A blocking get without timeout returns only the sentinel (None) once the queue is
+        closed and empty.
+
+        Returns the items, empty if none arrived in time.
+        """
+        start_time = time.perf_counter()
+        if block and timeout is None:
+            # Wait in slices so that closing wakes the reader
+            items = []
+            while len(items) == 0:
+                items = self.__get_many(max_items, True, self.__WAKE_INTERVAL)
+                if len(items) == 0 and self.is_closed():
+                    items = [None]
+        else:
+            items = self.__get_many(max_items, block, timeout)
+
+        self.__stats.record_get(len(items), time.perf_counter() - start_time)
+
+        return items
+
+    def __put_many(self, items: "list", block: bool, timeout: float | None) -> int:
+        """
+        Uncounted put_many().
+        """
+        if self.__is_batch_native:
+            return self.queue.put_many(items, block, timeout)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        count = 0
+        try:
+            for item in items:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+                self.queue.put(item, block, remaining)
+                count += 1
+        except queue.Full:
+            pass
+
+        return count
+
+    def __get_many(self, max_items: int, block: bool, timeout: float | None) -> "list":
+        """
+        Uncounted get_many().
+        """
+        if self.__is_batch_native:
+            return self.queue.get_many(max_items, block, timeout)
+
+        items = []
+        try:
+            items.append(self.queue.get(block, timeout))
+            while max_items <= 0 or len(items) < max_items:
+                items.append(self.queue.get(False))
+        except queue.Empty:
+            pass
+
+        return items
 
     def fill_queue_with_sentinel(self, timeout: float = 0.0) -> None:
         """
@@ -33,6 +547,8 @@ class QueueProxyWrapper:
         try:
             for _ in range(self.maxsize):
                 self.queue.put(None, timeout=timeout)
+                # Sentinels that do not fit are not drops
+                self.__stats.record_put(1, 0.0)
         except queue.Full:
             return
 
@@ -47,14 +563,23 @@ class QueueProxyWrapper:
 
         try:
             for _ in range(self.maxsize):
-                self.queue.get(timeout=timeout)
+                self.get(timeout=timeout)
         except queue.Empty:
             return
 
     def fill_and_drain_queue(self) -> None:
         """
         Fill with sentinel and then drain.
+        Prefer `close()`, which does not depend on timing.
         """
         self.fill_queue_with_sentinel()
         time.sleep(self.__QUEUE_DELAY)
         self.drain_queue()
+
+    def unlink(self) -> None:
+        """
+        Frees resources held by the backend. Call once from main after all workers have stopped.
+        Does nothing for the MANAGER backend, the manager owns the queue.
+        """
+        if self.backend == QueueBackend.SHARED_MEMORY:
+            self.queue.unlink()
@@ -0,0 +1,150 @@
+"""
+Queue instrumentation.
+"""
+
+import enum
+import multiprocessing as mp
+import time
+
+
+class DropReason(enum.Enum):
+    """
+    Why an item did not make it through the queue.
+
+    REJECTED: Caller's non-blocking or timed put failed.
+    TIMEOUT: Blocked for the overflow timeout.
+    NEWEST: New item discarded because the queue was full.
+    OLDEST: Oldest queued item evicted to make space.
+    SAMPLED: Overflowing item skipped while sampling.
+    CLOSED: Queued item discarded on close because consumers stopped taking items.
+    """
+
+    REJECTED = 0
+    TIMEOUT = 1
+    NEWEST = 2
+    OLDEST = 3
+    SAMPLED = 4
+    CLOSED = 5
+
+
+class QueueStatsSnapshot:  # pylint: disable=too-many-instance-attributes
+    """
+    Counters of a queue at a point in time.
+    """
+
+    def __init__(
+        self,
+        timestamp: float,  # s, time.monotonic()
+        puts: int,
+        gets: int,
+        high_water_mark: int,
+        put_blocked_time: float,  # s
+        get_blocked_time: float,  # s
+        drops: "dict[DropReason, int]",
+    ) -> None:
+        self.timestamp = timestamp
+        self.puts = puts
+        self.gets = gets
+        # Evicted and discarded items left the queue without a get
+        self.depth = puts - gets - drops[DropReason.OLDEST] - drops[DropReason.CLOSED]
+        self.high_water_mark = high_water_mark
+        self.put_blocked_time = put_blocked_time
+        self.get_blocked_time = get_blocked_time
+        self.drops = sum(drops.values())
+        self.drops_by_reason = drops
+
+    def get_throughput(self, previous: "QueueStatsSnapshot") -> "tuple[float, float]":
+        """
+        previous: Older snapshot of the same queue.
+
+        Returns puts per second and gets per second since previous.
+        """
+        duration = self.timestamp - previous.timestamp
+        if duration <= 0.0:
+            return 0.0, 0.0
+
+        return (self.puts - previous.puts) / duration, (self.gets - previous.gets) / duration
+
+    def __str__(self) -> str:
+        drops_by_reason = ", ".join(
+            f"{reason.name}: {count}" for reason, count in self.drops_by_reason.items()
+        )
+        return (
+            f"puts: {self.puts}, gets: {self.gets}, depth: {self.depth}, "
+            f"high water mark: {self.high_water_mark}, "
+            f"put blocked: {self.put_blocked_time:.3f}s, get blocked: {self.get_blocked_time:.3f}s, "
+            f"drops: {self.drops} "
+            f"({drops_by_reason})"
+        )
+
+
+class QueueStats:
+    """
+    Counters in shared memory, updated by every process using the queue.
+    """
+
+    __PUTS = 0
+    __GETS = 1
+    __HIGH_WATER_MARK = 2
+    __PUT_BLOCKED_TIME = 3
+    __GET_BLOCKED_TIME = 4
+    __DROPS = 5  # 1 field per DropReason
+    __FIELD_COUNT = __DROPS + len(DropReason)
+
+    def __init__(self) -> None:
+        """
+        Constructor creates the shared counters.
+        """
+        # Doubles so that blocked time fits as well, counts stay exact up to 2^53
+        self.__values = mp.Array("d", self.__FIELD_COUNT)
+
+    def record_put(self, count: int, blocked_time: float) -> None:
+        """
+        count: Number of items put.
+        blocked_time: Time spent in the put call in seconds.
+        """
+        with self.__values.get_lock():
+            self.__values[self.__PUTS] += count
+            self.__values[self.__PUT_BLOCKED_TIME] += blocked_time
+            depth = (
+                self.__values[self.__PUTS]
+                - self.__values[self.__GETS]
+                - self.__values[self.__DROPS + DropReason.OLDEST.value]
+                - self.__values[self.__DROPS + DropReason.CLOSED.value]
+            )
+            if depth > self.__values[self.__HIGH_WATER_MARK]:
+                self.__values[self.__HIGH_WATER_MARK] = depth
+
+    def record_get(self, count: int, blocked_time: float) -> None:
+        """
+        count: Number of items got.
+        blocked_time: Time spent in the get call in seconds.
+        """
+        with self.__values.get_lock():
+            self.__values[self.__GETS] += count
+            self.__values[self.__GET_BLOCKED_TIME] += blocked_time
+
+    def record_drop(self, count: int, reason: DropReason) -> None:
+        """
+        count: Number of items that were dropped.
+        reason: Why they were dropped.
+        """
+        with self.__values.get_lock():
+            self.__values[self.__DROPS + reason.value] += count
+
+    def snapshot(self) -> QueueStatsSnapshot:
+        """
+        Returns a copy of the counters.
+        """
+        with self.__values.get_lock():
+            values = self.__values[:]
+
+        return QueueStatsSnapshot(
+            time.monotonic(),
+            int(values[self.__PUTS]),
+            int(values[self.__GETS]),
+            int(values[self.__HIGH_WATER_MARK]),
+            values[self.__PUT_BLOCKED_TIME],
+            values[self.__GET_BLOCKED_TIME],
+            {reason: int(values[self.__DROPS + reason.value]) for reason in DropReason},
+        )
@@ -0,0 +1,161 @@
+"""
+Resource accounting of worker processes.
+"""
+
+import collections
+import os
+import time
+
+
+class ResourceSample:  # pylint: disable=too-many-instance-attributes
+    """
+    Resource usage of a process at a point in time.
+    """
+
+    def __init__(
+        self,
+        timestamp: float,  # s, time.monotonic()
+        cpu_time: float,  # s, user and system
+        rss: int,  # bytes
+        voluntary_switches: int,
+        involuntary_switches: int,
+        open_fds: int,
+    ) -> None:
+        self.timestamp = timestamp
+        self.cpu_time = cpu_time
+        self.rss = rss
+        # Blocked, e.g. waiting for a queue
+        self.voluntary_switches = voluntary_switches
+        # Preempted, e.g. by another process on the same CPU
+        self.involuntary_switches = involuntary_switches
+        self.open_fds = open_fds
+
+    def __str__(self) -> str:
+        return (
+            f"cpu time: {self.cpu_time:.2f}s, rss: {self.rss / 2**20:.1f}MiB, "
+            f"context switches: {self.voluntary_switches} voluntary, "
+            f"{self.involuntary_switches} involuntary, open fds: {self.open_fds}"
+        )
+
+
+def read_process_sample(pid: int) -> "ResourceSample | None":
+    """
+    Reads the resource usage of the process from /proc.
+
+    Returns None if the process does not exist anymore or /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as stat_file:
+            stat = stat_file.read()
+
+        with open(f"/proc/{pid}/status", encoding="utf-8") as status_file:
+            status = {}
+            for line in status_file:
+                key, _, value = line.partition(":")
+                status[key] = value.split()
+
+        open_fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        return None
+
+    # The command name in parentheses can contain spaces, fields are counted after it
+    # utime and stime are fields 14 and 15 of the whole line
+    fields = stat[stat.rfind(")") + 2 :].split()
+    cpu_ticks = int(fields[11]) + int(fields[12])
+
+    return ResourceSample(
+        time.monotonic(),
+        cpu_ticks / os.sysconf("SC_CLK_TCK"),
+        # Kernel threads have no VmRSS
+        int(status.get("VmRSS", ["0"])[0]) * 1024,
+        int(status["voluntary_ctxt_switches"][0]),
+        int(status["nonvoluntary_ctxt_switches"][0]),
+        open_fds,
+    )
+
+
+class ResourceHistory:
+    """
+    Rolling history of the resource usage of a worker process.
+    """
+
+    def __init__(self, pid: int, length: int) -> None:
+        """
+        pid: Process ID of the worker.
+        length: Number of samples kept, older ones are discarded.
+        """
+        self.pid = pid
+        self.samples: "collections.deque[ResourceSample]" = collections.deque(maxlen=length)
+
+    def get_cpu_usage(self) -> float:
+        """
+        Returns the fraction of a CPU used between the last 2 samples, 0 if fewer.
+        """
+        if len(self.samples) < 2:
+            return 0.0
+
+        previous = self.samples[-2]
+        latest = self.samples[-1]
+        duration = latest.timestamp - previous.timestamp
+        if duration <= 0.0:
+            return 0.0
+
+        return (latest.cpu_time - previous.cpu_time) / duration
+
+    def get_peak_rss(self) -> int:
+        """
+        Returns the highest resident memory in bytes within the history.
+        """
+        return max((sample.rss for sample in self.samples), default=0)
+
+    def __str__(self) -> str:
+        if len(self.samples) == 0:
+            return f"pid {self.pid}: no samples"
+
+        return (
+            f"pid {self.pid}: cpu {self.get_cpu_usage() * 100.0:.1f}%, "
+            f"peak rss: {self.get_peak_rss() / 2**20:.1f}MiB, {self.samples[-1]}"
+        )
+
+
+class ResourceSampler:
+    """
+    Resource histories of a group of worker processes, one per slot.
+    """
+
+    def __init__(self, length: int) -> None:
+        """
+        length: Number of samples kept per worker.
+        """
+        self.__length = length
+        self.histories: "dict[int, ResourceHistory]" = {}
+
+    def sample(self, pids: "list[int | None]") -> "dict[int, ResourceHistory]":
+        """
+        Samples the process of each slot. A new process in a slot starts a new history.
+
+        pids: Process ID of the live worker in each slot, None if there is none to sample.
+
+        Returns the resource history of each sampled slot.
+        """
+        for slot, pid in enumerate(pids):
+            if pid is None:
+                continue
+
+            sample = read_process_sample(pid)
+            if sample is None:
+                continue
+
+            history = self.histories.get(slot)
+            if history is None or history.pid != pid:
+                history = ResourceHistory(pid, self.__length)
+                self.histories[slot] = history
+
+            history.samples.append(sample)
+
+        # Scaled down
+        for slot in list(self.histories):
+            if slot >= len(pids):
+                del self.histories[slot]
+
+        return self.histories
@@ -0,0 +1,84 @@
+"""
+Where and how worker processes run.
+"""
+
+import enum
+import os
+
+
+class SchedulingClass(enum.Enum):
+    """
+    Linux scheduling class of a worker.
+
+    NORMAL: Time shared (SCHED_OTHER), ordered by nice value.
+    FIFO: Real-time (SCHED_FIFO), runs until it blocks or a higher priority is runnable.
+    ROUND_ROBIN: Real-time (SCHED_RR), FIFO with a time slice among equal priorities.
+    """
+
+    NORMAL = 0
+    FIFO = 1
+    ROUND_ROBIN = 2
+
+
+class WorkerScheduling:
+    """
+    CPU affinity, nice value and scheduling class of a worker, applied by `WorkerManager`
+    to each worker process when it starts or restarts.
+
+    Applied from main right after the process starts, to the process' main thread,
+    so threads the worker creates afterwards inherit it.
+    Real-time classes and negative nice values need root or CAP_SYS_NICE,
+    and a busy real-time worker can starve everything else on its CPUs.
+    """
+
+    def __init__(
+        self,
+        cpu_affinity: "set[int] | None" = None,
+        nice: int | None = None,
+        scheduling_class: SchedulingClass = SchedulingClass.NORMAL,
+        real_time_priority: int = 1,
+    ) -> None:
+        """
+        cpu_affinity: CPUs the worker may run on, None for the same as main.
+        nice: Nice value from -20 (most favourable) to 19, None for the same as main.
+            Ignored by real-time classes.
+        scheduling_class: Linux scheduling class.
+        real_time_priority: Priority within a real-time class, from 1 to 99.
+        """
+        self.cpu_affinity = cpu_affinity
+        self.nice = nice
+        self.scheduling_class = scheduling_class
+        self.real_time_priority = real_time_priority
+
+    def apply(self, pid: int) -> "list[str]":
+        """
+        Applies every setting to the process, continuing past settings that fail.
+
+        pid: Process ID of the worker.
+
+        Returns the reason of each setting that failed, empty if all were applied.
+        """
+        errors = []
+
+        if self.cpu_affinity is not None:
+            try:
+                os.sched_setaffinity(pid, self.cpu_affinity)
+            except (AttributeError, OSError, ValueError) as e:
+                errors.append(f"CPU affinity: {e}")
+
+        if self.nice is not None and self.scheduling_class == SchedulingClass.NORMAL:
+            try:
+                os.setpriority(os.PRIO_PROCESS, pid, self.nice)
+            except (AttributeError, OSError) as e:
+                errors.append(f"nice value: {e}")
+
+        if self.scheduling_class != SchedulingClass.NORMAL:
+            try:
+                policy = (
+                    os.SCHED_FIFO if self.scheduling_class == SchedulingClass.FIFO else os.SCHED_RR
+                )
+                os.sched_setscheduler(pid, policy, os.sched_param(self.real_time_priority))
+            except (AttributeError, OSError) as e:
+                errors.append(f"{self.scheduling_class.name} scheduling: {e}")
+
+        return errors
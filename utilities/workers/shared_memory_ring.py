@@ -0,0 +1,370 @@
+"""
+Shared memory ring buffer queue.
+"""
+
+import multiprocessing as mp
+import multiprocessing.shared_memory
+import multiprocessing.synchronize
+import os
+import pickle
+import queue
+import struct
+import time
+
+
+class SharedMemoryRing:  # pylint: disable=too-many-instance-attributes
+    """
+    Bounded multi-producer multi-consumer queue backed by shared memory.
+
+    Items are pickled into fixed-size slots of a ring. Each slot carries a sequence number
+    (seqlock style) so a slot is only read after it is fully written and only rewritten after
+    it is fully read. Index claims are guarded by short locks, there is no server process.
+
+    A process killed between claiming a slot and finishing it (e.g. by the watchdog) would
+    leave the next process on that slot waiting forever. Each claim records its process ID in
+    the slot, and a wait that outlasts the owner skips or takes over the abandoned slot.
+
+    Implements the subset of the `queue.Queue` interface used by the workers.
+    """
+
+    __POSITION_FORMAT = "=Q"
+    __POSITION_SIZE = struct.calcsize(__POSITION_FORMAT)
+    __LENGTH_FORMAT = "=I"
+    __HEADER_FORMAT = "=QQ"  # head, tail
+    # Each position is written alone under its own lock, never the whole header
+    __HEAD_OFFSET = 0
+    __TAIL_OFFSET = __POSITION_SIZE
+    __SLOT_HEADER_FORMAT = "=QIii"  # sequence, payload length, writer PID, reader PID
+    __PID_FORMAT = "=i"
+    __WRITER_PID_OFFSET = __POSITION_SIZE + struct.calcsize(__LENGTH_FORMAT)
+    __READER_PID_OFFSET = __WRITER_PID_OFFSET + struct.calcsize(__PID_FORMAT)
+    __HEADER_SIZE = struct.calcsize(__HEADER_FORMAT)
+    __SLOT_HEADER_SIZE = struct.calcsize(__SLOT_HEADER_FORMAT)
+    # A slot still unfinished after this long has its owner checked, a copy takes microseconds
+    __OWNER_CHECK_INTERVAL = 0.05  # seconds
+    # Waiting on an owner that is alive but slow, e.g. descheduled mid-copy
+    __SLOW_OWNER_DELAY = 0.001  # seconds
+
+    def __init__(self, maxsize: int, slot_size: int) -> None:
+        """
+        maxsize: Number of slots, must be greater than 0 .
+        slot_size: Maximum size of a pickled item in bytes, must be greater than 0 .
+        """
+        if maxsize <= 0:
+            raise ValueError(f"Shared memory ring requires maxsize > 0, got {maxsize}")
+
+        if slot_size <= 0:
+            raise ValueError(f"Shared memory ring requires slot_size > 0, got {slot_size}")
+
+        self.maxsize = maxsize
+        self.__slot_size = slot_size
+        self.__slot_stride = self.__SLOT_HEADER_SIZE + slot_size
+
+        self.__shared_memory = multiprocessing.shared_memory.SharedMemory(
+            create=True,
+            size=self.__HEADER_SIZE + maxsize * self.__slot_stride,
+        )
+
+        buffer = self.__shared_memory.buf
+        struct.pack_into(self.__HEADER_FORMAT, buffer, 0, 0, 0)
+        for i in range(maxsize):
+            # Slot i is free for the producer that claims position i
+            struct.pack_into(self.__SLOT_HEADER_FORMAT, buffer, self.__slot_offset(i), i, 0, 0, 0)
+
+        self.__head_lock = mp.Lock()
+        self.__tail_lock = mp.Lock()
+        self.__free_slots = mp.Semaphore(maxsize)
+        self.__filled_slots = mp.Semaphore(0)
+
+    def __slot_offset(self, position: int) -> int:
+        """
+        Byte offset of the slot for the position.
+        """
+        return self.__HEADER_SIZE + (position % self.maxsize) * self.__slot_stride
+
+    @staticmethod
+    def __is_process_alive(pid: int) -> bool:
+        """
+        Whether the process exists and has not exited. A killed process is a zombie until joined.
+        Without /proc processes are assumed alive.
+        """
+        try:
+            with open(f"/proc/{pid}/stat", encoding="utf-8") as stat_file:
+                stat = stat_file.read()
+        except OSError:
+            return not os.path.isdir("/proc")
+
+        # The command name in parentheses can contain spaces, the state follows it
+        return stat[stat.rfind(")") + 2] not in "ZX"
+
+    @staticmethod
+    def __get_deadline(block: bool, timeout: float | None) -> float | None:
+        """
+        Returns the time (time.monotonic()) the caller gives up at, None to wait forever.
+        """
+        if not block:
+            return time.monotonic()
+
+        if timeout is None:
+            return None
+
+        return time.monotonic() + timeout
+
+    def __wait_for_sequence(
+        self, offset: int, sequence: int, owner_pid_offset: int, deadline: float | None
+    ) -> bool:
+        """
+        Waits until the slot at offset has the sequence number.
+        Only happens when the process that claimed the slot before (its owner) is mid-copy.
+
+        owner_pid_offset: __WRITER_PID_OFFSET or __READER_PID_OFFSET of the owner.
+        deadline: Caller's deadline (time.monotonic()), the owner is checked at the latest then.
+
+        Returns False if the owner died instead, the slot is then abandoned.
+        """
+        buffer = self.__shared_memory.buf
+        if struct.unpack_from(self.__POSITION_FORMAT, buffer, offset)[0] == sequence:
+            return True
+
+        next_check_time = time.monotonic() + self.__OWNER_CHECK_INTERVAL
+        if deadline is not None:
+            next_check_time = min(next_check_time, deadline)
+
+        delay = 0.0
+        while struct.unpack_from(self.__POSITION_FORMAT, buffer, offset)[0] != sequence:
+            if time.monotonic() >= next_check_time:
+                (owner_pid,) = struct.unpack_from(
+                    self.__PID_FORMAT, buffer, offset + owner_pid_offset
+                )
+                if not self.__is_process_alive(owner_pid):
+                    return False
+
+                delay = self.__SLOW_OWNER_DELAY
+                next_check_time = time.monotonic() + self.__OWNER_CHECK_INTERVAL
+
+            time.sleep(delay)
+
+        return True
+
+    def __pickle(self, item: object) -> bytes:
+        """
+        Pickles the item and checks that it fits into a slot.
+        """
+        payload = pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.__slot_size:
+            raise ValueError(
+                f"Pickled item is {len(payload)} bytes, slot size is {self.__slot_size} bytes"
+            )
+
+        return payload
+
+    def __claim(
+        self, lock: "mp.synchronize.Lock", offset: int, count: int, owner_pid_offset: int
+    ) -> int:
+        """
+        Advances the head (__HEAD_OFFSET) or tail (__TAIL_OFFSET) by count
+        and records this process as the reader (__READER_PID_OFFSET)
+        or writer (__WRITER_PID_OFFSET) of the claimed slots.
+
+        Returns the first claimed position.
+        """
+        buffer = self.__shared_memory.buf
+        pid = os.getpid()
+        with lock:
+            first = struct.unpack_from(self.__POSITION_FORMAT, buffer, offset)[0]
+            # Before the claim, so that no claimed slot is without its owner
+            for position in range(first, first + count):
+                struct.pack_into(
+                    self.__PID_FORMAT, buffer, self.__slot_offset(position) + owner_pid_offset, pid
+                )
+
+            # Repacking both positions would overwrite a concurrent claim of the other one
+            struct.pack_into(self.__POSITION_FORMAT, buffer, offset, first + count)
+
+        return first
+
+    def __write(self, position: int, payload: bytes, deadline: float | None) -> None:
+        """
+        Writes the payload into the claimed position and publishes it.
+        Takes over the slot if its reader of the previous lap died before freeing it.
+        """
+        buffer = self.__shared_memory.buf
+        offset = self.__slot_offset(position)
+        if not self.__wait_for_sequence(offset, position, self.__READER_PID_OFFSET, deadline):
+            # Free the slot in place of the dead reader, or the ring loses it for good
+            self.__free_slots.release()
+
+        payload_offset = offset + self.__SLOT_HEADER_SIZE
+        buffer[payload_offset : payload_offset + len(payload)] = payload
+        struct.pack_into(self.__LENGTH_FORMAT, buffer, offset + self.__POSITION_SIZE, len(payload))
+        # Publish last, readers spin on the sequence and must not see it before the length
+        struct.pack_into(self.__POSITION_FORMAT, buffer, offset, position + 1)
+
+        self.__filled_slots.release()
+
+    def __read(self, position: int, deadline: float | None) -> "tuple[bool, object]":
+        """
+        Reads the item from the claimed position and frees the slot.
+
+        Returns False if the writer died before publishing, the slot is then skipped.
+        """
+        buffer = self.__shared_memory.buf
+        offset = self.__slot_offset(position)
+        if not self.__wait_for_sequence(offset, position + 1, self.__WRITER_PID_OFFSET, deadline):
+            # Free the slot in place of the dead writer
+            struct.pack_into(self.__POSITION_FORMAT, buffer, offset, position + self.maxsize)
+            self.__free_slots.release()
+            return False, None
+
+        (length,) = struct.unpack_from(self.__LENGTH_FORMAT, buffer, offset + self.__POSITION_SIZE)
+        payload_offset = offset + self.__SLOT_HEADER_SIZE
+        item = pickle.loads(buffer[payload_offset : payload_offset + length])
+        # Free the slot for the producer one lap ahead
+        struct.pack_into(self.__POSITION_FORMAT, buffer, offset, position + self.maxsize)
+
+        self.__free_slots.release()
+
+        return True, item
+
+    def __read_many(self, count: int, deadline: float | None) -> "list":
+        """
+        Claims and reads count positions. The filled slots were already acquired.
+
+        Returns the items, the positions of dead writers are replaced by the next ones.
+        """
+        items = []
+        while count > 0:
+            first = self.__claim(
+                self.__head_lock, self.__HEAD_OFFSET, count, self.__READER_PID_OFFSET
+            )
+            results = [self.__read(first + i, deadline) for i in range(count)]
+            items += [item for result, item in results if result]
+            count -= sum(1 for result, _ in results if result)
+
+        return items
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        """
+        Puts an item into the ring.
+
+        Raises `queue.Full` if no slot became free in time.
+        Raises `ValueError` if the pickled item does not fit into a slot.
+        """
+        payload = self.__pickle(item)
+        deadline = self.__get_deadline(block, timeout)
+
+        if not self.__free_slots.acquire(block, timeout):
+            raise queue.Full
+
+        position = self.__claim(self.__tail_lock, self.__TAIL_OFFSET, 1, self.__WRITER_PID_OFFSET)
+        self.__write(position, payload, deadline)
+
+    def get(self, block: bool = True, timeout: float | None = None) -> object:
+        """
+        Gets an item from the ring.
+
+        Raises `queue.Empty` if no item arrived in time.
+        """
+        deadline = self.__get_deadline(block, timeout)
+
+        if not self.__filled_slots.acquire(block, timeout):
+            raise queue.Empty
+
+        return self.__read_many(1, deadline)[0]
+
+    def put_many(self, items: "list", block: bool = True, timeout: float | None = None) -> int:
+        """
+        Puts items in order, waiting for space for up to timeout in total.
+        Free slots are claimed together so the tail lock is taken once per wait.
+
+        Returns the number of items put, the remaining items were not put.
+        Raises `ValueError` if a pickled item does not fit into a slot.
+        """
+        payloads = [self.__pickle(item) for item in items]
+        deadline = self.__get_deadline(block, timeout)
+
+        count = 0
+        while count < len(payloads):
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            if not self.__free_slots.acquire(block, remaining):
+                break
+
+            claimed = 1
+            while count + claimed < len(payloads) and self.__free_slots.acquire(False):
+                claimed += 1
+
+            first = self.__claim(
+                self.__tail_lock, self.__TAIL_OFFSET, claimed, self.__WRITER_PID_OFFSET
+            )
+            for i in range(claimed):
+                self.__write(first + i, payloads[count + i], deadline)
+
+            count += claimed
+
+        return count
+
+    def get_many(
+        self, max_items: int = 0, block: bool = True, timeout: float | None = None
+    ) -> "list":
+        """
+        Waits for up to timeout for at least 1 item, then gets everything available.
+        Filled slots are claimed together so the head lock is taken once.
+
+        max_items: Maximum number of items to get, `max_items <= 0` means no limit.
+
+        Returns the items, empty if none arrived in time.
+        """
+        deadline = self.__get_deadline(block, timeout)
+
+        if not self.__filled_slots.acquire(block, timeout):
+            return []
+
+        claimed = 1
+        while (max_items <= 0 or claimed < max_items) and self.__filled_slots.acquire(False):
+            claimed += 1
+
+        return self.__read_many(claimed, deadline)
+
+    def put_nowait(self, item: object) -> None:
+        """
+        Equivalent to put(item, False).
+        """
+        self.put(item, False)
+
+    def get_nowait(self) -> object:
+        """
+        Equivalent to get(False).
+        """
+        return self.get(False)
+
+    def qsize(self) -> int:
+        """
+        Approximate number of items, claimed positions are included.
+        """
+        head, tail = struct.unpack_from(self.__HEADER_FORMAT, self.__shared_memory.buf, 0)
+        return tail - head
+
+    def empty(self) -> bool:
+        """
+        Approximate check whether the ring is empty.
+        """
+        return self.qsize() <= 0
+
+    def full(self) -> bool:
+        """
+        Approximate check whether the ring is full.
+        """
+        return self.qsize() >= self.maxsize
+
+    def close(self) -> None:
+        """
+        Detaches this process from the shared memory.
+        """
+        self.__shared_memory.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory, call once from the creating process after all workers have stopped.
+        """
+        self.__shared_memory.close()
+        self.__shared_memory.unlink()
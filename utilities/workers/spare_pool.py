@@ -0,0 +1,91 @@
+"""
+Started workers waiting to replace a worker.
+"""
+
+import multiprocessing as mp
+
+from . import process_start
+from . import worker_controller
+
+
+class SpareWorker:
+    """
+    Started worker waiting for activation, with its controller.
+    """
+
+    def __init__(
+        self,
+        worker: mp.Process,
+        controller: worker_controller.WorkerController,
+        activation: process_start.WorkerActivation,
+    ) -> None:
+        self.worker = worker
+        self.controller = controller
+        self.activation = activation
+
+
+class SparePool:
+    """
+    Spare policy of a group of workers: keeps spare_count worker processes started ahead,
+    so that replacing a dead or stalled worker or scaling up skips process creation.
+    """
+
+    def __init__(
+        self,
+        spare_count: int,
+        create_spare: "() -> SpareWorker | None",  # type: ignore
+    ) -> None:
+        """
+        spare_count: Number of spare workers to keep started.
+        create_spare: Creates an unstarted spare worker, None if that failed.
+        """
+        self.__spare_count = spare_count
+        self.__create_spare = create_spare
+        self.__spare_workers: "list[SpareWorker]" = []
+
+    def replenish(self) -> bool:
+        """
+        Starts spare workers until there are spare_count.
+
+        Returns whether there are spare_count, False if creating a spare failed.
+        """
+        while len(self.__spare_workers) < self.__spare_count:
+            spare_worker = self.__create_spare()
+            if spare_worker is None:
+                return False
+
+            process_start.start_process(spare_worker.worker)
+            self.__spare_workers.append(spare_worker)
+
+        return True
+
+    def take(self) -> "SpareWorker | None":
+        """
+        Returns a started spare worker, None if there is none.
+        """
+        while len(self.__spare_workers) > 0:
+            spare_worker = self.__spare_workers.pop(0)
+            if spare_worker.worker.is_alive():
+                return spare_worker
+
+            spare_worker.worker.join()
+
+        return None
+
+    def cancel(self) -> None:
+        """
+        Lets every spare worker exit without running, spares do not check the controller.
+        """
+        for spare_worker in self.__spare_workers:
+            spare_worker.activation.cancel()
+
+    def join(self, timeout: float | None = None) -> None:
+        """
+        Joins the cancelled spare workers and forgets them.
+
+        timeout: Time in seconds to wait for each spare, None to wait forever.
+        """
+        for spare_worker in self.__spare_workers:
+            spare_worker.worker.join(timeout)
+
+        self.__spare_workers = []
@@ -0,0 +1,225 @@
+"""
+Restart decisions for dead workers.
+"""
+
+import collections
+import enum
+import random
+import time
+
+from . import execution_mode
+
+
+class RestartPolicy(enum.Enum):
+    """
+    Which dead workers are restarted.
+
+    ALWAYS: Every dead worker.
+    ON_FAILURE: Workers that exited with a non-zero exit code or were killed by a signal.
+    NEVER: None.
+    """
+
+    ALWAYS = 0
+    ON_FAILURE = 1
+    NEVER = 2
+
+
+class WorkerState:  # pylint: disable=too-many-instance-attributes
+    """
+    Restart history of the worker in a slot.
+    """
+
+    def __init__(self, slot: int) -> None:
+        self.slot = slot
+        self.restart_count = 0
+        # s, time.monotonic(), None if not started yet
+        self.start_time: float | None = None
+        self.exit_code: int | None = None
+        self.consecutive_failures = 0
+        # s, time.monotonic(), None while the worker is running
+        self.next_restart_time: float | None = None
+        self.is_crash_looping = False
+        self.is_stopped = False
+        self.recent_restart_times: "collections.deque[float]" = collections.deque()
+
+    def get_uptime(self) -> float:
+        """
+        Returns the time in seconds since the current worker process started, 0 if not running.
+        """
+        if self.start_time is None or self.next_restart_time is not None or self.is_stopped:
+            return 0.0
+
+        return time.monotonic() - self.start_time
+
+    def __str__(self) -> str:
+        if self.is_crash_looping:
+            status = "crash looping"
+        elif self.is_stopped:
+            status = f"stopped (exit code {self.exit_code})"
+        elif self.next_restart_time is not None:
+            status = f"restarting in {max(self.next_restart_time - time.monotonic(), 0.0):.3f}s"
+        else:
+            status = f"up {self.get_uptime():.1f}s"
+
+        return f"slot {self.slot}: {status}, restarts: {self.restart_count}"
+
+
+class RestartSupervisor:  # pylint: disable=too-many-instance-attributes
+    """
+    Decides when dead workers are restarted, without ever sleeping.
+
+    Consecutive failures back off exponentially with jitter, so workers that die at once
+    do not restart in lockstep. A worker that ran for at least stable_time before dying
+    starts over at the initial backoff. A worker restarted crash_loop_restarts times
+    within crash_loop_window is crash looping and is not restarted anymore.
+    """
+
+    def __init__(
+        self,
+        worker_count: int,
+        policy: RestartPolicy = RestartPolicy.ALWAYS,
+        initial_backoff: float = 0.1,
+        max_backoff: float = 10.0,
+        jitter: float = 0.2,
+        stable_time: float = 10.0,
+        crash_loop_restarts: int = 5,
+        crash_loop_window: float = 30.0,
+    ) -> None:
+        """
+        worker_count: Number of worker slots.
+        policy: Which dead workers are restarted.
+        initial_backoff: Delay in seconds before the first restart after a failure.
+        max_backoff: Maximum delay in seconds, the delay doubles per consecutive failure.
+        jitter: Fraction of the delay added or removed at random.
+        stable_time: Uptime in seconds after which a failure is not consecutive anymore.
+        crash_loop_restarts: Restarts within crash_loop_window that stop restarting,
+            `crash_loop_restarts <= 0` means never.
+        crash_loop_window: Time in seconds.
+        """
+        self.policy = policy
+        self.__initial_backoff = initial_backoff
+        self.__max_backoff = max_backoff
+        self.__jitter = jitter
+        self.__stable_time = stable_time
+        self.__crash_loop_restarts = crash_loop_restarts
+        self.__crash_loop_window = crash_loop_window
+        self.__states = [WorkerState(slot) for slot in range(worker_count)]
+
+    def get_states(self) -> "list[WorkerState]":
+        """
+        Returns the state of each worker slot.
+        """
+        return self.__states
+
+    def resize(self, slot_count: int) -> None:
+        """
+        Adds fresh slots or removes the last slots, for a changed number of workers.
+        """
+        del self.__states[slot_count:]
+        self.__states.extend(WorkerState(slot) for slot in range(len(self.__states), slot_count))
+
+    def record_start(self, slot: int, is_restart: bool) -> None:
+        """
+        The worker in the slot was started.
+
+        is_restart: Whether it replaces a dead or stalled worker.
+        """
+        state = self.__states[slot]
+        now = time.monotonic()
+        state.start_time = now
+        state.next_restart_time = None
+        state.exit_code = None
+        state.is_stopped = False
+
+        if is_restart:
+            state.restart_count += 1
+            state.recent_restart_times.append(now)
+        else:
+            # Deliberate start, a crash loop is over
+            state.is_crash_looping = False
+            state.consecutive_failures = 0
+            state.recent_restart_times.clear()
+
+    def record_exit(self, slot: int, exit_code: int | None) -> None:
+        """
+        The worker in the slot was found dead, schedules its restart.
+        Does nothing if already recorded.
+
+        exit_code: Exit code of the process, negative if killed by a signal.
+        """
+        state = self.__states[slot]
+        if state.start_time is None or state.next_restart_time is not None or state.is_stopped:
+            return
+
+        now = time.monotonic()
+        state.exit_code = exit_code
+
+        is_failure = exit_code != 0
+        if self.policy == RestartPolicy.NEVER or (
+            self.policy == RestartPolicy.ON_FAILURE and not is_failure
+        ):
+            state.is_stopped = True
+            return
+
+        # Crash loop breaker
+        while (
+            len(state.recent_restart_times) > 0
+            and now - state.recent_restart_times[0] > self.__crash_loop_window
+        ):
+            state.recent_restart_times.popleft()
+
+        if 0 < self.__crash_loop_restarts <= len(state.recent_restart_times):
+            state.is_crash_looping = True
+            state.is_stopped = True
+            return
+
+        if now - state.start_time >= self.__stable_time:
+            state.consecutive_failures = 0
+
+        backoff = min(
+            self.__initial_backoff * 2**state.consecutive_failures,
+            self.__max_backoff,
+        )
+        backoff *= 1.0 + random.uniform(-self.__jitter, self.__jitter)
+        state.consecutive_failures += 1
+        state.next_restart_time = now + backoff
+
+    def is_restart_due(self, slot: int) -> bool:
+        """
+        Returns whether the dead worker in the slot should be restarted now.
+        """
+        state = self.__states[slot]
+        return state.next_restart_time is not None and time.monotonic() >= state.next_restart_time
+
+    def check_workers(
+        self, workers: "list[execution_mode.Worker]"
+    ) -> "tuple[list[int], list[int]]":
+        """
+        Records the exits of started workers found dead since the previous check.
+
+        workers: Worker of each slot.
+
+        Returns the slots whose exit was just recorded and the slots due for a restart now.
+        """
+        exited_slots = []
+        due_slots = []
+        for slot, worker in enumerate(workers):
+            state = self.__states[slot]
+            # Not started yet or running
+            if state.start_time is None or worker.is_alive():
+                continue
+
+            if state.next_restart_time is None and not state.is_stopped:
+                self.record_exit(slot, worker.exitcode)
+                exited_slots.append(slot)
+
+            if self.is_restart_due(slot):
+                due_slots.append(slot)
+
+        return exited_slots, due_slots
+
+    def is_crash_looping(self) -> bool:
+        """
+        Returns whether a worker stopped being restarted because it was crash looping.
+        """
+        return any(state.is_crash_looping for state in self.__states)
@@ -0,0 +1,140 @@
+"""
+Liveness tracking for hung workers.
+"""
+
+import multiprocessing as mp
+import time
+
+from . import execution_mode
+
+
+class StallStats:
+    """
+    Stalls detected by a watchdog.
+    """
+
+    def __init__(self) -> None:
+        self.stall_count = 0
+        self.longest_stall_time = 0.0  # s
+        self.total_stall_time = 0.0  # s
+
+    def record_stall(self, stall_time: float) -> None:
+        """
+        stall_time: Time in seconds since the stalled worker's last beat.
+        """
+        self.stall_count += 1
+        self.longest_stall_time = max(self.longest_stall_time, stall_time)
+        self.total_stall_time += stall_time
+
+    def __str__(self) -> str:
+        return (
+            f"stalls: {self.stall_count}, longest: {self.longest_stall_time:.3f}s, "
+            f"total: {self.total_stall_time:.3f}s"
+        )
+
+
+class Watchdog:
+    """
+    Per worker timestamp of its last loop iteration, in shared memory.
+
+    Workers beat through their controller every time they check it (see
+    `WorkerController.attach_watchdog()`), so workers need no changes. A worker that has
+    not beaten for longer than the deadline is stalled, e.g. stuck in a blocking call.
+    A worker idly waiting for input also does not beat, so workers should wait with
+    a timeout much shorter than the deadline and check their controller in between.
+    """
+
+    def __init__(self, slot_count: int, deadline: float) -> None:
+        """
+        slot_count: Number of workers, one slot each.
+        deadline: Time in seconds without a beat after which a worker is stalled.
+        """
+        self.deadline = deadline
+        # Written by the worker, read by main
+        self.__timestamps = mp.RawArray("d", slot_count)
+        for slot in range(slot_count):
+            self.__timestamps[slot] = time.monotonic()
+
+        # Only used by main
+        self.stats = StallStats()
+
+    def beat(self, slot: int) -> None:
+        """
+        Records that the worker in the slot is alive. A plain shared memory write.
+        """
+        self.__timestamps[slot] = time.monotonic()
+
+    def get_stall_time(self, slot: int) -> float:
+        """
+        Returns the time in seconds since the worker in the slot last beat.
+        """
+        return time.monotonic() - self.__timestamps[slot]
+
+    def get_stall_times(self) -> "list[float]":
+        """
+        Returns the time in seconds since the last beat of each worker.
+        """
+        now = time.monotonic()
+        return [now - timestamp for timestamp in self.__timestamps]
+
+    def is_stalled(self, slot: int) -> bool:
+        """
+        Returns whether the worker in the slot missed the deadline.
+        """
+        return self.get_stall_time(slot) > self.deadline
+
+
+class StallMonitor:
+    """
+    Stall policy of a group of workers: which stalled workers to kill and restart.
+
+    Thread workers cannot be killed, so their stalls are only reported, once per stall.
+    Asyncio workers are killed by cancelling them, which only ends them at an await.
+    """
+
+    def __init__(self, worker_watchdog: Watchdog) -> None:
+        self.watchdog = worker_watchdog
+        # Stalled thread workers, already reported
+        self.__unkillable_stalled_slots: "set[int]" = set()
+
+    def check_workers(
+        self, workers: "list[execution_mode.Worker]"
+    ) -> "tuple[list[int], list[int]]":
+        """
+        Finds the live workers that missed the deadline and records their stalls.
+
+        workers: Worker of each slot.
+
+        Returns the stalled slots to kill and restart,
+        and the slots of thread workers that just stalled.
+        """
+        # Scaled down
+        self.__unkillable_stalled_slots = {
+            slot for slot in self.__unkillable_stalled_slots if slot < len(workers)
+        }
+
+        kill_slots = []
+        unkillable_slots = []
+        for slot, worker in enumerate(workers):
+            if not worker.is_alive() or not self.watchdog.is_stalled(slot):
+                self.__unkillable_stalled_slots.discard(slot)
+                continue
+
+            if isinstance(worker, execution_mode.ThreadWorker):
+                if slot in self.__unkillable_stalled_slots:
+                    continue
+
+                self.__unkillable_stalled_slots.add(slot)
+                unkillable_slots.append(slot)
+            else:
+                kill_slots.append(slot)
+
+            self.watchdog.stats.record_stall(self.watchdog.get_stall_time(slot))
+
+        return kill_slots, unkillable_slots
+
+    def has_unkillable_stall(self) -> bool:
+        """
+        Returns whether a thread worker is still stalled.
+        """
+        return len(self.__unkillable_stalled_slots) > 0
@@ -3,65 +3,260 @@ For controlling workers.
 """
 
 import multiprocessing as mp
+import os
 import time
 
+from . import watchdog
 
-class WorkerController:
+
+class WorkerController:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
+
+    Requests are bits of a flag word in shared memory, so the checks workers do every loop
+    iteration are a plain memory read. Only a paused worker sleeps, on a condition.
+
+    Worker processes acknowledge an exit request the first time they see it
+    (or when they return, see `worker_manager.run_worker()`), so main can wait
+    for exactly as long as the workers take instead of a fixed delay.
+
+    Controllers form a hierarchy: a child (e.g. per stage, see `create_child()`) is paused
+    or exiting if it or any ancestor is, so a single stage can be paused or restarted
+    while requests to the root still reach every worker.
     """
 
-    __QUEUE_DELAY = 0.1  # seconds
+    __EXIT = 0x1
+    __PAUSE = 0x2
+    # Paused workers still beat their watchdog this often
+    __PAUSE_BEAT_INTERVAL = 0.1  # seconds
+
+    def __init__(self, parent: "WorkerController | None" = None) -> None:
+        """
+        Constructor creates the shared flags and the condition paused workers wait on.
+
+        parent: Controller whose requests also apply to this one, None for a root.
+        """
+        self.__parent = parent
+        self.__flags = mp.RawValue("i", 0)
+        # Serializes flag updates and wakes paused workers and main waiting for acknowledgements
+        # Shared by the whole hierarchy so that a request to an ancestor wakes every waiter
+        # Private to the same class
+        # pylint: disable-next=protected-access
+        self.__condition = mp.Condition() if parent is None else parent.__condition
+
+        # Each exit request is a new generation, acknowledgements count for the current one
+        self.__exit_generation = mp.RawValue("i", 0)
+        self.__acknowledged_count = mp.RawValue("i", 0)
+        self.__worker_count = mp.RawValue("i", 0)
+        # This controller, then its ancestors
+        # Private to the same class
+        # pylint: disable-next=protected-access
+        self.__lineage = [self] + ([] if parent is None else parent.__lineage)
+        # Per worker (each uses its own controller, see `WorkerManager`),
+        # generation of each controller of the lineage last acknowledged
+        self.__acknowledged_generations = [0] * len(self.__lineage)
+        # Main does not acknowledge, unless it runs the worker in a thread
+        self.__owner_pid = os.getpid()
+        self.__is_worker = False
+
+        # Per process, set in the worker
+        self.__watchdog: "watchdog.Watchdog | None" = None
+        self.__watchdog_slot = 0
+
+        # s, time.monotonic() of the worker's first check, 0 if none yet
+        self.__first_check_time = mp.RawValue("d", 0.0)
+        # Per process, only the worker records
+        self.__is_first_check_pending = False
+
+    def attach_watchdog(self, worker_watchdog: watchdog.Watchdog, slot: int) -> None:
+        """
+        Makes every check in this worker process beat the watchdog slot.
+        Done in the worker process by `worker_manager.run_worker()`.
+        """
+        self.__watchdog = worker_watchdog
+        self.__watchdog_slot = slot
+        worker_watchdog.beat(slot)
+
+    def mark_worker_started(self) -> None:
+        """
+        Makes the next check of this worker record the time of its first loop
+        iteration, see `get_first_check_time()`. Also lets a worker running in a thread
+        of main acknowledge exit requests.
+        Done in the worker by `worker_manager.run_worker()`.
+        """
+        self.__is_first_check_pending = True
+        self.__is_worker = True
+
+    def get_first_check_time(self) -> float:
+        """
+        Returns the time (time.monotonic()) of the first check of the latest worker
+        process started with this controller, 0 if it has not checked yet.
+        """
+        return self.__first_check_time.value
+
+    def reset_first_check_time(self) -> None:
+        """
+        Forgets the first check of the previous worker process, before starting another.
+        """
+        self.__first_check_time.value = 0.0
+
+    def __beat(self) -> None:
+        """
+        Records that this worker process is alive, if it has a watchdog.
+        """
+        if self.__is_first_check_pending:
+            self.__first_check_time.value = time.monotonic()
+            self.__is_first_check_pending = False
+
+        if self.__watchdog is not None:
+            self.__watchdog.beat(self.__watchdog_slot)
+
+    def create_child(self) -> "WorkerController":
+        """
+        Returns a new controller that inherits the requests of this one.
+        """
+        return WorkerController(self)
+
+    def __is_set(self, flag: int) -> bool:
+        """
+        Whether the flag is set on this controller or any ancestor.
+        """
+        for controller in self.__lineage:
+            # Private to the same class
+            # pylint: disable-next=protected-access
+            if controller.__flags.value & flag != 0:
+                return True
+
+        return False
 
-    def __init__(self) -> None:
+    def __set_flag(self, flag: int, is_set: bool) -> None:
         """
-        Constructor creates internal queue and semaphore.
+        Sets or clears the flag and wakes paused workers to recheck.
         """
-        self.__pause = mp.BoundedSemaphore(1)
-        self.__is_paused = False
-        self.__exit_queue = mp.Queue(1)
+        with self.__condition:
+            if is_set:
+                self.__flags.value |= flag
+            else:
+                self.__flags.value &= ~flag
+
+            self.__condition.notify_all()
 
     def request_pause(self) -> None:
         """
-        Requests worker processes to pause.
+        Requests worker processes of this controller and its descendants to pause.
         """
-        if not self.__is_paused:
-            self.__pause.acquire()
-            self.__is_paused = True
+        self.__set_flag(self.__PAUSE, True)
 
     def request_resume(self) -> None:
         """
-        Requests worker processes to resume.
+        Requests worker processes to resume, unless an ancestor still requests a pause.
         """
-        if self.__is_paused:
-            self.__pause.release()
-            self.__is_paused = False
+        self.__set_flag(self.__PAUSE, False)
 
     def check_pause(self) -> None:
         """
         Blocks worker if main has requested it to pause, otherwise continues.
+        Also continues once exit is requested, so paused workers can shut down.
         """
-        self.__pause.acquire()
-        self.__pause.release()
+        self.__beat()
+        if not self.__is_set(self.__PAUSE):
+            return
+
+        # A paused worker is not stalled
+        while not self.__wait_for_resume(self.__PAUSE_BEAT_INTERVAL):
+            self.__beat()
+
+        self.__beat()
+
+    def __wait_for_resume(self, timeout: float) -> bool:
+        """
+        Returns whether pause was lifted or exit was requested within timeout.
+        """
+        with self.__condition:
+            return self.__condition.wait_for(
+                lambda: not self.__is_set(self.__PAUSE) or self.__is_set(self.__EXIT),
+                timeout,
+            )
+
+    def add_workers(self, count: int) -> None:
+        """
+        Registers worker processes that acknowledge exit requests,
+        for this controller and its ancestors. Done by `WorkerManager` for its workers.
+        """
+        with self.__condition:
+            self.__worker_count.value += count
+
+        if self.__parent is not None:
+            self.__parent.add_workers(count)
 
     def request_exit(self) -> None:
         """
-        Requests worker processes to exit.
+        Requests worker processes of this controller and its descendants to exit.
         Does nothing if already requested.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if self.__exit_queue.empty():
-            self.__exit_queue.put(None)
+        with self.__condition:
+            if self.__flags.value & self.__EXIT != 0:
+                return
+
+            self.__exit_generation.value += 1
+            self.__acknowledged_count.value = 0
+            self.__flags.value |= self.__EXIT
+            self.__condition.notify_all()
+
+    def acknowledge_exit(self) -> None:
+        """
+        Confirms that this worker saw the exit requests of this controller
+        and its ancestors. Does nothing for controllers without an exit request,
+        if already acknowledged, or in main outside of a worker thread.
+        """
+        if not self.__is_worker and os.getpid() == self.__owner_pid:
+            return
+
+        for depth, controller in enumerate(self.__lineage):
+            # Private to the same class
+            # pylint: disable=protected-access
+            if (
+                controller.__flags.value & self.__EXIT == 0
+                or self.__acknowledged_generations[depth] == controller.__exit_generation.value
+            ):
+                continue
+
+            with self.__condition:
+                self.__acknowledged_generations[depth] = controller.__exit_generation.value
+                controller.__acknowledged_count.value += 1
+                self.__condition.notify_all()
+            # pylint: enable=protected-access
+
+    def wait_for_all_acknowledged(self, timeout: float | None = None) -> bool:
+        """
+        Waits until every registered worker acknowledged the exit request of this controller,
+        including the workers of descendants.
+        A worker that died before the request never acknowledges it.
+
+        timeout: Time in seconds to wait, None to wait forever.
+
+        Returns whether all workers acknowledged in time, False if exit is not requested.
+        """
+        with self.__condition:
+            return self.__condition.wait_for(
+                lambda: self.__flags.value & self.__EXIT != 0
+                and self.__acknowledged_count.value >= self.__worker_count.value,
+                timeout,
+            )
+
+    def get_acknowledged_count(self) -> int:
+        """
+        Returns the number of workers that acknowledged the current exit request.
+        """
+        return self.__acknowledged_count.value
 
     def clear_exit(self) -> None:
         """
-        Clears the exit request condition.
+        Clears the exit request condition of this controller, not of its ancestors.
         Does nothing if already cleared.
         """
-        time.sleep(self.__QUEUE_DELAY)
-        if not self.__exit_queue.empty():
-            _ = self.__exit_queue.get()
+        self.__set_flag(self.__EXIT, False)
 
     def is_exit_requested(self) -> bool:
         """
@@ -69,4 +264,10 @@ class WorkerController:
         There is a race condition, but it's fine because the worker process
         will do at most 1 additional loop.
         """
-        return not self.__exit_queue.empty()
+        self.__beat()
+
+        if not self.__is_set(self.__EXIT):
+            return False
+
+        self.acknowledge_exit()
+        return True
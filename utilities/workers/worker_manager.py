@@ -3,13 +3,79 @@ For managing workers.
 """
 
 import multiprocessing as mp
+import time
 
 from modules.common.modules.logger import logger
+from utilities.workers import autoscaler
+from utilities.workers import execution_mode
+from utilities.workers import process_start
 from utilities.workers import worker_controller
 from utilities.workers import queue_proxy_wrapper
+from utilities.workers import resource_usage
+from utilities.workers import scheduling
+from utilities.workers import spare_pool
+from utilities.workers import supervisor
+from utilities.workers import watchdog
 
 
-class WorkerProperties:
+# Anything a worker runs in
+Worker = execution_mode.Worker
+
+
+def run_worker(
+    target: "(...) -> object",  # type: ignore
+    args: "tuple",
+    controller: worker_controller.WorkerController,
+    worker_watchdog: "watchdog.Watchdog | None" = None,
+    watchdog_slot: int = 0,
+    activation: "process_start.WorkerActivation | None" = None,
+) -> None:
+    """
+    Process target: runs the worker function, then acknowledges a pending exit request
+    in case the worker returned without checking it (e.g. on a queue sentinel).
+
+    worker_watchdog: If not None, every controller check beats watchdog_slot.
+    activation: If not None, the process is a spare that first waits to be activated,
+        then runs as the slot it is given instead of watchdog_slot.
+    """
+    if activation is not None:
+        watchdog_slot = activation.wait()
+        if watchdog_slot < 0:
+            return
+
+    controller.mark_worker_started()
+
+    if worker_watchdog is not None:
+        controller.attach_watchdog(worker_watchdog, watchdog_slot)
+
+    try:
+        target(*args)
+    finally:
+        controller.acknowledge_exit()
+
+
+async def run_async_worker(
+    target: "(...) -> object",  # type: ignore
+    args: "tuple",
+    controller: worker_controller.WorkerController,
+    worker_watchdog: "watchdog.Watchdog | None" = None,
+    watchdog_slot: int = 0,
+) -> None:
+    """
+    Task for `ExecutionMode.ASYNCIO`: `run_worker()` for a coroutine function target.
+    """
+    controller.mark_worker_started()
+
+    if worker_watchdog is not None:
+        controller.attach_watchdog(worker_watchdog, watchdog_slot)
+
+    try:
+        await target(*args)
+    finally:
+        controller.acknowledge_exit()
+
+
+class WorkerProperties:  # pylint: disable=too-many-instance-attributes
     """
     Worker Properties.
     """
@@ -26,6 +92,8 @@ class WorkerProperties:
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
         local_logger: logger.Logger,
+        worker_scheduling: scheduling.WorkerScheduling | None = None,
+        worker_execution_mode: execution_mode.ExecutionMode = execution_mode.ExecutionMode.PROCESS,
     ) -> "tuple[bool, WorkerProperties | None]":
         """
         Creates worker properties.
@@ -37,6 +105,10 @@ class WorkerProperties:
         output_queues: Output queues.
         controller: Worker controller.
         local_logger: Existing logger from process.
+        worker_scheduling: CPU affinity, nice value and scheduling class of every worker,
+            None for the same as main. Only for processes, threads and tasks share main's.
+        worker_execution_mode: Whether the workers run as processes, threads of main
+            or tasks of main (target must then be a coroutine function).
 
         Returns the WorkerProperties object.
         """
@@ -47,6 +119,18 @@ class WorkerProperties:
             )
             return False, None
 
+        # Scheduling is applied to the worker process, threads and tasks would silently ignore it
+        if (
+            worker_scheduling is not None
+            and worker_execution_mode != execution_mode.ExecutionMode.PROCESS
+        ):
+            local_logger.error(
+                f"Worker scheduling requires {execution_mode.ExecutionMode.PROCESS.name} workers, "
+                f"got {worker_execution_mode.name}",
+                True,
+            )
+            return False, None
+
         return True, WorkerProperties(
             cls.__create_key,
             count,
@@ -55,6 +139,8 @@ class WorkerProperties:
             input_queues,
             output_queues,
             controller,
+            worker_scheduling,
+            worker_execution_mode,
         )
 
     def __init__(
@@ -66,6 +152,8 @@ class WorkerProperties:
         input_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         output_queues: "list[queue_proxy_wrapper.QueueProxyWrapper]",
         controller: worker_controller.WorkerController,
+        worker_scheduling: scheduling.WorkerScheduling | None,
+        worker_execution_mode: execution_mode.ExecutionMode,
     ) -> None:
         """
         Private constructor, use create() method.
@@ -78,18 +166,27 @@ class WorkerProperties:
         self.__input_queues = input_queues
         self.__output_queues = output_queues
         self.__controller = controller
+        self.__scheduling = worker_scheduling
+        self.__execution_mode = worker_execution_mode
 
-    def get_worker_arguments(self) -> "tuple":
+    def get_worker_arguments(
+        self, controller: "worker_controller.WorkerController | None" = None
+    ) -> "tuple":
         """
         Concatenates the worker properties into a tuple.
 
+        controller: Controller passed to the worker instead, e.g. a child of the worker controller.
+
         Returns the worker properties as a tuple.
         """
+        if controller is None:
+            controller = self.__controller
+
         return (
             self.__work_arguments
             + tuple(self.__input_queues)
             + tuple(self.__output_queues)
-            + (self.__controller,)
+            + (controller,)
         )
 
     def get_worker_count(self) -> int:
@@ -104,6 +201,24 @@ class WorkerProperties:
         """
         return self.__target
 
+    def get_controller(self) -> worker_controller.WorkerController:
+        """
+        Returns the worker controller.
+        """
+        return self.__controller
+
+    def get_scheduling(self) -> scheduling.WorkerScheduling | None:
+        """
+        Returns the scheduling of the workers, None for the same as main.
+        """
+        return self.__scheduling
+
+    def get_execution_mode(self) -> execution_mode.ExecutionMode:
+        """
+        Returns what runs the workers.
+        """
+        return self.__execution_mode
+
     def get_input_queues(self) -> "list[queue_proxy_wrapper.QueueProxyWrapper]":
         """
         Returns the input queues.
@@ -117,10 +232,18 @@ class WorkerProperties:
         return self.__target.__name__
 
 
-class WorkerManager:
+class WorkerManager:  # pylint: disable=too-many-instance-attributes
     """
     For interprocess communication from main to worker.
     Contains exit and pause requests.
+
+    Each worker gets its own child of the worker controller, so a single worker can be
+    retired when scaling down while requests to the worker controller reach every worker.
+
+    The manager starts, joins and replaces workers. When to restart, what counts as
+    stalled, when to scale and how many spares to keep are decided by
+    `supervisor.RestartSupervisor`, `watchdog.StallMonitor`, `autoscaler.Autoscaler`
+    and `spare_pool.SparePool`.
     """
 
     __create_key = object()
@@ -130,40 +253,120 @@ class WorkerManager:
         cls,
         worker_properties: WorkerProperties,
         local_logger: logger.Logger,
+        stall_deadline: float = 0.0,
+        restart_supervisor: "supervisor.RestartSupervisor | None" = None,
+        worker_autoscaler: autoscaler.Autoscaler | None = None,
+        spare_count: int = 0,
+        resource_history_length: int = 60,
     ) -> "tuple[bool, WorkerManager | None]":
         """
         Create identical workers and append them to a workers list.
 
         worker_properties: Worker properties.
         local_logger: Existing logger from process.
+        stall_deadline: If greater than 0, time in seconds without a controller check
+            after which a worker is considered hung, see `check_and_restart_stalled_workers()`.
+        restart_supervisor: Decides when dead workers are restarted, one slot per worker.
+            None to always restart with the default backoff.
+        worker_autoscaler: Scales the number of workers, see `check_and_scale_workers()`.
+            None for a fixed number of workers. Requires input queues with statistics.
+        spare_count: Number of workers started ahead, waiting to replace a dead or stalled
+            worker or to scale up without the delay of starting a process.
+        resource_history_length: Number of resource usage samples kept per worker,
+            see `sample_resource_usage()`.
 
         Returns whether the workers were able to be created and the Worker Manager.
         """
+        slot_count = worker_properties.get_worker_count()
+        if worker_autoscaler is not None:
+            if not (
+                worker_autoscaler.min_workers
+                <= worker_properties.get_worker_count()
+                <= worker_autoscaler.max_workers
+            ):
+                local_logger.error(
+                    f"Worker count {worker_properties.get_worker_count()} is outside "
+                    f"the autoscaler bounds {worker_autoscaler.min_workers} "
+                    f"to {worker_autoscaler.max_workers}",
+                    True,
+                )
+                return False, None
+
+            # Mailboxes and broadcast subscriptions do not keep statistics to scale on
+            input_queues = worker_properties.get_input_queues()
+            if len(input_queues) == 0 or not all(
+                hasattr(input_queue, "get_stats") for input_queue in input_queues
+            ):
+                local_logger.error(
+                    f"Autoscaling {worker_properties.get_target_name()} requires "
+                    "input queues with statistics",
+                    True,
+                )
+                return False, None
+
+            slot_count = worker_autoscaler.max_workers
+
+        stall_monitor = None
+        if stall_deadline > 0.0:
+            stall_monitor = watchdog.StallMonitor(watchdog.Watchdog(slot_count, stall_deadline))
+
         workers = []
-        for _ in range(0, worker_properties.get_worker_count()):
+        worker_controllers = []
+        for slot in range(0, worker_properties.get_worker_count()):
+            controller = worker_properties.get_controller().create_child()
             result, worker = WorkerManager.__create_single_worker(
-                worker_properties.get_worker_target(),
-                worker_properties.get_worker_arguments(),
+                worker_properties,
                 local_logger,
+                None if stall_monitor is None else stall_monitor.watchdog,
+                slot,
+                controller,
             )
             if not result:
                 local_logger.error("Failed to create worker", True)
                 return False, None
 
             workers.append(worker)
+            worker_controllers.append(controller)
+
+        # Each worker consumes its input queues and gets a sentinel when they are closed
+        for input_queue in worker_properties.get_input_queues():
+            input_queue.add_consumers(worker_properties.get_worker_count())
+
+        # Each worker acknowledges exit requests
+        for controller in worker_controllers:
+            controller.add_workers(1)
+
+        if restart_supervisor is None:
+            restart_supervisor = supervisor.RestartSupervisor(worker_properties.get_worker_count())
+
+        # Only processes have spares
+        if worker_properties.get_execution_mode() != execution_mode.ExecutionMode.PROCESS:
+            spare_count = 0
 
         return True, WorkerManager(
             cls.__create_key,
             workers,
+            worker_controllers,
             worker_properties,
+            stall_monitor,
+            restart_supervisor,
+            worker_autoscaler,
+            spare_count,
+            resource_history_length,
             local_logger,
         )
 
     def __init__(
         self,
         class_private_create_key: object,
-        workers: "list[mp.Process]",
+        workers: "list[Worker]",
+        worker_controllers: "list[worker_controller.WorkerController]",
         worker_properties: WorkerProperties,
+        stall_monitor: "watchdog.StallMonitor | None",
+        restart_supervisor: supervisor.RestartSupervisor,
+        worker_autoscaler: autoscaler.Autoscaler | None,
+        spare_count: int,
+        resource_history_length: int,
         local_logger: logger.Logger,
     ) -> None:
         """
@@ -172,22 +375,81 @@ class WorkerManager:
         assert class_private_create_key is WorkerManager.__create_key, "Use create() method"
 
         self.__workers = workers
+        self.__worker_controllers = worker_controllers
         self.__worker_properties = worker_properties
+        self.__stall_monitor = stall_monitor
+        self.__watchdog = None if stall_monitor is None else stall_monitor.watchdog
+        self.__supervisor = restart_supervisor
+        self.__autoscaler = worker_autoscaler
         self.__local_logger = local_logger
+        self.__retiring_workers = autoscaler.RetiringWorkers()
+        self.__spare_pool = spare_pool.SparePool(spare_count, self.__create_spare_worker)
+        # A started process drops its arguments, a spawned spare still unpickling its
+        # activation needs it alive
+        self.__activations: "dict[int, process_start.WorkerActivation]" = {}
+        # s, time.monotonic() each slot's worker was started or activated
+        self.__launch_times: "dict[int, float]" = {}
+        # Slots whose worker has not reported its first loop iteration yet
+        self.__pending_startup_slots: "set[int]" = set()
+        self.__resource_sampler = resource_usage.ResourceSampler(resource_history_length)
 
     @staticmethod
-    def __create_single_worker(target: "(...) -> object", args: "tuple", local_logger: logger.Logger) -> "tuple[bool, mp.Process | None]":  # type: ignore
+    def __create_single_worker(
+        worker_properties: WorkerProperties,
+        local_logger: logger.Logger,
+        worker_watchdog: "watchdog.Watchdog | None",
+        slot: int,
+        controller: worker_controller.WorkerController,
+        activation: "process_start.WorkerActivation | None" = None,
+    ) -> "tuple[bool, Worker | None]":
         """
         Creates a single worker.
 
-        target: Function.
-        args: Target function arguments.
+        worker_properties: Worker properties.
         local_logger: Existing logger from process.
+        worker_watchdog: Watchdog of the workers, None if not watched.
+        slot: Index of the worker in the watchdog.
+        controller: Controller of only this worker.
+        activation: Gate of a spare worker, None for a worker that runs as soon as started.
 
         Returns whether a worker was created and the worker.
         """
+        mode = worker_properties.get_execution_mode()
         try:
-            worker = mp.Process(target=target, args=args)
+            if mode == execution_mode.ExecutionMode.THREAD:
+                worker = execution_mode.ThreadWorker(
+                    run_worker,
+                    (
+                        worker_properties.get_worker_target(),
+                        worker_properties.get_worker_arguments(controller),
+                        controller,
+                        worker_watchdog,
+                        slot,
+                    ),
+                )
+            elif mode == execution_mode.ExecutionMode.ASYNCIO:
+                worker = execution_mode.AsyncioWorker(
+                    run_async_worker,
+                    (
+                        worker_properties.get_worker_target(),
+                        worker_properties.get_worker_arguments(controller),
+                        controller,
+                        worker_watchdog,
+                        slot,
+                    ),
+                )
+            else:
+                worker = mp.Process(
+                    target=run_worker,
+                    args=(
+                        worker_properties.get_worker_target(),
+                        worker_properties.get_worker_arguments(controller),
+                        controller,
+                        worker_watchdog,
+                        slot,
+                        activation,
+                    ),
+                )
         # Catching all exceptions for library call
         # pylint: disable-next=broad-exception-caught
         except Exception as e:
@@ -196,52 +458,502 @@ class WorkerManager:
 
         return True, worker
 
+    def __create_worker(
+        self, slot: int, controller: worker_controller.WorkerController
+    ) -> "tuple[bool, Worker | None]":
+        """
+        Creates a worker for the slot with a fresh watchdog deadline.
+        """
+        if self.__watchdog is not None:
+            self.__watchdog.beat(slot)
+
+        return WorkerManager.__create_single_worker(
+            self.__worker_properties,
+            self.__local_logger,
+            self.__watchdog,
+            slot,
+            controller,
+        )
+
+    def __create_spare_worker(self) -> "spare_pool.SpareWorker | None":
+        """
+        Hook of the spare pool: creates a spare worker, which is given its slot on activation.
+        """
+        controller = self.__worker_properties.get_controller().create_child()
+        activation = process_start.WorkerActivation()
+        result, worker = WorkerManager.__create_single_worker(
+            self.__worker_properties,
+            self.__local_logger,
+            self.__watchdog,
+            0,
+            controller,
+            activation,
+        )
+        if not result:
+            return None
+
+        # Get Pylance to stop complaining
+        assert isinstance(worker, mp.Process)
+
+        return spare_pool.SpareWorker(worker, controller, activation)
+
+    def __replenish_spare_workers(self) -> None:
+        """
+        Starts spare workers until there are enough.
+        """
+        if not self.__spare_pool.replenish():
+            self.__local_logger.error(
+                f"Failed to create spare {self.__worker_properties.get_target_name()}", True
+            )
+
+    def __start_worker(
+        self,
+        slot: int,
+        is_restart: bool,
+        activation: "process_start.WorkerActivation | None" = None,
+    ) -> None:
+        """
+        Starts the worker in the slot, or activates it if it is a spare,
+        and applies its scheduling.
+        """
+        worker = self.__workers[slot]
+        self.__worker_controllers[slot].reset_first_check_time()
+        self.__launch_times[slot] = time.monotonic()
+        self.__pending_startup_slots.add(slot)
+
+        if activation is not None:
+            activation.activate(slot)
+            self.__activations[slot] = activation
+        elif isinstance(worker, mp.Process):
+            process_start.start_process(worker)
+        else:
+            worker.start()
+
+        self.__supervisor.record_start(slot, is_restart)
+
+        worker_scheduling = self.__worker_properties.get_scheduling()
+        if worker_scheduling is None or worker.pid is None:
+            return
+
+        # The worker keeps running with the settings of main for those that failed
+        for error in worker_scheduling.apply(worker.pid):
+            self.__local_logger.error(
+                f"Failed to set {self.__worker_properties.get_target_name()} {worker.name} "
+                f"{error}",
+                True,
+            )
+
     def start_workers(self) -> None:
         """
         Start workers.
         """
-        for worker in self.__workers:
-            worker.start()
+        for slot in range(len(self.__workers)):
+            self.__start_worker(slot, False)
+
+        self.__replenish_spare_workers()
 
-    def join_workers(self) -> None:
+    def __replace_worker(self, slot: int) -> bool:
         """
-        Join workers.
+        Puts a spare or a new worker in place of the dead one at slot and starts it.
+
+        Returns whether the worker was replaced.
         """
-        for worker in self.__workers:
-            worker.join()
+        spare_worker = self.__spare_pool.take()
+        if spare_worker is None:
+            result, new_worker = self.__create_worker(slot, self.__worker_controllers[slot])
+            if not result:
+                return False
 
-    def check_and_restart_dead_workers(self) -> bool:
+            # Get Pylance to stop complaining
+            assert new_worker is not None
+
+            self.__workers[slot] = new_worker
+            self.__start_worker(slot, True)
+            return True
+
+        # Fresh watchdog deadline
+        if self.__watchdog is not None:
+            self.__watchdog.beat(slot)
+
+        # The spare acknowledges exit requests instead
+        self.__worker_controllers[slot].add_workers(-1)
+        spare_worker.controller.add_workers(1)
+
+        self.__workers[slot] = spare_worker.worker
+        self.__worker_controllers[slot] = spare_worker.controller
+        self.__start_worker(slot, True, spare_worker.activation)
+
+        # Off the restart's critical path
+        self.__replenish_spare_workers()
+
+        return True
+
+    def check_startup_times(self) -> "list[float]":
         """
-        Check and restart dead workers.
+        Logs the time from start (or activation of a spare) to the first loop iteration
+        of workers that reported it since the previous call.
 
-        Returns whether the dead workers were able to be restarted.
+        Returns the new startup times in seconds.
         """
-        new_workers = []
-        for worker in self.__workers:
-            if worker.is_alive():
-                new_workers.append(worker)
+        startup_times = []
+        for slot in sorted(self.__pending_startup_slots):
+            if slot >= len(self.__workers):
+                self.__pending_startup_slots.discard(slot)
                 continue
 
-            # Log dead worker
-            target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
-            self.__local_logger.warning(
-                f"Worker died, restarting {target_and_worker_name}",
+            first_check_time = self.__worker_controllers[slot].get_first_check_time()
+            if first_check_time == 0.0:
+                continue
+
+            startup_time = first_check_time - self.__launch_times[slot]
+            startup_times.append(startup_time)
+            self.__pending_startup_slots.discard(slot)
+
+            self.__local_logger.info(
+                f"{self.__worker_properties.get_target_name()} {self.__workers[slot].name} "
+                f"first loop {startup_time * 1000.0:.1f}ms after start",
                 True,
             )
 
-            # Create a new worker
-            result, new_worker = WorkerManager.__create_single_worker(
-                self.__worker_properties.get_worker_target(),
-                self.__worker_properties.get_worker_arguments(),
-                self.__local_logger,
+        return startup_times
+
+    def join_workers(self, timeout: float | None = None) -> "list[float]":
+        """
+        Join workers.
+
+        timeout: Time in seconds to wait for each worker, None to wait forever.
+
+        Returns the join time in seconds of each worker, measured from the call.
+        """
+        self.__spare_pool.cancel()
+
+        start_time = time.perf_counter()
+        join_times = []
+        for worker in self.__workers + self.__retiring_workers.get_workers():
+            worker.join(timeout)
+            join_time = time.perf_counter() - start_time
+            join_times.append(join_time)
+
+            target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
+            if worker.is_alive():
+                self.__local_logger.warning(
+                    f"{target_and_worker_name} did not join after {join_time:.3f}s", True
+                )
+            else:
+                self.__local_logger.info(f"{target_and_worker_name} joined in {join_time:.3f}s")
+
+        self.__reap_retired_workers()
+        self.__spare_pool.join(timeout)
+
+        return join_times
+
+    def get_controller(self) -> worker_controller.WorkerController:
+        """
+        Returns the controller of the workers, pause this to pause only these workers
+        if it is a child controller.
+        """
+        return self.__worker_properties.get_controller()
+
+    def restart_workers(self, timeout: float | None = None) -> bool:
+        """
+        Stops the workers through their controller and starts new ones.
+        The controller must be a child controller of only these workers, see
+        `WorkerController.create_child()`, otherwise other workers are stopped too.
+        Workers blocked on an empty input queue only see the request once an item arrives.
+
+        timeout: Time in seconds to wait for the acknowledgements and for each worker.
+
+        Returns whether all workers stopped and were restarted.
+        """
+        controller = self.__worker_properties.get_controller()
+        controller.request_exit()
+        controller.wait_for_all_acknowledged(timeout)
+        self.join_workers(timeout)
+
+        if any(worker.is_alive() for worker in self.__workers):
+            self.__local_logger.error(
+                f"{self.__worker_properties.get_target_name()} workers did not stop, not restarted",
+                True,
             )
+            return False
+
+        controller.clear_exit()
+
+        new_workers = []
+        for slot in range(len(self.__workers)):
+            result, new_worker = self.__create_worker(slot, self.__worker_controllers[slot])
             if not result:
-                self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
+                self.__local_logger.error(
+                    f"Failed to restart {self.__worker_properties.get_target_name()}", True
+                )
                 return False
 
-            # Append the new worker
             new_workers.append(new_worker)
 
         self.__workers = new_workers
+        self.start_workers()
+
+        return True
+
+    def check_and_restart_dead_workers(self) -> bool:
+        """
+        Check and restart dead workers according to the restart supervisor.
+        Never waits, a restart that is backing off happens in a later call.
+
+        Returns whether the dead workers were able to be restarted,
+        False if a worker is crash looping.
+        """
+        exited_slots, due_slots = self.__supervisor.check_workers(self.__workers)
+
+        states = self.__supervisor.get_states()
+        for slot in exited_slots:
+            worker = self.__workers[slot]
+            state = states[slot]
+            target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
+            if state.is_crash_looping:
+                self.__local_logger.error(
+                    f"{target_and_worker_name} is crash looping "
+                    f"after {state.restart_count} restarts, not restarting",
+                    True,
+                )
+            elif state.is_stopped:
+                self.__local_logger.info(
+                    f"{target_and_worker_name} exited with code {worker.exitcode}, "
+                    f"not restarting ({self.__supervisor.policy.name})",
+                    True,
+                )
+            else:
+                self.__local_logger.warning(
+                    f"Worker died with code {worker.exitcode}, restarting "
+                    f"{target_and_worker_name} in "
+                    f"{state.next_restart_time - time.monotonic():.3f}s",
+                    True,
+                )
+
+        for slot in due_slots:
+            if not self.__replace_worker(slot):
+                self.__local_logger.error(
+                    f"Failed to restart {self.__worker_properties.get_target_name()} "
+                    f"{self.__workers[slot].name}",
+                    True,
+                )
+                return False
+
+        return not self.__supervisor.is_crash_looping()
+
+    def get_worker_states(self) -> "list[supervisor.WorkerState]":
+        """
+        Returns the restart count, uptime and status of each worker.
+        """
+        return self.__supervisor.get_states()
+
+    def check_and_restart_stalled_workers(self) -> bool:
+        """
+        Kills and restarts workers that have not checked their controller within
+        the stall deadline. Does nothing without a stall deadline.
+
+        Killing a worker can leave a lock it held taken, and killing it while it waits
+        on a shared condition (e.g. `Mailbox.get()`) blocks the next notify forever.
+        Workers must block with a timeout shorter than the stall deadline and check
+        their controller in between, so that only workers stuck elsewhere are killed.
+        Thread workers cannot be killed, their stalls are only logged.
+        Asyncio workers are cancelled, which only ends them at an await.
+
+        Returns whether the stalled workers were able to be restarted.
+        """
+        if self.__stall_monitor is None:
+            return True
+
+        kill_slots, unkillable_slots = self.__stall_monitor.check_workers(self.__workers)
+
+        for slot in unkillable_slots:
+            self.__local_logger.error(
+                f"Worker stalled for {self.__stall_monitor.watchdog.get_stall_time(slot):.3f}s, "
+                f"{self.__worker_properties.get_target_name()} {self.__workers[slot].name} "
+                "is a thread and cannot be restarted",
+                True,
+            )
+
+        is_restarted = not self.__stall_monitor.has_unkillable_stall()
+        for slot in kill_slots:
+            worker = self.__workers[slot]
+            target_and_worker_name = f"{self.__worker_properties.get_target_name()} {worker.name}"
+            self.__local_logger.warning(
+                f"Worker stalled for {self.__stall_monitor.watchdog.get_stall_time(slot):.3f}s, "
+                f"restarting {target_and_worker_name}",
+                True,
+            )
+
+            worker.kill()
+            worker.join(self.__stall_monitor.watchdog.deadline)
+            if worker.is_alive():
+                self.__local_logger.error(
+                    f"{target_and_worker_name} did not stop, not restarted", True
+                )
+                is_restarted = False
+                continue
+
+            if not self.__replace_worker(slot):
+                self.__local_logger.error(f"Failed to restart {target_and_worker_name}", True)
+                return False
+
+        return is_restarted
+
+    def get_stall_stats(self) -> "tuple[list[float], watchdog.StallStats | None]":
+        """
+        Returns the time in seconds since each worker last checked its controller,
+        and the stalls detected so far. Both empty or None without a stall deadline.
+        """
+        if self.__watchdog is None:
+            return [], None
+
+        # Slots beyond the current workers are free
+        return self.__watchdog.get_stall_times()[: len(self.__workers)], self.__watchdog.stats
+
+    def get_worker_count(self) -> int:
+        """
+        Returns the current number of workers, excluding retiring ones.
+        """
+        return len(self.__workers)
+
+    def get_target_name(self) -> str:
+        """
+        Returns the name of the worker function.
+        """
+        return self.__worker_properties.get_target_name()
+
+    def sample_resource_usage(self) -> "dict[int, resource_usage.ResourceHistory]":
+        """
+        Samples the CPU time, resident memory, context switches and open file descriptors
+        of each worker process from /proc. A restarted worker starts a new history.
+        Thread and asyncio workers share main's process and are not sampled.
+        Call periodically, the period is the sampling period.
+
+        Returns the resource history of each sampled slot.
+        """
+        return self.__resource_sampler.sample(
+            [worker.pid if worker.is_alive() else None for worker in self.__workers]
+        )
+
+    def get_resource_histories(self) -> "dict[int, resource_usage.ResourceHistory]":
+        """
+        Returns the resource history of each sampled slot, without sampling.
+        """
+        return self.__resource_sampler.histories
+
+    def check_and_scale_workers(self) -> int:
+        """
+        Samples the input queues and adds or retires a worker if the autoscaler decides so.
+        Does nothing without an autoscaler.
+        Call periodically, the period is the autoscaler's sampling period.
+
+        A retired worker finishes its current item and exits when it next checks its
+        controller, see `autoscaler.RetiringWorkers`.
+        No other scaling happens until the retired worker has exited.
+
+        Returns the current number of workers.
+        """
+        if self.__autoscaler is None:
+            return len(self.__workers)
+
+        self.__reap_retired_workers()
+        if len(self.__retiring_workers) > 0:
+            for worker, retiring_duration in self.__retiring_workers.find_stuck():
+                self.__local_logger.error(
+                    f"{self.__worker_properties.get_target_name()} {worker.name} has not "
+                    f"exited {retiring_duration:.3f}s after retiring, blocking scaling, "
+                    "it must get its input with a timeout and check its controller",
+                    True,
+                )
+
+            return len(self.__workers)
+
+        # Checked by create()
+        input_stats = [
+            input_queue.get_stats() for input_queue in self.__worker_properties.get_input_queues()
+        ]
+        change = self.__autoscaler.sample(input_stats, len(self.__workers))
+        if change > 0:
+            self.__add_worker()
+        elif change < 0:
+            self.__retire_worker()
+
+        return len(self.__workers)
+
+    def __add_worker(self) -> bool:
+        """
+        Creates and starts a worker in the next slot, or activates a spare.
+
+        Returns whether the worker was started.
+        """
+        slot = len(self.__workers)
+        activation = None
+        spare_worker = self.__spare_pool.take()
+        if spare_worker is not None:
+            if self.__watchdog is not None:
+                self.__watchdog.beat(slot)
+
+            worker = spare_worker.worker
+            controller = spare_worker.controller
+            activation = spare_worker.activation
+        else:
+            controller = self.__worker_properties.get_controller().create_child()
+            result, worker = self.__create_worker(slot, controller)
+            if not result:
+                self.__local_logger.error(
+                    f"Failed to scale up {self.__worker_properties.get_target_name()}", True
+                )
+                return False
+
+            # Get Pylance to stop complaining
+            assert worker is not None
+
+        for input_queue in self.__worker_properties.get_input_queues():
+            input_queue.add_consumers(1)
+
+        controller.add_workers(1)
+
+        self.__workers.append(worker)
+        self.__worker_controllers.append(controller)
+        self.__supervisor.resize(len(self.__workers))
+        self.__start_worker(slot, False, activation)
+        self.__replenish_spare_workers()
+
+        self.__local_logger.info(
+            f"Scaled up {self.__worker_properties.get_target_name()} "
+            f"to {len(self.__workers)} workers",
+            True,
+        )
 
         return True
+
+    def __retire_worker(self) -> None:
+        """
+        Requests the worker in the last slot to exit, it is no longer restarted.
+        """
+        worker = self.__workers.pop()
+        controller = self.__worker_controllers.pop()
+        self.__supervisor.resize(len(self.__workers))
+        self.__retiring_workers.add(worker, controller)
+
+        self.__local_logger.info(
+            f"Scaling down {self.__worker_properties.get_target_name()} "
+            f"to {len(self.__workers)} workers, draining {worker.name}",
+            True,
+        )
+
+    def __reap_retired_workers(self) -> None:
+        """
+        Unregisters retiring workers that have exited.
+        """
+        for worker, controller in self.__retiring_workers.reap():
+            for input_queue in self.__worker_properties.get_input_queues():
+                input_queue.add_consumers(-1)
+
+            controller.add_workers(-1)
+
+            self.__local_logger.info(
+                f"{self.__worker_properties.get_target_name()} {worker.name} retired "
+                f"with code {worker.exitcode}",
+                True,
+            )